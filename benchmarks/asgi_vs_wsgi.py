@@ -0,0 +1,68 @@
+"""Concurrent /api/fund throughput of one WSGI (gunicorn threads) and one ASGI
+(uvicorn) process against a node that takes ``--node-latency`` ms per broadcast.
+
+    python -m benchmarks.asgi_vs_wsgi --requests 1000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import tempfile
+
+from .common import (
+    benchmark_env,
+    drive,
+    migrate,
+    print_table,
+    random_wallet,
+    run_server,
+    start_node,
+    summarize,
+)
+
+FUND_PATHS = {"wsgi": "/api/fund", "asgi": "/api/async/fund"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--node-latency",
+        default="200",
+        help="Broadcast latency in ms or a distribution, e.g. lognormal:50,0.5",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=8, help="gunicorn threads of the WSGI worker"
+    )
+    args = parser.parse_args()
+
+    node = start_node(args.node_latency)
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            env = benchmark_env(workdir, node.url)
+            migrate(env)
+            for kind, path in FUND_PATHS.items():
+                with run_server(kind, env, threads=args.threads) as base_url:
+                    url = base_url + path
+                    body = lambda: {"wallet_address": random_wallet()}  # noqa: E731
+                    # Warm up the node client, gas price cache and nonce row
+                    asyncio.run(drive("POST", url, 5, 1, body))
+                    results, elapsed = asyncio.run(
+                        drive("POST", url, args.requests, args.concurrency, body)
+                    )
+                rows.append({"server": kind, **summarize(results, elapsed)})
+    finally:
+        node.stop()
+
+    print(
+        f"{args.requests} fund requests, {args.concurrency} concurrent, "
+        f"node latency {args.node_latency} ms"
+    )
+    print_table(
+        rows, ["server", "requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms"]
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import ClientSession, TCPConnector
+from web3 import Web3
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+
+def start_node(latency, seed=0):
+    """Start a fake node answering broadcasts after ``latency`` (ms or a distribution)"""
+    from faucet.fake_node import FakeNode
+
+    # Sender recovery would cost the driver process several ms per broadcast
+    node = FakeNode(
+        chain_id=1337, send_latency=latency, block_time=1, check_nonces=False, seed=seed
+    )
+    node.start()
+    return node
+
+
+def benchmark_env(workdir, node_url):
+    """Environment for Django processes started by a benchmark"""
+    env = dict(os.environ)
+    env.update(
+        DJANGO_SETTINGS_MODULE="benchmarks.settings",
+        BENCHMARK_SQLITE_PATH=os.path.join(workdir, "benchmark.sqlite3"),
+        BENCHMARK_NODE_URL=node_url,
+        PYTHONPATH=ROOT,
+        # gunicorn.conf.py is picked up from ROOT, keep its worker recycling and
+        # access log out of the measurements
+        GUNICORN_MAX_REQUESTS="0",
+        GUNICORN_ACCESS_LOG="",
+    )
+    return env
+
+
+def setup_django(env):
+    """Configure Django in this process with the settings of ``benchmark_env``"""
+    import django
+
+    os.environ.update(env)
+    django.setup()
+
+
+def migrate(env):
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "--noinput", "-v", "0"],
+        cwd=ROOT,
+        env=env,
+        check=True,
+    )
+
+
+SERVERS = {
+    # One process each, so the comparison is per process
+    "wsgi": lambda port, threads: [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "faucet_project.wsgi:application",
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        "1",
+        "--threads",
+        str(threads),
+        "--log-level",
+        "warning",
+    ],
+    "asgi": lambda port, threads: [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "faucet_project.asgi:application",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+        "--no-access-log",
+    ],
+}
+
+
+@contextmanager
+def run_server(kind, env, threads=8):
+    port = free_port()
+    process = subprocess.Popen(SERVERS[kind](port, threads), cwd=ROOT, env=env)
+    try:
+        wait_for_port(port)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def random_wallet():
+    return Web3.to_checksum_address("0x" + os.urandom(20).hex())
+
+
+def make_transactions(count):
+    """Unsaved transactions, one per second going back from now"""
+    from faucet.models import Transaction
+
+    now = datetime.now(timezone.utc)
+    statuses = ["broadcast", "confirmed", "failed", "dropped"]
+    return [
+        Transaction(
+            wallet_address=random_wallet(),
+            transaction_hash="0x" + os.urandom(32).hex(),
+            sender_address=random_wallet(),
+            amount="0.0001",
+            status=statuses[i % len(statuses)],
+            block_number=1000 + i,
+            gas_used=21000,
+            created_at=now - timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+async def drive(method, url, total, concurrency, body=None):
+    """Send ``total`` requests with ``concurrency`` in flight.
+
+    ``body`` is a callable returning the JSON body of each request. Returns the
+    latency and status of every request plus the wall clock time.
+    """
+    results = []
+    remaining = iter(range(total))
+
+    async def worker(session):
+        for _ in remaining:
+            payload = json.dumps(body()) if body else None
+            started = time.perf_counter()
+            try:
+                async with session.request(
+                    method,
+                    url,
+                    data=payload,
+                    headers={"Content-Type": "application/json"},
+                ) as response:
+                    await response.read()
+                    code = response.status
+            except Exception:
+                code = 0
+            results.append((time.perf_counter() - started, code))
+
+    connector = TCPConnector(limit=concurrency)
+    async with ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def summarize(results, elapsed, ok_statuses=(200, 202, 304)):
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, code in results if code not in ok_statuses)
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "rps": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def print_table(rows, columns):
+    widths = [
+        max(len(column), *(len(str(row[column])) for row in rows)) for column in columns
+    ]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print(
+            "  ".join(
+                str(row[column]).ljust(width) for column, width in zip(columns, widths)
+            )
+        )
+
+
+def git_commit():
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip() or None
+
+
+def save_baseline(name, params, results):
+    """Write ``results`` (rows keyed by their "name") to baselines/<name>.json"""
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    baseline = {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "params": params,
+        "results": {row["name"]: row for row in results},
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+
+def load_baseline(name):
+    path = (
+        name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+    )
+    with open(path) as f:
+        return json.load(f)
+
+
+# Higher is better for throughput, lower for latency
+HIGHER_IS_BETTER = {"rps", "items_per_s"}
+COMPARED_METRICS = ("rps", "items_per_s", "p50_ms", "p95_ms", "p99_ms")
+
+
+def compare_baseline(baseline, results, tolerance=0.10):
+    """Print each metric against ``baseline``, return the regressions.
+
+    A regression is a metric that got worse by more than ``tolerance`` (a
+    fraction of the baseline value).
+    """
+    rows, regressions = [], []
+    for row in results:
+        before = baseline["results"].get(row["name"])
+        if before is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in row or not before.get(metric):
+                continue
+            change = (row[metric] - before[metric]) / before[metric]
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "REGRESSION" if worse > tolerance else ""
+            rows.append(
+                {
+                    "name": row["name"],
+                    "metric": metric,
+                    "baseline": before[metric],
+                    "current": row[metric],
+                    "change": f"{change:+.1%}",
+                    "flag": flag,
+                }
+            )
+            if flag:
+                regressions.append((row["name"], metric))
+    print(f"Compared with baseline from commit {baseline.get('commit')}")
+    if rows:
+        print_table(rows, ["name", "metric", "baseline", "current", "change", "flag"])
+    return regressions
+
+
+def add_baseline_arguments(parser):
+    parser.add_argument("--save", metavar="NAME", help="Save results as a baseline")
+    parser.add_argument(
+        "--compare", metavar="NAME", help="Compare results with a saved baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Allowed slowdown against the baseline before failing (fraction)",
+    )
+
+
+def handle_baseline(args, params, results):
+    """Save and/or compare as requested, exit 1 on regressions"""
+    baseline = load_baseline(args.compare) if args.compare else None
+    if args.save:
+        print(f"Saved baseline to {save_baseline(args.save, params, results)}")
+    if baseline and compare_baseline(baseline, results, args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,102 @@
+"""Request latency with a new database connection per request vs persistent ones.
+
+    BENCHMARK_DATABASE=postgres python -m benchmarks.db_connections
+
+Measures what opening a connection costs on its own, then runs a gunicorn
+worker once per ``--conn-max-age`` value and drives a cheap endpoint, so the
+difference in latency is the connection setup.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from .common import (
+    add_baseline_arguments,
+    benchmark_env,
+    drive,
+    handle_baseline,
+    percentile,
+    print_table,
+    run_server,
+    setup_django,
+    start_node,
+    summarize,
+)
+
+
+def connect_timings(count):
+    """Seconds taken by ``count`` fresh connections, sorted"""
+    from django.db import connection
+
+    timings = []
+    for _ in range(count):
+        connection.close()
+        started = time.perf_counter()
+        connection.ensure_connection()
+        timings.append(time.perf_counter() - started)
+    connection.close()
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument(
+        "--conn-max-age",
+        default="0,60",
+        help="Comma separated CONN_MAX_AGE values to compare",
+    )
+    parser.add_argument(
+        "--path",
+        default="/api/transactions?limit=10",
+        help="Endpoint to drive, something with one cheap query",
+    )
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    node = start_node(0)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            env = benchmark_env(workdir, node.url)
+            setup_django(env)
+            from django.core.management import call_command
+
+            call_command("migrate", verbosity=0)
+            timings = connect_timings(50)
+            print(
+                f"Opening a connection: p50 {percentile(timings, 0.5) * 1000:.2f} ms, "
+                f"p99 {percentile(timings, 0.99) * 1000:.2f} ms"
+            )
+
+            for max_age in args.conn_max_age.split(","):
+                with run_server(
+                    "wsgi", {**env, "BENCHMARK_CONN_MAX_AGE": max_age}, args.threads
+                ) as base_url:
+                    url = base_url + args.path
+                    asyncio.run(drive("GET", url, 20, 1))
+                    measured, elapsed = asyncio.run(
+                        drive("GET", url, args.requests, args.concurrency)
+                    )
+                name = f"conn_max_age={max_age}"
+                results.append({"name": name, **summarize(measured, elapsed)})
+    finally:
+        node.stop()
+
+    print_table(
+        results, ["name", "requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms"]
+    )
+    params = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "path": args.path,
+    }
+    handle_baseline(args, params, results)
+
+
+if __name__ == "__main__":
+    main()
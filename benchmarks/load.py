@@ -0,0 +1,117 @@
+"""End-to-end load test of /api/fund, /api/stats and /api/transactions.
+
+    python -m benchmarks.load --server wsgi --save load-wsgi
+    python -m benchmarks.load --server wsgi --compare load-wsgi
+
+Starts a fake JSON-RPC node, seeds a fresh database with ``--seed`` transactions,
+runs the API under gunicorn (wsgi) or uvicorn (asgi) and drives each endpoint
+with ``--concurrency`` requests in flight.
+"""
+
+import argparse
+import asyncio
+import tempfile
+
+from .common import (
+    add_baseline_arguments,
+    benchmark_env,
+    drive,
+    handle_baseline,
+    make_transactions,
+    print_table,
+    random_wallet,
+    run_server,
+    setup_django,
+    start_node,
+    summarize,
+)
+
+ENDPOINTS = {
+    "wsgi": {
+        "fund": ("POST", "/api/fund"),
+        "stats": ("GET", "/api/stats"),
+        "transactions": ("GET", "/api/transactions?limit=100"),
+    },
+    "asgi": {
+        "fund": ("POST", "/api/async/fund"),
+        "stats": ("GET", "/api/async/stats"),
+        "transactions": ("GET", "/api/async/transactions?limit=100"),
+    },
+}
+
+
+def seed(count):
+    from django.core.management import call_command
+
+    from faucet.models import Transaction
+    from faucet.rollups import rebuild_rollups
+
+    call_command("migrate", verbosity=0)
+    Transaction.objects.bulk_create(make_transactions(count), batch_size=5000)
+    # bulk_create skips the signals that maintain the stats rollup
+    rebuild_rollups()
+
+
+def fund_body():
+    return {"wallet_address": random_wallet()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=sorted(ENDPOINTS), default="wsgi")
+    parser.add_argument(
+        "--endpoints",
+        default="fund,stats,transactions",
+        help="Comma separated subset of fund, stats, transactions",
+    )
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--node-latency",
+        default="50",
+        help="Broadcast latency in ms or a distribution, e.g. lognormal:50,0.5",
+    )
+    parser.add_argument("--seed", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=8)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    endpoints = args.endpoints.split(",")
+
+    node = start_node(args.node_latency)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            env = benchmark_env(workdir, node.url)
+            setup_django(env)
+            seed(args.seed)
+            with run_server(args.server, env, threads=args.threads) as base_url:
+                for endpoint in endpoints:
+                    method, path = ENDPOINTS[args.server][endpoint]
+                    body = fund_body if method == "POST" else None
+                    url = base_url + path
+                    # Warm up connections and caches before measuring
+                    asyncio.run(drive(method, url, 10, 1, body))
+                    measured, elapsed = asyncio.run(
+                        drive(method, url, args.requests, args.concurrency, body)
+                    )
+                    name = f"{args.server}:{endpoint}"
+                    results.append({"name": name, **summarize(measured, elapsed)})
+    finally:
+        node.stop()
+
+    print(
+        f"{args.requests} requests per endpoint, {args.concurrency} concurrent, "
+        f"{args.seed} seeded rows, node latency {args.node_latency} ms"
+    )
+    print_table(
+        results, ["name", "requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms"]
+    )
+    params = {
+        key: getattr(args, key)
+        for key in ("server", "requests", "concurrency", "node_latency", "seed")
+    }
+    handle_baseline(args, params, results)
+
+
+if __name__ == "__main__":
+    main()
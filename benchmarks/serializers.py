@@ -0,0 +1,102 @@
+"""Micro-benchmarks of request validation and transaction list serialization.
+
+    python -m benchmarks.serializers --rows 1000,100000 --save serializers
+
+Each benchmark runs ``--repeat`` times. ``p50_ms``/``p95_ms``/``p99_ms`` are
+over the repeats (one repeat handles ``rows`` items), ``items_per_s`` is the
+median throughput.
+"""
+
+import argparse
+import tempfile
+import time
+
+from .common import (
+    add_baseline_arguments,
+    benchmark_env,
+    handle_baseline,
+    make_transactions,
+    percentile,
+    print_table,
+    random_wallet,
+    setup_django,
+)
+
+
+def bench(name, rows, repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    median = percentile(timings, 0.50)
+    return {
+        "name": f"{name}[{rows}]",
+        "rows": rows,
+        "items_per_s": round(rows / median, 1) if median else 0.0,
+        "p50_ms": round(median * 1000, 2),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 2),
+    }
+
+
+def run(rows, repeat):
+    from rest_framework.renderers import JSONRenderer
+
+    from faucet.models import Transaction
+    from faucet.pagination import keyset_page
+    from faucet.schemas import TransactionSerializer, WalletRequestSerializer
+
+    wallet_payloads = [{"wallet_address": random_wallet()} for _ in range(rows)]
+    transactions = make_transactions(rows)
+    transaction_payloads = TransactionSerializer(transactions, many=True).data
+
+    Transaction.objects.all().delete()
+    Transaction.objects.bulk_create(transactions, batch_size=5000)
+
+    def validate_wallets():
+        # One serializer per payload, as /api/fund builds one per request
+        for payload in wallet_payloads:
+            assert WalletRequestSerializer(data=payload).is_valid()
+
+    def validate_transactions():
+        assert TransactionSerializer(data=transaction_payloads, many=True).is_valid()
+
+    def serialize_list():
+        JSONRenderer().render(TransactionSerializer(transactions, many=True).data)
+
+    def transaction_list():
+        # What /api/transactions does per page, with the page as large as ``rows``
+        page, _ = keyset_page(Transaction.objects.all(), limit=rows)
+        JSONRenderer().render(TransactionSerializer(page, many=True).data)
+
+    return [
+        bench("wallet_request_validate", rows, repeat, validate_wallets),
+        bench("transaction_validate", rows, repeat, validate_transactions),
+        bench("transaction_serialize", rows, repeat, serialize_list),
+        bench("transaction_list", rows, repeat, transaction_list),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="1000,100000", help="Comma separated sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.rows.split(",")]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        setup_django(benchmark_env(workdir, "http://127.0.0.1:8545"))
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
+        results = [row for rows in sizes for row in run(rows, args.repeat)]
+
+    print_table(results, ["name", "items_per_s", "p50_ms", "p95_ms", "p99_ms"])
+    handle_baseline(args, {"rows": sizes, "repeat": args.repeat}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+
+from faucet_project.settings import *  # noqa
+
+# Benchmarks run against a throwaway SQLite file unless BENCHMARK_DATABASE is
+# "postgres", which uses the regular POSTGRES_* settings
+if os.environ.get("BENCHMARK_DATABASE", "sqlite") == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "benchmarks.sqlite_immediate",
+            "NAME": os.environ.get("BENCHMARK_SQLITE_PATH", "benchmark.sqlite3"),
+            # Concurrent writers wait for the lock instead of failing
+            "OPTIONS": {"timeout": 30},
+        }
+    }
+
+# Lets db_connections compare closing connections with keeping them open
+if "BENCHMARK_CONN_MAX_AGE" in os.environ:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ["BENCHMARK_CONN_MAX_AGE"])
+
+DEBUG = False
+
+# Point the faucet at the fake node and take the rate limits out of the way
+ETHEREUM_NODE_URL = os.environ.get("BENCHMARK_NODE_URL", "http://127.0.0.1:8545")
+PRIVATE_KEY = "0x" + "11" * 32
+CHAIN_ID = 1337
+FAUCET_AMOUNT = "0.0001"
+FAUCET_INTERVAL_MIN = 0
+FAUCET_IP_RATE = "1000000/s"
+FAUCET_RATELIMIT_BACKEND = "memory"
+FAUCET_GAS_PRICE_TTL = 3600
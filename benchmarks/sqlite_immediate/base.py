@@ -0,0 +1,19 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite backend for concurrent benchmark servers.
+
+    Transactions take the write lock when they begin, so concurrent writers wait
+    for the busy timeout instead of failing with "database is locked" when a read
+    transaction tries to upgrade. Django 5.1 offers this as the
+    ``transaction_mode`` option.
+    """
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        conn.execute("PRAGMA journal_mode = WAL")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class FaucetConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "faucet"
+
+    def ready(self):
+        # Keep the stats rollup table in step with transaction writes
+        from . import rollups  # noqa: F401
+        from .conf import get_settings, install_reload_handler
+
+        # Fail at startup rather than on the first request, reload on SIGHUP
+        get_settings()
+        install_reload_handler()
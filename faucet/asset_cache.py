@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+try:
+    import brotli
+except ImportError:
+    # Without it assets are still served gzip or identity
+    brotli = None
+
+from .conf import get_settings
+from .metrics import ASSET_CACHE_REQUESTS, ASSET_CACHE_SIZE
+
+# Compressed once per asset and process, so spend the CPU on a smaller file
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+# Variants that save less than this are not worth storing (images, fonts)
+MIN_SAVING = 0.05
+
+
+@dataclass(frozen=True)
+class CachedAsset:
+    content_type: str
+    # Encoding ("br", "gzip", "identity") -> body, best first
+    bodies: dict
+    etags: dict
+
+    @property
+    def size(self):
+        return sum(len(body) for body in self.bodies.values())
+
+    def variant(self, accept_encoding):
+        """Encoding and body to send for an ``Accept-Encoding`` header"""
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in (accept_encoding or "").split(",")
+        }
+        for encoding, body in self.bodies.items():
+            if encoding in accepted or encoding == "identity":
+                return encoding, body
+
+
+def compress(content_type, body):
+    """Build a ``CachedAsset`` with every encoding that makes ``body`` smaller"""
+    variants = {}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    variants["gzip"] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    bodies = {
+        encoding: encoded
+        for encoding, encoded in variants.items()
+        if len(encoded) <= len(body) * (1 - MIN_SAVING)
+    }
+    bodies["identity"] = body
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    # One strong validator per representation
+    etags = {
+        encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+        for encoding in bodies
+    }
+    return CachedAsset(content_type, bodies, etags)
+
+
+class AssetCache:
+    """Least recently used Streamlit assets, bounded by the bytes of all variants.
+
+    Streamlit's bundles are content-hashed and never change under a name, so
+    entries need no expiry. Assets larger than a quarter of the budget are not
+    kept, so one bundle cannot flush the rest.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        with self._lock:
+            asset = self.entries.get(path)
+            if asset is not None:
+                self.entries.move_to_end(path)
+        ASSET_CACHE_REQUESTS.labels("miss" if asset is None else "hit").inc()
+        return asset
+
+    def accepts(self, length):
+        return 0 < length <= self.max_bytes // 4
+
+    def put(self, path, content_type, body):
+        asset = compress(content_type, body)
+        if not self.accepts(asset.size):
+            return asset
+        with self._lock:
+            previous = self.entries.pop(path, None)
+            if previous is not None:
+                self.size -= previous.size
+            self.entries[path] = asset
+            self.size += asset.size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+            ASSET_CACHE_SIZE.set(self.size)
+        return asset
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_asset_cache():
+    """Return the process-wide asset cache, or None when it is disabled"""
+    global _cache
+    if _cache is None:
+        max_bytes = get_settings().streamlit_cache_bytes
+        if max_bytes <= 0:
+            return None
+        with _cache_lock:
+            if _cache is None:
+                _cache = AssetCache(max_bytes)
+    return _cache
+
+
+def reset_asset_cache():
+    """Drop every cached asset (tests, config reloads)"""
+    global _cache
+    with _cache_lock:
+        _cache = None
+    ASSET_CACHE_SIZE.set(0)
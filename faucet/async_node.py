@@ -0,0 +1,134 @@
+import asyncio
+from contextlib import suppress
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from asgiref.sync import sync_to_async
+from web3 import AsyncWeb3
+from web3.providers.async_rpc import AsyncHTTPProvider
+
+from .conf import get_settings
+from .metrics import stage
+from .node import get_node_client
+from .nonce import is_nonce_error
+
+
+class PooledAsyncHTTPProvider(AsyncHTTPProvider):
+    """Async provider that sends every RPC call through one aiohttp connection pool.
+
+    web3's session cache is keyed per thread and event loop and caps each session
+    at 100 connections. This provider owns its session instead, sized to
+    ``pool_size``, and opens a new one if it is used from another event loop.
+    """
+
+    def __init__(self, endpoint_uri, pool_size=200, timeout=None):
+        super().__init__(endpoint_uri)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = None
+
+    def _get_session(self):
+        loop = asyncio.get_running_loop()
+        if (
+            self.session is None
+            or self.session.closed
+            or self.session._loop is not loop
+        ):
+            self.session = ClientSession(
+                connector=TCPConnector(limit=self.pool_size),
+                timeout=self.timeout,
+                raise_for_status=True,
+            )
+        return self.session
+
+    async def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        async with self._get_session().post(
+            self.endpoint_uri, data=request_data, headers=self.get_request_headers()
+        ) as response:
+            return self.decode_rpc_response(await response.read())
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+
+class AsyncNodeClient:
+    """AsyncWeb3 counterpart of ``NodeClient`` for the ASGI views.
+
+    Signing accounts, nonce counters and the gas price cache are borrowed from the
+    sync client, so both deployments draw from one nonce sequence per key. Only
+    the broadcast goes through aiohttp, so a request waiting on the node does not
+    hold a thread.
+    """
+
+    def __init__(self, node, pool_size=200):
+        self.node = node
+        connect_timeout, read_timeout = node.timeout
+        self.provider = PooledAsyncHTTPProvider(
+            node.node_url,
+            pool_size=pool_size,
+            timeout=ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+        )
+        self.w3 = AsyncWeb3(self.provider)
+
+    async def send_funds(self, wallet_address):
+        """Async ``send_funds``, returning the hash and sender address"""
+        settings = get_settings()
+        with stage("gas_price"):
+            # Served from the oracle's cache, only a cold cache reaches the node
+            fees = await sync_to_async(self.node.gas.fees, thread_sensitive=False)()
+        transaction_fields = {
+            "to": wallet_address,
+            "value": settings.amount_wei,
+            "gas": 21000,
+            "chainId": settings.chain_id,
+            **fees,
+        }
+        with self.node.sender() as sender:
+            tx_hash = await self.send_with_nonce(sender, transaction_fields)
+        return tx_hash, sender.address
+
+    async def send_with_nonce(self, sender, transaction_fields):
+        """``nonce.send_with_nonce`` with the database nonce bookkeeping off the loop"""
+        allocate = sync_to_async(sender.nonces.allocate)
+        release = sync_to_async(sender.nonces.release)
+        resync = sync_to_async(sender.nonces.resync)
+        for attempt in range(2):
+            with stage("nonce"):
+                nonce = await allocate()
+            with stage("sign"):
+                signed_txn = sender.account.sign_transaction(
+                    {**transaction_fields, "nonce": nonce}
+                )
+            try:
+                with stage("broadcast"):
+                    return await self.w3.eth.send_raw_transaction(
+                        signed_txn.rawTransaction
+                    )
+            except Exception as e:
+                with stage("nonce_resync"):
+                    if not is_nonce_error(e):
+                        with suppress(Exception):
+                            await release(nonce)
+                        raise
+                    if attempt:
+                        with suppress(Exception):
+                            await resync()
+                        raise
+                    await resync()
+
+
+_async_client = None
+
+
+def get_async_node_client():
+    """Return the process-wide async client, wrapping the shared sync client"""
+    global _async_client
+    node = get_node_client()
+    client = _async_client
+    if client is None or client.node is not node:
+        # Rebuilt after reset_node_client(), e.g. on a settings reload
+        client = _async_client = AsyncNodeClient(
+            node, pool_size=get_settings().async_pool_size
+        )
+    return client
@@ -0,0 +1,154 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+
+from .async_node import get_async_node_client
+from .conf import get_settings
+from .limiter import client_ip, get_rate_limits
+from .metrics import record_outcome, stage, track_fund_request
+from .models import Transaction
+from .pagination import akeyset_page
+from .schemas import (
+    TransactionQueryParamsSerializer,
+    TransactionSerializer,
+    WalletRequestSerializer,
+)
+from .views import cached_stats
+
+
+@csrf_exempt
+@require_POST
+async def fund(request):
+    # The async ORM runs queries on another thread, so they are not counted here
+    with track_fund_request(count_queries=False):
+        return await _fund(request)
+
+
+async def _fund(request):
+    settings = get_settings()
+    ip_address = client_ip(request)
+
+    limits = get_rate_limits()
+    with stage("ip_limit"):
+        limited = await sync_to_async(limits.ip.hit)(ip_address)
+    if limited:
+        record_outcome("rate_limited", "ip")
+        return JsonResponse(
+            {"error": "Rate limit exceeded. Please wait before requesting again."},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+
+    with stage("validate"):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            data = None
+        serializer = WalletRequestSerializer(data=data)
+        valid = data is not None and serializer.is_valid()
+    if not valid:
+        record_outcome("invalid")
+        if data is None:
+            return JsonResponse(
+                {"error": "Invalid JSON body"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    wallet_address = serializer.validated_data["wallet_address"]
+    wallet_key = wallet_address.lower()
+    with stage("wallet_limit"):
+        limited = await sync_to_async(limits.wallet.hit)(wallet_key)
+    if limited:
+        record_outcome("rate_limited", "wallet")
+        return JsonResponse(
+            {"error": "Rate limit exceeded for this wallet"},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+
+    if settings.queue_mode:
+        with stage("insert"):
+            pending = await Transaction.objects.acreate(
+                wallet_address=wallet_address,
+                transaction_hash="",
+                amount=settings.amount,
+                status="pending",
+                ip_address=ip_address,
+            )
+        record_outcome("queued")
+        return JsonResponse(
+            {"request_id": pending.pk, "status": "pending"},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    try:
+        tx_hash, sender_address = await get_async_node_client().send_funds(
+            wallet_address
+        )
+        with stage("insert"):
+            await Transaction.objects.acreate(
+                wallet_address=wallet_address,
+                transaction_hash=tx_hash.hex(),
+                sender_address=sender_address,
+                amount=settings.amount,
+                status="broadcast",
+                ip_address=ip_address,
+            )
+        record_outcome("success")
+        return JsonResponse({"transaction_hash": tx_hash.hex()})
+
+    except Exception as e:
+        record_outcome("failed", type(e).__name__)
+        await sync_to_async(limits.wallet.refund)(wallet_key)
+        with stage("insert"):
+            await Transaction.objects.acreate(
+                wallet_address=wallet_address,
+                transaction_hash="",
+                amount=settings.amount,
+                status="failed",
+                error_message=str(e),
+                ip_address=ip_address,
+            )
+        return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@require_GET
+async def stats(request):
+    entry, headers, not_modified = await sync_to_async(cached_stats)(request)
+    if not_modified is not None:
+        return not_modified
+    return JsonResponse(entry["data"], headers=headers)
+
+
+@require_GET
+async def transaction_list(request):
+    params_serializer = TransactionQueryParamsSerializer(data=request.GET)
+    if not params_serializer.is_valid():
+        return JsonResponse(
+            params_serializer.errors, status=status.HTTP_400_BAD_REQUEST
+        )
+    params = params_serializer.validated_data
+
+    queryset = Transaction.objects.filtered(
+        params.get("wallet"), params.get("from_date"), params.get("to_date")
+    )
+    fields = params.get("fields")
+    if fields:
+        queryset = queryset.only("id", "created_at", *fields)
+
+    transactions, next_cursor = await akeyset_page(
+        queryset, cursor=params.get("cursor"), limit=params["limit"]
+    )
+    data = TransactionSerializer(transactions, many=True, fields=fields).data
+    response = JsonResponse(data, safe=False)
+    if next_cursor:
+        next_params = request.GET.copy()
+        next_params["cursor"] = next_cursor
+        next_url = request.build_absolute_uri(
+            f"{request.path}?{next_params.urlencode()}"
+        )
+        response["X-Next-Cursor"] = next_cursor
+        response["Link"] = f'<{next_url}>; rel="next"'
+    return response
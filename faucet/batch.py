@@ -0,0 +1,50 @@
+from web3 import Web3
+
+from .conf import get_settings
+from .nonce import send_with_nonce
+
+# disperseEther(address[],uint256[]) as deployed by disperse.app and compatible
+# multisend contracts
+DISPERSE_ABI = [
+    {
+        "name": "disperseEther",
+        "type": "function",
+        "stateMutability": "payable",
+        "inputs": [
+            {"name": "recipients", "type": "address[]"},
+            {"name": "values", "type": "uint256[]"},
+        ],
+        "outputs": [],
+    }
+]
+
+
+def send_batch(node, wallet_addresses, contract_address):
+    """Pay every wallet the faucet amount in a single multisend transaction.
+
+    Returns the transaction hash and the sender address.
+    """
+    w3 = node.w3
+    settings = get_settings()
+    amount = settings.amount_wei
+    recipients = [Web3.to_checksum_address(address) for address in wallet_addresses]
+    values = [amount] * len(recipients)
+
+    contract = w3.eth.contract(
+        address=Web3.to_checksum_address(contract_address), abi=DISPERSE_ABI
+    )
+    call = {
+        "to": contract.address,
+        "data": contract.encodeABI(fn_name="disperseEther", args=[recipients, values]),
+        "value": sum(values),
+    }
+
+    with node.sender() as sender:
+        transaction_fields = {
+            **call,
+            "gas": w3.eth.estimate_gas({**call, "from": sender.address}),
+            "chainId": settings.chain_id,
+            **node.gas.fees(),
+        }
+        tx_hash = send_with_nonce(w3, sender.account, sender.nonces, transaction_fields)
+    return tx_hash, sender.address
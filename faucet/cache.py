@@ -0,0 +1,61 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Expired entries are kept this long so readers can be served while one worker refreshes
+STALE_GRACE = 60
+
+
+def cached_entry(key, compute, ttl, lock_timeout=10, wait=2.0):
+    """Return ``{"data", "etag", "last_modified", "expires"}`` for ``key``.
+
+    ``compute()`` runs at most once per ``ttl`` seconds for everyone sharing the
+    cache: the first worker to notice an expired entry takes a lock and
+    recomputes, the others keep serving the expired entry meanwhile. On a cold
+    cache they wait up to ``wait`` seconds for the lock holder before computing
+    themselves. ``last_modified`` only moves when the data actually changes.
+
+    The entry and the lock live in Django's default cache. Without
+    ``REDIS_URL`` that is a per-process LocMemCache, so every worker process
+    recomputes once per ``ttl`` on its own.
+    """
+    entry = cache.get(key)
+    if entry and entry["expires"] > time.time():
+        return entry
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            return _refresh(key, compute, ttl, entry)
+        finally:
+            cache.delete(lock_key)
+    if entry:
+        return entry
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry:
+            return entry
+    return _refresh(key, compute, ttl, None)
+
+
+def _refresh(key, compute, ttl, previous):
+    data = compute()
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    now = time.time()
+    unchanged = previous is not None and previous["etag"] == etag
+    entry = {
+        "data": data,
+        "etag": etag,
+        "last_modified": previous["last_modified"] if unchanged else int(now),
+        "expires": now + ttl,
+    }
+    if ttl > 0:
+        cache.set(key, entry, ttl + STALE_GRACE)
+    return entry
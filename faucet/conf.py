@@ -0,0 +1,267 @@
+import logging
+import os
+import signal
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from functools import partial
+
+from decouple import Config, RepositoryEmpty, RepositoryEnv, UndefinedValueError
+from django.conf import settings as django_settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_REQUIRED = object()
+
+ENV_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"
+)
+
+# Prefixes of the settings read below, used to pick up override_settings() in tests
+SETTING_PREFIXES = ("FAUCET_", "ETHEREUM_", "PRIVATE_KEY", "CHAIN_ID", "REDIS_URL")
+
+
+@dataclass(frozen=True)
+class FaucetSettings:
+    """Faucet configuration, read and validated once instead of on every request"""
+
+    ethereum_node_url: str
+    # Left out of repr(), so tracebacks and debug pages never show the keys
+    private_keys: tuple = field(repr=False)
+    chain_id: int
+    amount: Decimal
+    amount_wei: int
+    interval_min: int
+    ip_rate: str
+    trusted_proxies: tuple
+    queue_mode: bool
+    batch_mode: bool
+    batch_contract: str
+    batch_size: int
+    batch_window: float
+    pool_size: int
+    async_pool_size: int
+    connect_timeout: float
+    read_timeout: float
+    sender_strategy: str
+    gas_mode: str
+    gas_price_ttl: float
+    stats_cache_ttl: int
+    ratelimit_backend: str
+    ratelimit_path: str
+    redis_url: str
+    streamlit_mode: str
+    streamlit_url: str
+    streamlit_cache_bytes: int
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    if str(value).strip().lower() in ("1", "true", "yes", "on"):
+        return True
+    if str(value).strip().lower() in ("0", "false", "no", "off", ""):
+        return False
+    raise ValueError(f"{value!r} is not a boolean")
+
+
+def _keys(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    return tuple(key.strip() for key in value if key.strip())
+
+
+def _decimal(value):
+    # str() first so float settings like 0.0001 keep their written value
+    return Decimal(str(value).strip())
+
+
+def _env_config():
+    """A decouple config reading .env now.
+
+    ``decouple.config`` reads .env once per process, so a reload would keep
+    serving the values of the first load.
+    """
+    if os.path.isfile(ENV_FILE):
+        return Config(RepositoryEnv(ENV_FILE))
+    return Config(RepositoryEmpty())
+
+
+def _setting(config, name, cast=str, default=_REQUIRED):
+    """Django setting ``name`` if defined, else the environment / .env value"""
+    try:
+        if hasattr(django_settings, name):
+            value = getattr(django_settings, name)
+        elif default is _REQUIRED:
+            value = config(name)
+        else:
+            value = config(name, default=default)
+        return cast(value)
+    except UndefinedValueError:
+        raise ImproperlyConfigured(f"{name} is not set")
+    except (ValueError, TypeError, InvalidOperation) as e:
+        raise ImproperlyConfigured(f"{name} is invalid: {e}")
+
+
+def _check(condition, message):
+    if not condition:
+        raise ImproperlyConfigured(message)
+
+
+def load_settings():
+    """Read and validate the faucet settings, raising ``ImproperlyConfigured``"""
+    from .gas import GAS_MODES
+    from .limiter import LIMITER_BACKENDS, parse_rate
+    from .node import SENDER_STRATEGIES
+    from .streamlit_view import STREAMLIT_MODES
+
+    setting = partial(_setting, _env_config())
+    private_keys = setting("PRIVATE_KEYS", _keys, default="") or setting(
+        "PRIVATE_KEY", _keys
+    )
+    for key in private_keys:
+        hex_key = key[2:] if key.startswith("0x") else key
+        _check(
+            len(hex_key) == 64 and all(c in "0123456789abcdefABCDEF" for c in hex_key),
+            "PRIVATE_KEY(S) must be 32 byte hex private keys",
+        )
+
+    amount = setting("FAUCET_AMOUNT", _decimal)
+    _check(amount > 0, "FAUCET_AMOUNT must be positive")
+    # Transaction.amount stores 9 decimal places
+    _check(
+        amount == amount.quantize(Decimal("1e-9")),
+        "FAUCET_AMOUNT has more than 9 decimal places",
+    )
+
+    values = dict(
+        ethereum_node_url=setting("ETHEREUM_NODE_URL"),
+        private_keys=private_keys,
+        chain_id=setting("CHAIN_ID", int),
+        amount=amount,
+        amount_wei=int(amount * 10**18),
+        interval_min=setting("FAUCET_INTERVAL_MIN", int),
+        ip_rate=setting("FAUCET_IP_RATE", default="1/m"),
+        trusted_proxies=setting(
+            "FAUCET_TRUSTED_PROXIES", _keys, default="127.0.0.1,::1"
+        ),
+        queue_mode=setting("FAUCET_QUEUE_MODE", _bool, default=False),
+        batch_mode=setting("FAUCET_BATCH_MODE", _bool, default=False),
+        batch_contract=setting("FAUCET_BATCH_CONTRACT", default=""),
+        batch_size=setting("FAUCET_BATCH_SIZE", int, default=50),
+        batch_window=setting("FAUCET_BATCH_WINDOW", float, default=2.0),
+        pool_size=setting("ETHEREUM_POOL_SIZE", int, default=10),
+        async_pool_size=setting("ETHEREUM_ASYNC_POOL_SIZE", int, default=200),
+        connect_timeout=setting("ETHEREUM_CONNECT_TIMEOUT", float, default=3.05),
+        read_timeout=setting("ETHEREUM_READ_TIMEOUT", float, default=10),
+        sender_strategy=setting("FAUCET_SENDER_STRATEGY", default="round_robin"),
+        gas_mode=setting("FAUCET_GAS_MODE", default="legacy"),
+        gas_price_ttl=setting("FAUCET_GAS_PRICE_TTL", float, default=12),
+        stats_cache_ttl=setting("FAUCET_STATS_CACHE_TTL", int, default=5),
+        ratelimit_backend=setting("FAUCET_RATELIMIT_BACKEND", default="file"),
+        ratelimit_path=setting("FAUCET_RATELIMIT_PATH", default=""),
+        redis_url=setting("REDIS_URL", default=""),
+        streamlit_mode=setting("FAUCET_STREAMLIT_MODE", default="embedded"),
+        streamlit_url=setting("FAUCET_STREAMLIT_URL", default="http://localhost:8501"),
+        streamlit_cache_bytes=setting(
+            "FAUCET_STREAMLIT_CACHE_BYTES", int, default=64 * 1024 * 1024
+        ),
+    )
+
+    _check(values["chain_id"] > 0, "CHAIN_ID must be positive")
+    _check(values["interval_min"] >= 0, "FAUCET_INTERVAL_MIN must not be negative")
+    _check(
+        values["sender_strategy"] in SENDER_STRATEGIES,
+        f"FAUCET_SENDER_STRATEGY must be one of {SENDER_STRATEGIES}",
+    )
+    _check(
+        values["gas_mode"] in GAS_MODES, f"FAUCET_GAS_MODE must be one of {GAS_MODES}"
+    )
+    _check(
+        values["ratelimit_backend"] in LIMITER_BACKENDS,
+        f"FAUCET_RATELIMIT_BACKEND must be one of {LIMITER_BACKENDS}",
+    )
+    _check(
+        values["ratelimit_backend"] != "redis" or values["redis_url"],
+        "FAUCET_RATELIMIT_BACKEND=redis needs REDIS_URL",
+    )
+    _check(
+        not values["batch_mode"] or values["batch_contract"],
+        "FAUCET_BATCH_MODE needs FAUCET_BATCH_CONTRACT",
+    )
+    _check(
+        not values["batch_mode"] or values["queue_mode"],
+        "FAUCET_BATCH_MODE needs FAUCET_QUEUE_MODE",
+    )
+    _check(
+        values["streamlit_mode"] in STREAMLIT_MODES,
+        f"FAUCET_STREAMLIT_MODE must be one of {STREAMLIT_MODES}",
+    )
+    try:
+        parse_rate(values["ip_rate"])
+    except ValueError as e:
+        raise ImproperlyConfigured(f"FAUCET_IP_RATE is invalid: {e}")
+
+    return FaucetSettings(**values)
+
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def get_settings():
+    """Return the settings snapshot taken at startup"""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = load_settings()
+    return _settings
+
+
+def reload_settings():
+    """Take a new snapshot and rebuild the node client and rate limits from it.
+
+    The current snapshot stays in place if the new configuration is invalid.
+    """
+    global _settings
+    from .asset_cache import reset_asset_cache
+    from .limiter import reset_rate_limits
+    from .node import reset_node_client
+
+    new_settings = load_settings()
+    with _settings_lock:
+        _settings = new_settings
+    reset_node_client()
+    reset_rate_limits()
+    reset_asset_cache()
+    return new_settings
+
+
+@receiver(setting_changed)
+def _reload_on_setting_changed(setting, **kwargs):
+    if _settings is not None and setting.startswith(SETTING_PREFIXES):
+        reload_settings()
+
+
+def _reload_on_signal(signum, frame):
+    try:
+        reload_settings()
+    except ImproperlyConfigured as e:
+        logger.error("Faucet settings not reloaded: %s", e)
+    else:
+        logger.info("Faucet settings reloaded")
+
+
+def install_reload_handler(signum=getattr(signal, "SIGHUP", None)):
+    """Reload the settings when the process receives ``signum`` (SIGHUP)"""
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+    # Leave handlers installed by the server (e.g. a gunicorn master) alone
+    if signal.getsignal(signum) not in (signal.SIG_DFL, None):
+        return False
+    signal.signal(signum, _reload_on_signal)
+    return True
@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .batch import send_batch
+from .conf import get_settings
+from .limiter import refund_wallets
+from .metrics import stage
+from .models import Transaction
+from .node import get_node_client
+from .nonce import send_with_nonce
+
+
+def send_funds(node, wallet_address):
+    """Sign and broadcast a faucet payout, returning the hash and sender address"""
+    w3 = node.w3
+    settings = get_settings()
+    transaction_fields = {
+        "to": wallet_address,
+        "value": settings.amount_wei,
+        "gas": 21000,
+        "chainId": settings.chain_id,
+    }
+    with stage("gas_price"):
+        # Cached legacy gasPrice or EIP-1559 fee fields, no RPC on a warm cache
+        transaction_fields.update(node.gas.fees())
+    with node.sender() as sender:
+        tx_hash = send_with_nonce(w3, sender.account, sender.nonces, transaction_fields)
+    return tx_hash, sender.address
+
+
+def claim_pending(limit):
+    """Move up to ``limit`` queued requests, oldest first, to ``sending``.
+
+    Claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` and committed before
+    anything is broadcast, so several dispatchers can drain the queue side by
+    side and no database lock is held during the RPC.
+    """
+    with transaction.atomic():
+        pks = list(
+            Transaction.objects.select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .order_by("id")
+            .values_list("pk", flat=True)[:limit]
+        )
+        Transaction.objects.filter(pk__in=pks).update(status="sending")
+    return list(Transaction.objects.filter(pk__in=pks).order_by("id"))
+
+
+def process_pending(row, node):
+    """Broadcast a claimed request and record the outcome on its row"""
+    try:
+        tx_hash, row.sender_address = send_funds(node, row.wallet_address)
+    except Exception as e:
+        row.status = "failed"
+        row.error_message = str(e)
+        # Nothing was paid, so the wallet may ask again straight away
+        refund_wallets([row.wallet_address])
+    else:
+        row.status = "broadcast"
+        row.transaction_hash = tx_hash.hex()
+    row.save(
+        update_fields=["status", "transaction_hash", "sender_address", "error_message"]
+    )
+    return row
+
+
+def dispatch_pending(limit=50):
+    """Drain up to ``limit`` queued fund requests, oldest first.
+
+    Each request is claimed, broadcast and recorded in turn. A dispatcher that
+    dies after the claim leaves its request in ``sending``: it may have been
+    paid, so it is never picked up again automatically.
+    """
+    node = get_node_client()
+    processed = 0
+    while processed < limit:
+        rows = claim_pending(1)
+        if not rows:
+            break
+        process_pending(rows[0], node)
+        processed += 1
+    return processed
+
+
+def dispatch_batch(max_size=50, window=2.0, contract_address=None):
+    """Pay queued fund requests together through the multisend contract.
+
+    A batch is sent once ``max_size`` requests are waiting or the oldest one has
+    waited ``window`` seconds. Like ``dispatch_pending`` the rows are claimed
+    and committed first, broadcast outside any transaction, and every covered
+    row then gets the shared batch hash.
+    """
+    contract_address = contract_address or get_settings().batch_contract
+    with transaction.atomic():
+        rows = list(
+            Transaction.objects.select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .order_by("id")[:max_size]
+        )
+        if not rows:
+            return 0
+        oldest_age = timezone.now() - rows[0].created_at
+        if len(rows) < max_size and oldest_age < timedelta(seconds=window):
+            # Keep collecting, the rows are unlocked again when the block exits
+            return 0
+        claimed = Transaction.objects.filter(pk__in=[row.pk for row in rows])
+        claimed.update(status="sending")
+
+    try:
+        tx_hash, sender_address = send_batch(
+            get_node_client(),
+            [row.wallet_address for row in rows],
+            contract_address,
+        )
+    except Exception as e:
+        outcome = {"status": "failed", "error_message": str(e)}
+        refund_wallets([row.wallet_address for row in rows])
+    else:
+        outcome = {
+            "status": "broadcast",
+            "transaction_hash": tx_hash.hex(),
+            "sender_address": sender_address,
+        }
+    claimed.update(**outcome)
+    return len(rows)
@@ -0,0 +1,323 @@
+import asyncio
+import bisect
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+import rlp
+from aiohttp import web
+from eth_account import Account
+from eth_keys.exceptions import BadSignature
+from eth_utils import keccak
+
+# Latency distributions, parameters in milliseconds
+LATENCY_DISTRIBUTIONS = {
+    "fixed": lambda rng, ms: ms,
+    "uniform": lambda rng, low, high: rng.uniform(low, high),
+    "normal": lambda rng, mean, stddev: rng.gauss(mean, stddev),
+    # Median and shape, long right tail like real node latencies
+    "lognormal": lambda rng, median, sigma: median * math.exp(rng.gauss(0, sigma)),
+    "exponential": lambda rng, mean: rng.expovariate(1 / mean) if mean else 0.0,
+}
+
+TRANSFER_GAS = 21000
+
+
+def parse_latency(spec):
+    """Parse ``"lognormal:50,0.5"`` style specs into ``sample(rng) -> seconds``.
+
+    A bare number is a fixed latency in milliseconds.
+    """
+    name, _, args = str(spec).partition(":")
+    if not args:
+        name, args = "fixed", name
+    distribution = LATENCY_DISTRIBUTIONS.get(name)
+    try:
+        values = [float(value) for value in args.split(",")]
+        if distribution is None:
+            raise ValueError
+        distribution(random.Random(0), *values)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"Invalid latency {spec!r}, expected e.g. 20, uniform:10,50 or "
+            f"lognormal:50,0.5 ({', '.join(LATENCY_DISTRIBUTIONS)})"
+        )
+    return lambda rng: max(0.0, distribution(rng, *values)) / 1000
+
+
+def decode_transaction(raw):
+    """Return ``(chain_id, nonce, gas_limit, gas_price, value)`` of a signed transaction"""
+    if raw[0] >= 0xC0:
+        # Legacy: [nonce, gasPrice, gas, to, value, data, v, r, s]
+        fields = rlp.decode(raw)
+        nonce, gas_price, gas_limit, _, value = fields[:5]
+        v = _int(fields[6])
+        chain_id = (v - 35) // 2 if v >= 35 else None
+    elif raw[0] == 1:
+        # EIP-2930: [chainId, nonce, gasPrice, gas, to, value, ...]
+        chain_id, nonce, gas_price, gas_limit, _, value = rlp.decode(raw[1:])[:6]
+    elif raw[0] == 2:
+        # EIP-1559: [chainId, nonce, maxPriorityFee, maxFee, gas, to, value, ...]
+        fields = rlp.decode(raw[1:])
+        chain_id, nonce, _, gas_price, gas_limit, _, value = fields[:7]
+    else:
+        raise ValueError(f"Unsupported transaction type {raw[0]}")
+    return tuple(
+        _int(field) if field is not None else None
+        for field in (chain_id, nonce, gas_limit, gas_price, value)
+    )
+
+
+def _int(value):
+    return value if isinstance(value, int) else int.from_bytes(value, "big")
+
+
+class RPCError(Exception):
+    def __init__(self, message, code=-32000):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeNode:
+    """In-memory stand-in for an Ethereum JSON-RPC node.
+
+    Implements what the faucet calls: gas price and fee history, nonces, balances,
+    raw transaction broadcasts, receipts and batch requests. Broadcasts are
+    "mined" in the next block, every ``block_time`` seconds. Latency, injected
+    errors, nonce conflicts and reverts are drawn from a seeded RNG so runs can be
+    repeated.
+
+    With ``check_nonces`` the sender of every broadcast is recovered from its
+    signature and nonces must arrive in order, like a real node. Recovery costs
+    several milliseconds of CPU per transaction without a native secp256k1
+    library, so throughput benchmarks may turn it off.
+    """
+
+    def __init__(
+        self,
+        chain_id=11155111,
+        latency="0",
+        send_latency=None,
+        error_rate=0.0,
+        nonce_conflict_rate=0.0,
+        revert_rate=0.0,
+        block_time=12.0,
+        gas_price=10**9,
+        balance=10**24,
+        check_nonces=True,
+        seed=None,
+        clock=time.monotonic,
+    ):
+        if block_time <= 0:
+            raise ValueError("block_time must be positive")
+        self.chain_id = chain_id
+        self.latency = parse_latency(latency)
+        self.send_latency = parse_latency(send_latency) if send_latency else None
+        self.error_rate = error_rate
+        self.nonce_conflict_rate = nonce_conflict_rate
+        self.revert_rate = revert_rate
+        self.block_time = block_time
+        self.gas_price = gas_price
+        self.balance = balance
+        self.check_nonces = check_nonces
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.started = clock()
+
+        self.nonces = defaultdict(int)
+        self.spent = defaultdict(int)
+        # Blocks the transactions of each sender were mined in, ascending
+        self.mined_blocks = defaultdict(list)
+        self.transactions = {}
+        self.calls = Counter()
+        self.errors = Counter()
+
+        self.methods = {
+            "eth_chainId": lambda: hex(self.chain_id),
+            "net_version": lambda: str(self.chain_id),
+            "eth_blockNumber": lambda: hex(self.block_number()),
+            "eth_gasPrice": lambda: hex(self.gas_price),
+            "eth_maxPriorityFeePerGas": lambda: hex(self.gas_price // 10),
+            "eth_feeHistory": self.fee_history,
+            "eth_estimateGas": lambda *args: hex(TRANSFER_GAS),
+            "eth_getBalance": self.get_balance,
+            "eth_getTransactionCount": self.get_transaction_count,
+            "eth_sendRawTransaction": self.send_raw_transaction,
+            "eth_getTransactionReceipt": self.get_transaction_receipt,
+            "eth_getTransactionByHash": self.get_transaction_by_hash,
+        }
+
+        self.port = None
+        self.url = None
+        self._loop = None
+        self._runner = None
+
+    def block_number(self):
+        return 1 + int((self.clock() - self.started) / self.block_time)
+
+    def fee_history(self, block_count, newest_block="latest", percentiles=()):
+        count = min(
+            int(block_count, 16) if isinstance(block_count, str) else block_count, 1024
+        )
+        newest = self.block_number()
+        base_fee = self.gas_price - self.gas_price // 10
+        return {
+            "oldestBlock": hex(max(newest - count + 1, 0)),
+            "baseFeePerGas": [hex(base_fee)] * (count + 1),
+            "gasUsedRatio": [0.5] * count,
+            "reward": [[hex(self.gas_price // 10)] * len(percentiles)] * count,
+        }
+
+    def get_balance(self, address, block="latest"):
+        return hex(max(self.balance - self.spent[address.lower()], 0))
+
+    def get_transaction_count(self, address, block="latest"):
+        address = address.lower()
+        if block == "pending":
+            return hex(self.nonces[address])
+        return hex(bisect.bisect_right(self.mined_blocks[address], self.block_number()))
+
+    def send_raw_transaction(self, raw_hex):
+        raw = bytes.fromhex(raw_hex[2:] if raw_hex.startswith("0x") else raw_hex)
+        tx_hash = "0x" + keccak(raw).hex()
+        if tx_hash in self.transactions:
+            raise RPCError("already known")
+        try:
+            chain_id, nonce, gas_limit, gas_price, value = decode_transaction(raw)
+        except (rlp.DecodingError, ValueError, IndexError) as e:
+            raise RPCError(f"invalid transaction: {e}", code=-32602)
+        if chain_id is not None and chain_id != self.chain_id:
+            raise RPCError(f"invalid chain id {chain_id}, expected {self.chain_id}")
+
+        sender = None
+        if self.check_nonces:
+            try:
+                sender = Account.recover_transaction(raw).lower()
+            except (BadSignature, ValueError):
+                raise RPCError("invalid sender")
+        if self.nonce_conflict_rate and self.rng.random() < self.nonce_conflict_rate:
+            # Another client spent this nonce first
+            if sender:
+                self.nonces[sender] = max(self.nonces[sender], nonce + 1)
+            raise RPCError(f"nonce too low: next nonce {nonce + 1}, tx nonce {nonce}")
+        if sender:
+            expected = self.nonces[sender]
+            if nonce < expected:
+                raise RPCError(
+                    f"nonce too low: next nonce {expected}, tx nonce {nonce}"
+                )
+            if nonce > expected:
+                # Real nodes queue the gap, here it is surfaced immediately
+                raise RPCError(
+                    f"nonce too high: next nonce {expected}, tx nonce {nonce}"
+                )
+            self.nonces[sender] = nonce + 1
+            self.spent[sender] += value + gas_limit * gas_price
+
+        block = self.block_number() + 1
+        if sender:
+            self.mined_blocks[sender].append(block)
+        self.transactions[tx_hash] = {
+            "from": sender,
+            "nonce": nonce,
+            "block": block,
+            "status": 0 if self.rng.random() < self.revert_rate else 1,
+            "gas_used": min(gas_limit, TRANSFER_GAS),
+        }
+        return tx_hash
+
+    def get_transaction_receipt(self, tx_hash):
+        tx = self.transactions.get(tx_hash.lower())
+        if tx is None or tx["block"] > self.block_number():
+            return None
+        return {
+            "transactionHash": tx_hash,
+            "blockNumber": hex(tx["block"]),
+            "from": tx["from"],
+            "gasUsed": hex(tx["gas_used"]),
+            "cumulativeGasUsed": hex(tx["gas_used"]),
+            "status": hex(tx["status"]),
+            "logs": [],
+        }
+
+    def get_transaction_by_hash(self, tx_hash):
+        tx = self.transactions.get(tx_hash.lower())
+        if tx is None:
+            return None
+        mined = tx["block"] <= self.block_number()
+        return {
+            "hash": tx_hash,
+            "from": tx["from"],
+            "nonce": hex(tx["nonce"]),
+            "blockNumber": hex(tx["block"]) if mined else None,
+        }
+
+    async def call(self, request):
+        """Answer one JSON-RPC request object"""
+        request_id = request.get("id") if isinstance(request, dict) else None
+        method = request.get("method") if isinstance(request, dict) else None
+        if method == "eth_sendRawTransaction" and self.send_latency:
+            delay = self.send_latency(self.rng)
+        else:
+            delay = self.latency(self.rng)
+        if delay:
+            await asyncio.sleep(delay)
+
+        self.calls[method] += 1
+        try:
+            handler = self.methods.get(method)
+            if handler is None:
+                raise RPCError(f"the method {method} does not exist", code=-32601)
+            if self.error_rate and self.rng.random() < self.error_rate:
+                raise RPCError("injected error")
+            try:
+                result = handler(*(request.get("params") or []))
+            except (TypeError, ValueError) as e:
+                raise RPCError(f"invalid params: {e}", code=-32602)
+        except RPCError as e:
+            self.errors[method] += 1
+            error = {"code": e.code, "message": str(e)}
+            return {"jsonrpc": "2.0", "id": request_id, "error": error}
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    async def handle(self, http_request):
+        try:
+            body = await http_request.json()
+        except ValueError:
+            error = {"code": -32700, "message": "parse error"}
+            return web.json_response({"jsonrpc": "2.0", "id": None, "error": error})
+        if isinstance(body, list):
+            return web.json_response(
+                await asyncio.gather(*(self.call(request) for request in body))
+            )
+        return web.json_response(await self.call(body))
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+        return app
+
+    def serve(self, host="127.0.0.1", port=8545):
+        """Serve in the foreground until interrupted"""
+        web.run_app(self.make_app(), host=host, port=port, print=None, access_log=None)
+
+    def start(self, host="127.0.0.1", port=0):
+        """Serve from a background thread (tests, benchmarks), returning the URL"""
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._serve(host, port), self._loop).result()
+        self.url = f"http://{host}:{self.port}"
+        return self.url
+
+    async def _serve(self, host, port):
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,107 @@
+import threading
+import time
+
+GAS_MODES = ("legacy", "eip1559")
+
+
+class GasPriceOracle:
+    """Caches fee parameters so fund requests do not ask the node every time.
+
+    A daemon thread refreshes the value in the background. If it falls behind
+    and the cached value is older than ``ttl`` seconds, the next caller fetches
+    it live instead of using stale fees.
+    """
+
+    def __init__(
+        self, w3, ttl=12, mode="legacy", history_blocks=5, reward_percentile=50
+    ):
+        if mode not in GAS_MODES:
+            raise ValueError(f"Gas mode must be one of: {', '.join(GAS_MODES)}")
+        self.w3 = w3
+        self.ttl = ttl
+        self.mode = mode
+        self.history_blocks = history_blocks
+        self.reward_percentile = reward_percentile
+
+        self._fees = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+
+    def fetch(self):
+        """Ask the node for current fee parameters"""
+        if self.mode == "legacy":
+            return {"gasPrice": self.w3.eth.gas_price}
+
+        history = self.w3.eth.fee_history(
+            self.history_blocks, "latest", [self.reward_percentile]
+        )
+        # The last entry is the base fee of the next block
+        base_fee = history["baseFeePerGas"][-1]
+        rewards = sorted(block[0] for block in history["reward"]) or [0]
+        priority_fee = rewards[len(rewards) // 2]
+        return {
+            "type": 2,
+            # Leave room for the base fee to double before the tx is mined
+            "maxFeePerGas": 2 * base_fee + priority_fee,
+            "maxPriorityFeePerGas": priority_fee,
+        }
+
+    def refresh(self):
+        fees = self.fetch()
+        with self._lock:
+            self._fees = fees
+            self._fetched_at = time.monotonic()
+        return fees
+
+    def age(self):
+        if self._fees is None:
+            return None
+        return time.monotonic() - self._fetched_at
+
+    def fees(self):
+        """Return fee fields for a transaction, fetching live if the cache is stale"""
+        fees, age = self._fees, self.age()
+        if fees is not None and age <= self.ttl:
+            self.hits += 1
+            return dict(fees)
+
+        self.misses += 1
+        return dict(self.refresh())
+
+    def _run(self):
+        interval = max(self.ttl / 2, 0.5)
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                self.refresh_errors += 1
+            self._stopped.wait(interval)
+
+    def start(self):
+        """Start the background refresher (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="gas-price-oracle", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "ttl": self.ttl,
+            "age": self.age(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "refresh_errors": self.refresh_errors,
+        }
@@ -0,0 +1,249 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from .conf import get_settings
+
+LIMITER_BACKENDS = ("memory", "file", "redis")
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+RateLimits = namedtuple("RateLimits", ["ip", "wallet"])
+
+
+def parse_rate(rate):
+    """Parse ``"5/m"`` style rates into ``(limit, period_seconds)``"""
+    try:
+        limit, unit = rate.split("/")
+        limit, period = int(limit), PERIODS[unit]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate {rate!r}, expected e.g. 1/m")
+    if limit <= 0:
+        raise ValueError(f"Invalid rate {rate!r}, the limit must be positive")
+    return limit, period
+
+
+def client_ip(request):
+    """Address the IP limit applies to.
+
+    Proxies in ``FAUCET_TRUSTED_PROXIES``, e.g. the Streamlit dashboard posting
+    for its visitors, append the address they received the request from to
+    ``X-Forwarded-For``. The client is the rightmost entry not added by a
+    trusted proxy, so an entry the client sent itself is never used.
+    """
+    trusted = get_settings().trusted_proxies
+    address = request.META.get("REMOTE_ADDR")
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+    while address in trusted and forwarded:
+        address = forwarded.pop().strip() or address
+    return address
+
+
+def _gcra(tat, now, emission, tolerance):
+    """One GCRA step: return ``(new_tat, 0)`` if allowed, ``(None, retry_after)`` if not.
+
+    ``tat`` is the theoretical arrival time of the next request. A key may run
+    ``tolerance`` seconds ahead of it, which allows ``limit`` hits in a burst and
+    then one every ``emission`` seconds, a sliding window without per-hit state.
+    """
+    tat = max(tat or now, now)
+    allow_at = tat - tolerance
+    if allow_at > now:
+        return None, allow_at - now
+    return tat + emission, 0.0
+
+
+class MemoryBackend:
+    """Per-process state, for tests and single worker setups"""
+
+    max_keys = 10000
+
+    def __init__(self):
+        self._tats = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, emission, tolerance, now):
+        with self._lock:
+            new_tat, retry_after = _gcra(self._tats.get(key), now, emission, tolerance)
+            if new_tat is not None:
+                if len(self._tats) >= self.max_keys:
+                    self._tats = {k: t for k, t in self._tats.items() if t > now}
+                self._tats[key] = new_tat
+            return retry_after
+
+    def refund(self, key, emission):
+        with self._lock:
+            if key in self._tats:
+                self._tats[key] -= emission
+
+
+class FileBackend:
+    """SQLite file shared by every worker process on one host"""
+
+    # Expired keys are purged every this many hits
+    purge_every = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ratelimit "
+                "(key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _immediate(self):
+        # Take the write lock up front so read-check-write is atomic across processes
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def hit(self, key, emission, tolerance, now):
+        with self._immediate() as conn:
+            row = conn.execute(
+                "SELECT tat FROM ratelimit WHERE key = ?", (key,)
+            ).fetchone()
+            new_tat, retry_after = _gcra(row and row[0], now, emission, tolerance)
+            if new_tat is not None:
+                conn.execute(
+                    "INSERT INTO ratelimit (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    (key, new_tat),
+                )
+            self._hits += 1
+            if self._hits % self.purge_every == 0:
+                conn.execute("DELETE FROM ratelimit WHERE tat < ?", (now,))
+        return retry_after
+
+    def refund(self, key, emission):
+        self._connection().execute(
+            "UPDATE ratelimit SET tat = tat - ? WHERE key = ?", (emission, key)
+        )
+
+
+class RedisBackend:
+    """Redis (or any server speaking its protocol) shared by every host"""
+
+    def __init__(self, client, prefix="faucet:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key, emission, tolerance, now):
+        key = self.prefix + key
+
+        def attempt(pipe):
+            # Retried by redis-py if another client touches the key before EXEC
+            stored = pipe.get(key)
+            new_tat, retry_after = _gcra(
+                stored and float(stored), now, emission, tolerance
+            )
+            if new_tat is not None:
+                pipe.multi()
+                pipe.set(key, repr(new_tat), px=int((new_tat - now) * 1000) + 1)
+            return retry_after
+
+        return self.client.transaction(attempt, key, value_from_callable=True)
+
+    def refund(self, key, emission):
+        key = self.prefix + key
+
+        def attempt(pipe):
+            stored = pipe.get(key)
+            if stored is not None:
+                pipe.multi()
+                pipe.set(key, repr(float(stored) - emission), keepttl=True)
+
+        self.client.transaction(attempt, key)
+
+
+class RateLimit:
+    """At most ``limit`` hits per ``period`` seconds for each key"""
+
+    def __init__(self, backend, name, limit, period):
+        self.backend = backend
+        self.name = name
+        self.emission = period / limit
+        self.tolerance = period - self.emission
+
+    def hit(self, key, now=None):
+        """Count a hit for ``key``, return 0 if allowed or seconds until it would be"""
+        return self.backend.hit(
+            f"{self.name}:{key}", self.emission, self.tolerance, now or time.time()
+        )
+
+    def refund(self, key):
+        """Give back a hit whose request did not go through"""
+        self.backend.refund(f"{self.name}:{key}", self.emission)
+
+
+def make_backend(name, path=None, redis_url=None):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "file":
+        return FileBackend(
+            path or os.path.join(tempfile.gettempdir(), "faucet-ratelimit.sqlite3")
+        )
+    if name == "redis":
+        import redis
+
+        return RedisBackend(redis.Redis.from_url(redis_url))
+    raise ValueError(
+        f"Unknown rate limit backend {name!r}, expected one of {LIMITER_BACKENDS}"
+    )
+
+
+_limits = None
+_limits_lock = threading.Lock()
+
+
+def get_rate_limits():
+    """Return the process-wide IP and wallet limits, configured on first use"""
+    global _limits
+    if _limits is not None:
+        return _limits
+
+    with _limits_lock:
+        if _limits is None:
+            settings = get_settings()
+            backend = make_backend(
+                settings.ratelimit_backend,
+                path=settings.ratelimit_path or None,
+                redis_url=settings.redis_url,
+            )
+            _limits = RateLimits(
+                ip=RateLimit(backend, "ip", *parse_rate(settings.ip_rate)),
+                wallet=RateLimit(backend, "wallet", 1, settings.interval_min * 60),
+            )
+        return _limits
+
+
+def reset_rate_limits():
+    """Drop the cached limits so the next call rebuilds them (tests, config reloads)"""
+    global _limits
+    with _limits_lock:
+        _limits = None
+
+
+def refund_wallets(wallet_addresses):
+    """Give back the cooldown of payouts that never reached these wallets"""
+    wallet = get_rate_limits().wallet
+    for wallet_address in wallet_addresses:
+        wallet.refund(wallet_address.lower())
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from faucet.conf import get_settings
+from faucet.dispatcher import dispatch_batch, dispatch_pending
+
+
+class Command(BaseCommand):
+    help = "Broadcast queued fund requests (used when FAUCET_QUEUE_MODE is enabled)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=get_settings().batch_size,
+            help="Maximum number of requests to broadcast per poll or batch",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            default=get_settings().batch_mode,
+            help="Pay requests together through FAUCET_BATCH_CONTRACT",
+        )
+        parser.add_argument(
+            "--window",
+            type=float,
+            default=get_settings().batch_window,
+            help="Seconds to wait for a batch to fill up",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue once and exit",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            if options["batch"]:
+                # A single pass should not leave a half-filled batch behind
+                window = 0 if options["once"] else options["window"]
+                processed = dispatch_batch(
+                    max_size=options["batch_size"], window=window
+                )
+            else:
+                processed = dispatch_pending(limit=options["batch_size"])
+            if processed:
+                self.stdout.write(f"Dispatched {processed} fund request(s)")
+            if options["once"]:
+                break
+            if processed < options["batch_size"]:
+                time.sleep(options["interval"])
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from faucet.conf import get_settings
+from faucet.fake_node import LATENCY_DISTRIBUTIONS, FakeNode
+
+
+class Command(BaseCommand):
+    help = "Run a local fake Ethereum JSON-RPC node for offline load and latency tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8545)
+        parser.add_argument(
+            "--chain-id",
+            type=int,
+            default=get_settings().chain_id,
+            help="Chain id the node reports and expects in transactions",
+        )
+        parser.add_argument(
+            "--latency",
+            default="0",
+            help=(
+                "Milliseconds before every response: a number or "
+                f"{'|'.join(LATENCY_DISTRIBUTIONS)}:params, e.g. lognormal:50,0.5"
+            ),
+        )
+        parser.add_argument(
+            "--send-latency",
+            help="Latency of eth_sendRawTransaction, defaults to --latency",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of calls answered with a JSON-RPC error",
+        )
+        parser.add_argument(
+            "--nonce-conflict-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of broadcasts rejected with 'nonce too low'",
+        )
+        parser.add_argument(
+            "--revert-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of transactions mined with a failed receipt",
+        )
+        parser.add_argument(
+            "--block-time",
+            type=float,
+            default=12.0,
+            help="Seconds per block, receipts appear in the next block",
+        )
+        parser.add_argument(
+            "--no-nonce-check",
+            action="store_true",
+            help="Accept any nonce and skip sender recovery (cheaper per broadcast)",
+        )
+        parser.add_argument("--seed", type=int, help="Seed for reproducible runs")
+
+    def handle(self, *args, **options):
+        try:
+            node = FakeNode(
+                chain_id=options["chain_id"],
+                latency=options["latency"],
+                send_latency=options["send_latency"],
+                error_rate=options["error_rate"],
+                nonce_conflict_rate=options["nonce_conflict_rate"],
+                revert_rate=options["revert_rate"],
+                block_time=options["block_time"],
+                check_nonces=not options["no_nonce_check"],
+                seed=options["seed"],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        self.stdout.write(
+            f"Fake node for chain {options['chain_id']} listening on "
+            f"http://{options['host']}:{options['port']}"
+        )
+        node.serve(host=options["host"], port=options["port"])
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from faucet.rollups import prune_rollups, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the /api/stats rollup table or prune old minute buckets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Only delete minute buckets older than --keep-hours",
+        )
+        parser.add_argument(
+            "--keep-hours",
+            type=int,
+            default=48,
+            help="Hours of minute buckets to keep when pruning",
+        )
+
+    def handle(self, *args, **options):
+        if options["prune"]:
+            deleted = prune_rollups(timedelta(hours=options["keep_hours"]))
+            self.stdout.write(f"Deleted {deleted} minute bucket(s)")
+            return
+        buckets = rebuild_rollups()
+        self.stdout.write(f"Rebuilt rollups from {buckets} minute bucket(s)")
@@ -0,0 +1,55 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from faucet.receipts import reconcile_receipts
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Track receipts of broadcast transactions and mark them confirmed, failed or dropped"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=500,
+            help="Maximum number of open transactions to check per poll",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=12.0,
+            help="Seconds between polls",
+        )
+        parser.add_argument(
+            "--drop-after",
+            type=int,
+            default=600,
+            help="Seconds without a receipt before an unknown transaction is dropped",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Poll once and exit",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                changed = reconcile_receipts(
+                    limit=options["limit"], drop_after=options["drop_after"]
+                )
+            except Exception:
+                if options["once"]:
+                    raise
+                # A slow or failing node must not stop the tracker, retry next poll
+                logger.exception("Receipt poll failed")
+                changed = 0
+            if changed:
+                self.stdout.write(f"Updated {changed} transaction(s)")
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,127 @@
+import os
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Stages of a fund request, in order. The broadcast stages are shared with the
+# queue dispatcher, so its payouts are timed too.
+FUND_STAGES = (
+    "ip_limit",
+    "validate",
+    "wallet_limit",
+    "gas_price",
+    "nonce",
+    "sign",
+    "broadcast",
+    "nonce_resync",
+    "insert",
+)
+
+FUND_OUTCOMES = ("rate_limited", "invalid", "queued", "success", "failed")
+
+STAGE_SECONDS = Histogram(
+    "faucet_fund_stage_seconds",
+    "Time spent in each stage of a fund request",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+FUND_SECONDS = Histogram(
+    "faucet_fund_duration_seconds",
+    "Total time to answer a fund request",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+FUND_REQUESTS = Counter(
+    "faucet_fund_requests",
+    "Fund requests by outcome, reason is the limit hit or the error class",
+    ["outcome", "reason"],
+)
+FUND_DB_QUERIES = Histogram(
+    "faucet_fund_db_queries",
+    "Database queries run while answering a fund request",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20),
+)
+
+ASSET_CACHE_REQUESTS = Counter(
+    "faucet_streamlit_asset_cache_requests",
+    "Streamlit static asset lookups by result",
+    ["result"],
+)
+ASSET_CACHE_SERVED_BYTES = Counter(
+    "faucet_streamlit_asset_cache_served_bytes",
+    "Bytes of Streamlit static assets sent from the cache, by content encoding",
+    ["encoding"],
+)
+ASSET_CACHE_SIZE = Gauge(
+    "faucet_streamlit_asset_cache_size_bytes",
+    "Bytes held by the Streamlit static asset cache",
+    multiprocess_mode="livesum",
+)
+
+# Bound once, so the hot path skips the label lookup
+_stage_histograms = {name: STAGE_SECONDS.labels(name) for name in FUND_STAGES}
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as one stage of the fund pipeline"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_histograms[name].observe(time.perf_counter() - started)
+
+
+def record_outcome(outcome, reason=""):
+    FUND_REQUESTS.labels(outcome, reason).inc()
+
+
+class QueryCounter:
+    """``execute_wrapper`` that counts the queries it sees"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def track_fund_request(count_queries=True):
+    """Record the duration, and the queries on this thread's connection, of a request"""
+    counter = QueryCounter()
+    started = time.perf_counter()
+    try:
+        if count_queries:
+            with connection.execute_wrapper(counter):
+                yield
+        else:
+            yield
+    finally:
+        FUND_SECONDS.observe(time.perf_counter() - started)
+        if count_queries:
+            FUND_DB_QUERIES.observe(counter.count)
+
+
+def render_metrics():
+    """Exposition text for every metric of this process, or of all workers.
+
+    With ``PROMETHEUS_MULTIPROC_DIR`` set, each worker writes its samples to files
+    in that directory and they are aggregated here, so any worker can answer.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.3 on 2026-10-17 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("faucet", "0002_alter_transaction_amount_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SenderNonce",
+            fields=[
+                (
+                    "address",
+                    models.CharField(max_length=42, primary_key=True, serialize=False),
+                ),
+                ("next_nonce", models.BigIntegerField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
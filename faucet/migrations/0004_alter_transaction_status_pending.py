@@ -0,0 +1,25 @@
+# Generated by Django 5.0.3 on 2026-10-17 03:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("faucet", "0003_sendernonce"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transaction",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("success", "Success"),
+                    ("failed", "Failed"),
+                ],
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-17 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("faucet", "0004_alter_transaction_status_pending"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="sender_address",
+            field=models.CharField(blank=True, default="", max_length=42),
+        ),
+    ]
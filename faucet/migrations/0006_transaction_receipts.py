@@ -0,0 +1,60 @@
+# Generated by Django 5.0.3 on 2026-10-17 03:43
+
+from django.db import migrations, models
+
+
+def success_to_broadcast(apps, schema_editor):
+    # "success" only ever meant the node accepted the transaction
+    Transaction = apps.get_model("faucet", "Transaction")
+    Transaction.objects.filter(status="success").update(status="broadcast")
+
+
+def broadcast_to_success(apps, schema_editor):
+    Transaction = apps.get_model("faucet", "Transaction")
+    Transaction.objects.filter(status__in=["broadcast", "confirmed"]).update(
+        status="success"
+    )
+    Transaction.objects.filter(status="dropped").update(status="failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("faucet", "0005_transaction_sender_address"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="block_number",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="gas_used",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("broadcast", "Broadcast"),
+                    ("confirmed", "Confirmed"),
+                    ("failed", "Failed"),
+                    ("dropped", "Dropped"),
+                ],
+                max_length=10,
+            ),
+        ),
+        migrations.RunPython(success_to_broadcast, broadcast_to_success),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("status", "broadcast")),
+                fields=["id"],
+                name="faucet_tx_broadcast_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.3 on 2026-10-17 03:45
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("faucet", "0006_transaction_receipts"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["wallet_address", "status", "created_at"],
+                name="faucet_tx_wallet_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(fields=["created_at"], name="faucet_tx_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                django.db.models.functions.text.Lower("wallet_address"),
+                models.OrderBy(models.F("created_at"), descending=True),
+                name="faucet_tx_wallet_lower_idx",
+            ),
+        ),
+    ]
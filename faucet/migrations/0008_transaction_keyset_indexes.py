@@ -0,0 +1,37 @@
+# Generated by Django 5.0.3 on 2026-10-17 03:46
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("faucet", "0007_transaction_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="faucet_tx_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="faucet_tx_wallet_lower_idx",
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["created_at", "id"], name="faucet_tx_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                django.db.models.functions.text.Lower("wallet_address"),
+                models.OrderBy(models.F("created_at"), descending=True),
+                models.OrderBy(models.F("id"), descending=True),
+                name="faucet_tx_wallet_keyset_idx",
+            ),
+        ),
+    ]
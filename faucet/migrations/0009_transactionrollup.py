@@ -0,0 +1,87 @@
+# Generated by Django 5.0.3 on 2026-10-17 03:49
+
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    # Count existing transactions into minute, hour and total buckets
+    Transaction = apps.get_model("faucet", "Transaction")
+    TransactionRollup = apps.get_model("faucet", "TransactionRollup")
+    counts = Counter()
+    for created_at, status in Transaction.objects.values_list(
+        "created_at", "status"
+    ).iterator():
+        minute = created_at.astimezone(timezone.utc).replace(second=0, microsecond=0)
+        counts[("minute", minute, status)] += 1
+        counts[("hour", minute.replace(minute=0), status)] += 1
+        counts[("total", datetime(1970, 1, 1, tzinfo=timezone.utc), status)] += 1
+    TransactionRollup.objects.bulk_create(
+        [
+            TransactionRollup(
+                resolution=resolution, bucket=bucket, status=status, count=count
+            )
+            for (resolution, bucket, status), count in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("faucet", "0008_transaction_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransactionRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[
+                            ("minute", "Minute"),
+                            ("hour", "Hour"),
+                            ("total", "Total"),
+                        ],
+                        max_length=6,
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("broadcast", "Broadcast"),
+                            ("confirmed", "Confirmed"),
+                            ("failed", "Failed"),
+                            ("dropped", "Dropped"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="transactionrollup",
+            constraint=models.UniqueConstraint(
+                fields=("resolution", "bucket", "status"),
+                name="faucet_rollup_bucket_uniq",
+            ),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("faucet", "0009_transactionrollup"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transaction",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("sending", "Sending"),
+                    ("broadcast", "Broadcast"),
+                    ("confirmed", "Confirmed"),
+                    ("failed", "Failed"),
+                    ("dropped", "Dropped"),
+                ],
+                max_length=10,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transactionrollup",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("sending", "Sending"),
+                    ("broadcast", "Broadcast"),
+                    ("confirmed", "Confirmed"),
+                    ("failed", "Failed"),
+                    ("dropped", "Dropped"),
+                ],
+                max_length=10,
+            ),
+        ),
+    ]
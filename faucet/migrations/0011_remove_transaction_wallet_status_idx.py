@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-17 04:50
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("faucet", "0010_transaction_status_sending"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="faucet_tx_wallet_status_idx",
+        ),
+    ]
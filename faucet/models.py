@@ -1,19 +1,144 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Lower
 
 STATUS_CHOICES = [
-    ("success", "Success"),
+    ("pending", "Pending"),
+    ("sending", "Sending"),
+    ("broadcast", "Broadcast"),
+    ("confirmed", "Confirmed"),
     ("failed", "Failed"),
+    ("dropped", "Dropped"),
 ]
 
+# Accepted by the node (and not known to have failed) vs. never paid out
+SUCCESS_STATUSES = ["broadcast", "confirmed"]
+FAILED_STATUSES = ["failed", "dropped"]
+
+
+class TransactionQuerySet(models.QuerySet):
+    def for_wallet(self, wallet_address):
+        """Case-insensitive wallet filter that can use the lower(wallet) index.
+
+        ``wallet_address__iexact`` compiles to ``UPPER()`` on PostgreSQL and
+        ``LIKE`` on SQLite, neither of which matches an index.
+        """
+        return self.alias(wallet_lower=Lower("wallet_address")).filter(
+            wallet_lower=wallet_address.lower()
+        )
+
+    def update(self, **kwargs):
+        """Bulk update that keeps ``TransactionRollup`` in step.
+
+        Queryset updates bypass the post_save signal, so when ``status`` or
+        ``created_at`` change the affected rows are locked and counted first.
+        """
+        if not {"status", "created_at"} & kwargs.keys():
+            return super().update(**kwargs)
+
+        from .rollups import apply_rollup_deltas, rollup_changes_for_update
+
+        with transaction.atomic(using=self.db):
+            rows = list(
+                self.select_for_update().values_list("pk", "created_at", "status")
+            )
+            if not rows:
+                return 0
+            # Only touch the rows that were counted, whatever the filter matches now
+            locked = self.filter(pk__in=[pk for pk, _, _ in rows])
+            updated = models.QuerySet.update(locked, **kwargs)
+            apply_rollup_deltas(rollup_changes_for_update(rows, kwargs))
+        return updated
+
+    def filtered(self, wallet=None, from_date=None, to_date=None):
+        """Apply the optional wallet and date range filters of the listing APIs"""
+        queryset = self
+        if wallet:
+            queryset = queryset.for_wallet(wallet)
+        if from_date:
+            queryset = queryset.filter(created_at__gte=from_date)
+        if to_date:
+            queryset = queryset.filter(created_at__lte=to_date)
+        return queryset
+
 
 class Transaction(models.Model):
     wallet_address = models.CharField(max_length=42)
     transaction_hash = models.CharField(max_length=66)
+    sender_address = models.CharField(max_length=42, blank=True, default="")
     amount = models.DecimalField(max_digits=18, decimal_places=9)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
     error_message = models.TextField(null=True, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
+    block_number = models.BigIntegerField(null=True, blank=True)
+    gas_used = models.BigIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, editable=True)
 
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Date range listings, stats windows and the (created_at, id) keyset
+            models.Index(fields=["created_at", "id"], name="faucet_tx_created_id_idx"),
+            # Case-insensitive wallet listing, newest first
+            models.Index(
+                Lower("wallet_address"),
+                models.F("created_at").desc(),
+                models.F("id").desc(),
+                name="faucet_tx_wallet_keyset_idx",
+            ),
+            # Partial index so the receipt tracker only scans unconfirmed rows
+            models.Index(
+                fields=["id"],
+                condition=models.Q(status="broadcast"),
+                name="faucet_tx_broadcast_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The post_save rollup deltas commit or roll back together with the row.
+        # delete() needs no wrapper, Django sends post_delete inside its own
+        # transaction. No savepoint, so a save in an outer transaction costs
+        # no extra queries
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.wallet_address} {self.amount} {self.created_at} - {self.status}"
+
+
+class SenderNonce(models.Model):
+    """Next nonce to hand out for a funding account, shared by all workers"""
+
+    address = models.CharField(max_length=42, primary_key=True)
+    next_nonce = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.address} next nonce {self.next_nonce}"
+
+
+ROLLUP_RESOLUTIONS = [
+    ("minute", "Minute"),
+    ("hour", "Hour"),
+    ("total", "Total"),
+]
+
+
+class TransactionRollup(models.Model):
+    """Transaction counts per status and minute/hour bucket, used by /api/stats"""
+
+    resolution = models.CharField(max_length=6, choices=ROLLUP_RESOLUTIONS)
+    bucket = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["resolution", "bucket", "status"],
+                name="faucet_rollup_bucket_uniq",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.resolution} {self.bucket} {self.status}: {self.count}"
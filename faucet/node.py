@@ -0,0 +1,261 @@
+import itertools
+import threading
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3.providers.rpc import HTTPProvider
+
+from .conf import get_settings
+from .gas import GasPriceOracle
+from .models import SenderNonce
+from .nonce import NonceManager
+
+SENDER_STRATEGIES = ("round_robin", "least_pending")
+# Read timeout of the sender stats calls. /api/stats waits for them, a slow node
+# should cost a few seconds there rather than the full read timeout
+STATS_READ_TIMEOUT = 2
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """HTTP provider that sends every RPC call through one shared keep-alive session.
+
+    web3's own session cache is keyed per thread, so each worker thread would open
+    its own connections to the node. This provider pins all threads to ``session``.
+    """
+
+    def __init__(self, endpoint_uri, session, timeout=None):
+        request_kwargs = {"timeout": timeout} if timeout else {}
+        super().__init__(endpoint_uri, request_kwargs=request_kwargs)
+        self.session = session
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        response = self.session.post(
+            self.endpoint_uri, data=request_data, **self.get_request_kwargs()
+        )
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+
+class Sender:
+    """A funding account with its own nonce stream"""
+
+    def __init__(self, w3, account):
+        self.account = account
+        self.address = account.address
+        self.nonces = NonceManager(w3, account.address)
+        # Broadcasts currently running in this process
+        self.sending = 0
+
+
+class NodeClient:
+    """Long-lived Web3 client with a pooled HTTP session and cached signers.
+
+    Every private key becomes a ``Sender`` with an independent nonce sequence, so
+    payouts from different keys can be broadcast in parallel.
+    """
+
+    def __init__(
+        self,
+        node_url,
+        private_keys,
+        pool_size=10,
+        connect_timeout=3.05,
+        read_timeout=10,
+        strategy="round_robin",
+        gas_mode="legacy",
+        gas_ttl=12,
+    ):
+        if strategy not in SENDER_STRATEGIES:
+            raise ValueError(
+                f"Sender strategy must be one of: {', '.join(SENDER_STRATEGIES)}"
+            )
+        if not private_keys:
+            raise ValueError("At least one funding private key is required")
+
+        self.node_url = node_url
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.w3 = Web3(PooledHTTPProvider(node_url, self.session, timeout=self.timeout))
+        # Key derivation is comparatively expensive, do it once per process
+        self.senders = [
+            Sender(self.w3, self.w3.eth.account.from_key(key)) for key in private_keys
+        ]
+        self.strategy = strategy
+        self._rotation = itertools.cycle(self.senders)
+        self._sender_lock = threading.Lock()
+        self.gas = GasPriceOracle(self.w3, ttl=gas_ttl, mode=gas_mode)
+
+    @contextmanager
+    def sender(self):
+        """Pick a funding account for one broadcast"""
+        with self._sender_lock:
+            if self.strategy == "least_pending":
+                sender = min(self.senders, key=lambda s: s.sending)
+            else:
+                sender = next(self._rotation)
+            sender.sending += 1
+        try:
+            yield sender
+        finally:
+            with self._sender_lock:
+                sender.sending -= 1
+
+    def sender_stats(self):
+        """Balance and unconfirmed transaction count for every funding account.
+
+        ``in_flight`` is the gap between the next locally allocated nonce and the
+        node's mined transaction count, which covers broadcasts from all workers.
+        Every account is looked up in a single JSON-RPC batch with a short read
+        timeout, if it fails each entry carries the error instead.
+        """
+        next_nonces = dict(
+            SenderNonce.objects.filter(
+                address__in=[sender.address for sender in self.senders]
+            ).values_list("address", "next_nonce")
+        )
+        calls = []
+        for sender in self.senders:
+            calls.append(("eth_getBalance", [sender.address, "latest"]))
+            calls.append(("eth_getTransactionCount", [sender.address, "latest"]))
+        try:
+            results = self.batch_call(
+                calls, timeout=(self.timeout[0], STATS_READ_TIMEOUT)
+            )
+        except Exception as e:
+            return [
+                {
+                    "address": sender.address,
+                    "balance": None,
+                    "in_flight": None,
+                    "error": str(e),
+                }
+                for sender in self.senders
+            ]
+
+        stats = []
+        for i, sender in enumerate(self.senders):
+            balance, mined = int(results[2 * i], 16), int(results[2 * i + 1], 16)
+            next_nonce = next_nonces.get(sender.address)
+            stats.append(
+                {
+                    "address": sender.address,
+                    "balance": str(Web3.from_wei(balance, "ether")),
+                    "in_flight": (
+                        0 if next_nonce is None else max(next_nonce - mined, 0)
+                    ),
+                }
+            )
+        return stats
+
+    def batch_call(self, calls, chunk_size=100, timeout=None, return_errors=False):
+        """Send ``(method, params)`` pairs as JSON-RPC batches, returning results in order.
+
+        web3 has no batch support, so the payload goes straight through the pooled
+        session. A call the node answers with an error raises ``ValueError``, or
+        with ``return_errors`` takes that ``ValueError``'s place in the results.
+        ``timeout`` replaces the client's ``(connect, read)`` timeout.
+        """
+        results = []
+        for start in range(0, len(calls), chunk_size):
+            end = start + chunk_size
+            chunk = calls[start:end]
+            payload = [
+                {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+                for i, (method, params) in enumerate(chunk)
+            ]
+            response = self.session.post(
+                self.node_url, json=payload, timeout=timeout or self.timeout
+            )
+            response.raise_for_status()
+            replies = {reply.get("id"): reply for reply in response.json()}
+            for i, (method, _) in enumerate(chunk):
+                reply = replies.get(i)
+                if reply is None or "error" in reply:
+                    error = reply.get("error") if reply else "missing reply"
+                    if not return_errors:
+                        raise ValueError(f"{method} failed: {error}")
+                    results.append(ValueError(f"{method} failed: {error}"))
+                    continue
+                results.append(reply.get("result"))
+        return results
+
+    def connection_stats(self):
+        """Connections opened vs. requests served by the underlying urllib3 pools"""
+        pools = self.adapter.poolmanager.pools
+        opened = 0
+        served = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            served += pool.num_requests
+        return {
+            "requests": served,
+            "connections_opened": opened,
+            "connections_reused": max(served - opened, 0),
+        }
+
+    def close(self):
+        self.gas.stop()
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+_client_stats = {"pool_hits": 0, "pool_misses": 0}
+
+
+def get_node_client():
+    """Return the process-wide node client, creating it on first use"""
+    global _client
+    client = _client
+    if client is not None:
+        _client_stats["pool_hits"] += 1
+        return client
+
+    with _client_lock:
+        if _client is None:
+            settings = get_settings()
+            _client = NodeClient(
+                settings.ethereum_node_url,
+                settings.private_keys,
+                pool_size=settings.pool_size,
+                connect_timeout=settings.connect_timeout,
+                read_timeout=settings.read_timeout,
+                strategy=settings.sender_strategy,
+                gas_mode=settings.gas_mode,
+                gas_ttl=settings.gas_price_ttl,
+            )
+            _client.gas.start()
+            _client_stats["pool_misses"] += 1
+        else:
+            _client_stats["pool_hits"] += 1
+        return _client
+
+
+def reset_node_client():
+    """Drop the cached client so the next call rebuilds it (tests, config reloads)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+def node_client_stats():
+    stats = dict(_client_stats)
+    client = _client
+    if client is not None:
+        stats.update(client.connection_stats())
+        stats["gas_price"] = client.gas.stats()
+    else:
+        stats.update(requests=0, connections_opened=0, connections_reused=0)
+    return stats
@@ -0,0 +1,119 @@
+import threading
+from contextlib import suppress
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .metrics import stage
+from .models import SenderNonce
+
+# Node error messages that mean our local nonce counter is out of sync with the chain
+NONCE_ERROR_MARKERS = (
+    "nonce too low",
+    "nonce too high",
+    "replacement transaction underpriced",
+    "already known",
+    "known transaction",
+)
+
+
+def is_nonce_error(exc):
+    message = str(exc).lower()
+    return any(marker in message for marker in NONCE_ERROR_MARKERS)
+
+
+class NonceManager:
+    """Hands out nonces for one account without asking the node on every request.
+
+    The counter lives in a ``SenderNonce`` row that is locked with
+    ``SELECT ... FOR UPDATE`` while a nonce is taken, so concurrent threads and
+    worker processes never receive the same value. The node is only queried when
+    the row is first created and when the node rejects a nonce.
+    """
+
+    def __init__(self, w3, address):
+        self.w3 = w3
+        self.address = address
+        self._lock = threading.Lock()
+
+    def chain_nonce(self):
+        return self.w3.eth.get_transaction_count(self.address, "pending")
+
+    def _locked_row(self):
+        row = (
+            SenderNonce.objects.select_for_update().filter(address=self.address).first()
+        )
+        if row is not None:
+            return row
+
+        try:
+            with transaction.atomic():
+                SenderNonce.objects.create(
+                    address=self.address, next_nonce=self.chain_nonce()
+                )
+        except IntegrityError:
+            # Another worker synced the row first, use theirs
+            pass
+        return SenderNonce.objects.select_for_update().get(address=self.address)
+
+    def allocate(self):
+        """Reserve and return the next nonce"""
+        with self._lock, transaction.atomic():
+            row = self._locked_row()
+            nonce = row.next_nonce
+            row.next_nonce = nonce + 1
+            row.save(update_fields=["next_nonce", "updated_at"])
+        return nonce
+
+    def release(self, nonce):
+        """Give back ``nonce`` after a failed broadcast, if it is still the last one out.
+
+        Returns False when another nonce was allocated after it. Rewinding
+        then would hand that one out twice, so the gap stays until the next
+        nonce error resyncs the counter.
+        """
+        return bool(
+            SenderNonce.objects.filter(
+                address=self.address, next_nonce=nonce + 1
+            ).update(next_nonce=nonce, updated_at=timezone.now())
+        )
+
+    def resync(self):
+        """Reset the counter to the node's pending transaction count"""
+        with self._lock, transaction.atomic():
+            row = self._locked_row()
+            row.next_nonce = self.chain_nonce()
+            row.save(update_fields=["next_nonce", "updated_at"])
+        return row.next_nonce
+
+
+def send_with_nonce(w3, account, nonces, transaction_fields):
+    """Sign and broadcast a transaction using a locally allocated nonce.
+
+    If the node rejects the nonce the counter is resynced and the transaction is
+    retried once. After any other failure the nonce is released, so it does not
+    leave a gap, unless another thread or worker has allocated one since.
+    """
+    for attempt in range(2):
+        with stage("nonce"):
+            nonce = nonces.allocate()
+        with stage("sign"):
+            signed_txn = account.sign_transaction(
+                {**transaction_fields, "nonce": nonce}
+            )
+        try:
+            with stage("broadcast"):
+                return w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        except Exception as e:
+            with stage("nonce_resync"):
+                if not is_nonce_error(e):
+                    # A resync would rewind below nonces others hold but have
+                    # not broadcast yet
+                    with suppress(Exception):
+                        nonces.release(nonce)
+                    raise
+                if attempt:
+                    with suppress(Exception):
+                        nonces.resync()
+                    raise
+                nonces.resync()
@@ -0,0 +1,63 @@
+import base64
+import binascii
+
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Newest first, id breaks ties between rows created in the same microsecond
+KEYSET_ORDERING = ("-created_at", "-id")
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing just after ``row`` in keyset order"""
+    token = f"{row.created_at.isoformat()}|{row.pk}"
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, id)`` from a cursor, raising ``ValueError`` if invalid"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if created_at is None:
+        raise ValueError("Invalid cursor")
+    return created_at, pk
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Return one page of ``queryset`` and the cursor of the next page (or None).
+
+    The position is a ``(created_at, id)`` pair rather than an OFFSET, so the
+    database seeks straight to it and deep pages cost the same as the first.
+    """
+    rows = list(_page_queryset(queryset, cursor, limit))
+    return _split_page(rows, limit)
+
+
+async def akeyset_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """``keyset_page`` for async views, fetching the page with the async ORM"""
+    rows = [row async for row in _page_queryset(queryset, cursor, limit)]
+    return _split_page(rows, limit)
+
+
+def _page_queryset(queryset, cursor, limit):
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        # Range scan on created_at, then skip rows at the same instant already seen
+        queryset = queryset.filter(created_at__lte=created_at).exclude(
+            created_at=created_at, id__gte=pk
+        )
+    # One extra row tells whether another page exists
+    return queryset.order_by(*KEYSET_ORDERING)[: limit + 1]
+
+
+def _split_page(rows, limit):
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
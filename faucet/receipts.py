@@ -0,0 +1,85 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .limiter import refund_wallets
+from .models import Transaction
+from .node import get_node_client
+
+
+def reconcile_receipts(limit=500, drop_after=600):
+    """Move broadcast transactions to confirmed, failed or dropped.
+
+    Receipts for all open hashes are fetched with batched
+    ``eth_getTransactionReceipt`` calls. A transaction without a receipt that
+    the node no longer knows about after ``drop_after`` seconds is dropped.
+    Wallets of failed and dropped payouts get their cooldown back. A lookup the
+    node answers with an error counts as no receipt yet, and never as dropped.
+    Returns the number of rows that changed status.
+    """
+    open_rows = (
+        Transaction.objects.filter(status="broadcast")
+        .exclude(transaction_hash="")
+        .order_by("id")
+        .values_list("transaction_hash", "created_at")[:limit]
+    )
+    # Batched payouts share one hash across many rows
+    broadcast_at = {}
+    for tx_hash, created_at in open_rows:
+        broadcast_at[tx_hash] = min(created_at, broadcast_at.get(tx_hash, created_at))
+    if not broadcast_at:
+        return 0
+
+    node = get_node_client()
+    hashes = list(broadcast_at)
+    receipts = node.batch_call(
+        [("eth_getTransactionReceipt", [_prefixed(tx_hash)]) for tx_hash in hashes],
+        return_errors=True,
+    )
+
+    outcomes = defaultdict(list)
+    missing = []
+    for tx_hash, receipt in zip(hashes, receipts):
+        if receipt is None or isinstance(receipt, Exception):
+            missing.append(tx_hash)
+            continue
+        succeeded = int(receipt["status"], 16) == 1
+        outcome = (
+            "confirmed" if succeeded else "failed",
+            int(receipt["blockNumber"], 16),
+            int(receipt["gasUsed"], 16),
+        )
+        outcomes[outcome].append(tx_hash)
+
+    drop_before = timezone.now() - timedelta(seconds=drop_after)
+    stale = [tx_hash for tx_hash in missing if broadcast_at[tx_hash] < drop_before]
+    if stale:
+        known = node.batch_call(
+            [("eth_getTransactionByHash", [_prefixed(tx_hash)]) for tx_hash in stale],
+            return_errors=True,
+        )
+        dropped = [tx_hash for tx_hash, tx in zip(stale, known) if tx is None]
+        if dropped:
+            outcomes[("dropped", None, None)] = dropped
+
+    changed = 0
+    for (status, block_number, gas_used), tx_hashes in outcomes.items():
+        update = {"status": status, "block_number": block_number, "gas_used": gas_used}
+        if status == "failed":
+            update["error_message"] = "Transaction reverted"
+        elif status == "dropped":
+            update["error_message"] = "Transaction dropped from the mempool"
+        rows = Transaction.objects.filter(
+            status="broadcast", transaction_hash__in=tx_hashes
+        )
+        if status != "confirmed":
+            # Reverted or dropped, the wallet received nothing
+            refund_wallets(list(rows.values_list("wallet_address", flat=True)))
+        changed += rows.update(**update)
+    return changed
+
+
+def _prefixed(tx_hash):
+    # Hashes stored from plain bytes.hex() have no 0x prefix, the node expects one
+    return tx_hash if tx_hash.startswith("0x") else f"0x{tx_hash}"
@@ -0,0 +1,50 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class _LineBuffer:
+    """File-like object that hands back what csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def stream(self, header, rows):
+        for row in rows:
+            yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + "\n"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        return "".join(
+            json.dumps(item, cls=DjangoJSONEncoder) + "\n" for item in items
+        ).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def stream(self, header, rows):
+        writer = csv.writer(_LineBuffer())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        header = list(items[0]) if items else []
+        rows = ([item.get(field) for field in header] for item in items)
+        return "".join(self.stream(header, rows)).encode(self.charset)
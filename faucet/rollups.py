@@ -0,0 +1,308 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Trunc, TruncMinute
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import FAILED_STATUSES, SUCCESS_STATUSES, Transaction, TransactionRollup
+
+# Bucket of the single all-time row per status
+TOTAL_BUCKET = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+TIMESERIES_INTERVALS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+# Receipts can still move a transaction from success to failed for a while, so
+# only buckets that ended this long ago are cached
+TIMESERIES_SETTLE = timedelta(minutes=15)
+TIMESERIES_CACHE_TTL = 24 * 60 * 60
+# Settled buckets per cache entry, so a long window costs a few dozen entries
+# rather than one per bucket
+TIMESERIES_CACHE_CHUNK = 60
+
+
+def floor_minute(value):
+    return value.astimezone(dt_timezone.utc).replace(second=0, microsecond=0)
+
+
+def floor_hour(value):
+    return floor_minute(value).replace(minute=0)
+
+
+def floor_bucket(value, interval):
+    """Start of the minute, hour or day (UTC) ``value`` falls in"""
+    value = floor_minute(value)
+    if interval in ("hour", "day"):
+        value = value.replace(minute=0)
+    if interval == "day":
+        value = value.replace(hour=0)
+    return value
+
+
+def ceil_minute(value):
+    floored = floor_minute(value)
+    return floored if floored == value else floored + timedelta(minutes=1)
+
+
+def ceil_hour(value):
+    floored = floor_hour(value)
+    return floored if floored == value else floored + timedelta(hours=1)
+
+
+def apply_rollup_deltas(deltas):
+    """Add ``{(minute, status): n}`` to the minute, hour and total rollup rows"""
+    changes = Counter()
+    for (minute, status), delta in deltas.items():
+        if not delta:
+            continue
+        changes[("minute", minute, status)] += delta
+        changes[("hour", floor_hour(minute), status)] += delta
+        changes[("total", TOTAL_BUCKET, status)] += delta
+
+    for (resolution, bucket, status), delta in sorted(changes.items()):
+        if not delta:
+            continue
+        rollup = TransactionRollup.objects.filter(
+            resolution=resolution, bucket=bucket, status=status
+        )
+        if rollup.update(count=F("count") + delta):
+            continue
+        try:
+            with transaction.atomic():
+                TransactionRollup.objects.create(
+                    resolution=resolution, bucket=bucket, status=status, count=delta
+                )
+        except IntegrityError:
+            # Another writer created the bucket first
+            rollup.update(count=F("count") + delta)
+
+
+def rollup_changes_for_update(rows, changes):
+    """Rollup deltas for a bulk update of ``(pk, created_at, status)`` rows"""
+    deltas = Counter()
+    for _, created_at, status in rows:
+        new_created_at = changes.get("created_at", created_at)
+        new_status = changes.get("status", status)
+        deltas[(floor_minute(created_at), status)] -= 1
+        deltas[(floor_minute(new_created_at), new_status)] += 1
+    return deltas
+
+
+@receiver(post_init, sender=Transaction)
+def remember_rollup_state(sender, instance, **kwargs):
+    # Read __dict__ so deferred fields are not fetched one query per instance
+    instance._rollup_state = (
+        instance.__dict__.get("created_at"),
+        instance.__dict__.get("status"),
+    )
+
+
+@receiver(post_save, sender=Transaction)
+def count_saved_transaction(sender, instance, created, **kwargs):
+    deltas = Counter()
+    if not created:
+        old_created_at, old_status = instance._rollup_state
+        if (old_created_at, old_status) == (instance.created_at, instance.status):
+            return
+        if old_created_at is None or old_status is None:
+            # Loaded without these fields, the previous bucket is unknown
+            return
+        deltas[(floor_minute(old_created_at), old_status)] -= 1
+    deltas[(floor_minute(instance.created_at), instance.status)] += 1
+    apply_rollup_deltas(deltas)
+    instance._rollup_state = (instance.created_at, instance.status)
+
+
+@receiver(post_delete, sender=Transaction)
+def count_deleted_transaction(sender, instance, **kwargs):
+    created_at, status = instance.created_at, instance.status
+    apply_rollup_deltas({(floor_minute(created_at), status): -1})
+
+
+def transaction_stats(now=None):
+    """Faucet statistics answered from rollup rows instead of counting transactions.
+
+    The last 24 hours are covered by hour buckets in the middle, minute buckets at
+    both ends and an exact count for the partial minute the window starts in, so
+    the result matches counting the transaction table directly. Each part is a
+    single conditional aggregation, two queries in total.
+    """
+    now = now or timezone.now()
+    start = now - timedelta(hours=24)
+    first_minute = ceil_minute(start)
+    first_hour = ceil_hour(first_minute)
+    last_hour = floor_hour(now)
+
+    in_window = (
+        Q(resolution="minute", bucket__gte=first_minute, bucket__lt=first_hour)
+        | Q(resolution="hour", bucket__gte=first_hour, bucket__lt=last_hour)
+        | Q(resolution="minute", bucket__gte=max(first_hour, last_hour))
+    )
+    stats = TransactionRollup.objects.filter(
+        Q(resolution="total") | in_window
+    ).aggregate(
+        total_transactions=Sum("count", filter=Q(resolution="total"), default=0),
+        last_24h_transactions=Sum("count", filter=in_window, default=0),
+        successful_transactions=Sum(
+            "count", filter=in_window & Q(status__in=SUCCESS_STATUSES), default=0
+        ),
+        failed_transactions=Sum(
+            "count", filter=in_window & Q(status__in=FAILED_STATUSES), default=0
+        ),
+    )
+
+    if start < first_minute:
+        edge = Transaction.objects.filter(
+            created_at__gte=start, created_at__lt=first_minute
+        ).aggregate(
+            last_24h_transactions=Count("id"),
+            successful_transactions=Count("id", filter=Q(status__in=SUCCESS_STATUSES)),
+            failed_transactions=Count("id", filter=Q(status__in=FAILED_STATUSES)),
+        )
+        for key, value in edge.items():
+            stats[key] += value
+    return stats
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from the transaction table"""
+    minutes = (
+        Transaction.objects.annotate(minute=TruncMinute("created_at"))
+        .values_list("minute", "status")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    deltas = Counter()
+    for minute, status, total in minutes:
+        deltas[(floor_minute(minute), status)] += total
+
+    with transaction.atomic():
+        TransactionRollup.objects.all().delete()
+        apply_rollup_deltas(deltas)
+    return len(deltas)
+
+
+def prune_rollups(older_than=timedelta(hours=48)):
+    """Delete minute buckets that no statistics window reaches anymore"""
+    deleted, _ = TransactionRollup.objects.filter(
+        resolution="minute", bucket__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
+
+
+def timeseries_buckets(interval, start, end):
+    """Starts of the ``interval`` buckets covering ``[start, end)``"""
+    step = TIMESERIES_INTERVALS[interval]
+    bucket = floor_bucket(start, interval)
+    buckets = []
+    while bucket < end:
+        buckets.append(bucket)
+        bucket += step
+    return buckets
+
+
+def transaction_timeseries(interval, start, end, now=None):
+    """Transaction counts and ETH paid out per ``interval`` bucket, oldest first.
+
+    Whole buckets are reported, so ``start`` is rounded down to its bucket.
+    Buckets are aggregated by the database (``date_trunc`` + ``GROUP BY``).
+    Settled buckets are cached in entries of ``TIMESERIES_CACHE_CHUNK``
+    consecutive buckets that fill up as their buckets settle, so a moving
+    window only aggregates the buckets it has not seen yet plus the recent
+    ones. Buckets without transactions are filled with zeros.
+    """
+    now = now or timezone.now()
+    step = TIMESERIES_INTERVALS[interval]
+    chunk_span = step * TIMESERIES_CACHE_CHUNK
+    buckets = timeseries_buckets(interval, start, end)
+    settled_before = now - TIMESERIES_SETTLE
+    settled = [bucket for bucket in buckets if bucket + step <= settled_before]
+    recent = [bucket for bucket in buckets if bucket + step > settled_before]
+
+    def chunk_of(bucket):
+        return TOTAL_BUCKET + (bucket - TOTAL_BUCKET) // chunk_span * chunk_span
+
+    keys = {}
+    for bucket in settled:
+        chunk = chunk_of(bucket)
+        keys[chunk] = (
+            f"faucet:timeseries:{interval}:{TIMESERIES_CACHE_CHUNK}:{chunk.isoformat()}"
+        )
+    cached = cache.get_many(keys.values())
+    chunks = {chunk: cached.get(key, {}) for chunk, key in keys.items()}
+    results = {}
+    missing = []
+    for bucket in settled:
+        if bucket in chunks[chunk_of(bucket)]:
+            results[bucket] = chunks[chunk_of(bucket)][bucket]
+        else:
+            missing.append(bucket)
+
+    # One query per contiguous run of buckets rather than one per bucket
+    for run in [*_runs(missing, step), recent]:
+        if not run:
+            continue
+        counts = _bucket_counts(interval, run[0], run[-1] + step)
+        for bucket in run:
+            results[bucket] = counts.get(bucket, _empty_bucket())
+
+    changed = {}
+    for bucket in missing:
+        chunk = chunk_of(bucket)
+        chunks[chunk][bucket] = results[bucket]
+        changed[keys[chunk]] = chunks[chunk]
+    if changed:
+        cache.set_many(changed, TIMESERIES_CACHE_TTL)
+
+    series = []
+    for bucket in buckets:
+        counts = results[bucket]
+        total = counts["total"]
+        series.append(
+            {
+                "bucket": bucket,
+                **counts,
+                "success_rate": counts["successful"] / total if total else None,
+            }
+        )
+    return series
+
+
+def _runs(buckets, step):
+    """Split ascending ``buckets`` into lists of consecutive buckets"""
+    runs = []
+    for bucket in buckets:
+        if runs and bucket - runs[-1][-1] == step:
+            runs[-1].append(bucket)
+        else:
+            runs.append([bucket])
+    return runs
+
+
+def _empty_bucket():
+    return {"total": 0, "successful": 0, "failed": 0, "eth_dispensed": 0}
+
+
+def _bucket_counts(interval, start, end):
+    succeeded = Q(status__in=SUCCESS_STATUSES)
+    rows = (
+        Transaction.objects.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(bucket=Trunc("created_at", interval, tzinfo=dt_timezone.utc))
+        .values("bucket")
+        .annotate(
+            total=Count("id"),
+            successful=Count("id", filter=succeeded),
+            failed=Count("id", filter=Q(status__in=FAILED_STATUSES)),
+            eth_dispensed=Sum("amount", filter=succeeded, default=0),
+        )
+        .order_by()
+    )
+    return {row.pop("bucket").astimezone(dt_timezone.utc): row for row in rows}
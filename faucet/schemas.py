@@ -1,11 +1,59 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Transaction
+from .models import FAILED_STATUSES, SUCCESS_STATUSES, Transaction
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+from .rollups import TIMESERIES_INTERVALS
+
+# Window charted when from_date is not given
+TIMESERIES_DEFAULT_WINDOWS = {
+    "minute": timedelta(hours=1),
+    "hour": timedelta(hours=24),
+    "day": timedelta(days=30),
+}
+MAX_TIMESERIES_BUCKETS = 2000
 
 
 class TransactionQueryParamsSerializer(serializers.Serializer):
     wallet = serializers.CharField(required=False, max_length=42)
     from_date = serializers.DateTimeField(required=False)
     to_date = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=MAX_PAGE_SIZE, default=DEFAULT_PAGE_SIZE
+    )
+    cursor = serializers.CharField(required=False)
+    fields = serializers.CharField(required=False)
+
+    def validate_cursor(self, value):
+        try:
+            decode_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError("Invalid cursor")
+        return value
+
+    def validate_fields(self, value):
+        fields = [field.strip() for field in value.split(",") if field.strip()]
+        allowed = TransactionSerializer.Meta.fields
+        unknown = [field for field in fields if field not in allowed]
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown fields: {', '.join(unknown)}. "
+                f"Choose from: {', '.join(allowed)}"
+            )
+        return fields
+
+    def validate(self, data):
+        if data.get("from_date") and data.get("to_date"):
+            if data["from_date"] > data["to_date"]:
+                raise serializers.ValidationError("from_date must be before to_date")
+        return data
+
+
+class TransactionExportParamsSerializer(serializers.Serializer):
+    wallet = serializers.CharField(required=False, max_length=42)
+    from_date = serializers.DateTimeField(required=False)
+    to_date = serializers.DateTimeField(required=False)
 
     def validate(self, data):
         if data.get("from_date") and data.get("to_date"):
@@ -14,7 +62,37 @@ class TransactionQueryParamsSerializer(serializers.Serializer):
         return data
 
 
+class TimeseriesParamsSerializer(serializers.Serializer):
+    interval = serializers.ChoiceField(
+        choices=list(TIMESERIES_INTERVALS), required=False, default="hour"
+    )
+    from_date = serializers.DateTimeField(required=False)
+    to_date = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        to_date = data.setdefault("to_date", timezone.now())
+        from_date = data.setdefault(
+            "from_date", to_date - TIMESERIES_DEFAULT_WINDOWS[data["interval"]]
+        )
+        if from_date > to_date:
+            raise serializers.ValidationError("from_date must be before to_date")
+        # Counted without building the list, the window may be absurdly long
+        span = to_date - from_date
+        if span / TIMESERIES_INTERVALS[data["interval"]] > MAX_TIMESERIES_BUCKETS:
+            raise serializers.ValidationError(
+                f"At most {MAX_TIMESERIES_BUCKETS} buckets, use a longer interval"
+            )
+        return data
+
+
 class TransactionSerializer(serializers.ModelSerializer):
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Optional projection, e.g. fields=["transaction_hash", "status"]
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = Transaction
         fields = [
@@ -23,6 +101,9 @@ class TransactionSerializer(serializers.ModelSerializer):
             "status",
             "created_at",
             "wallet_address",
+            "sender_address",
+            "block_number",
+            "gas_used",
         ]
         extra_kwargs = {"transaction_hash": {"allow_blank": True}}
 
@@ -54,7 +135,7 @@ class TransactionSerializer(serializers.ModelSerializer):
         return value
 
     def validate_status(self, value):
-        valid_statuses = ["success", "failed"]
+        valid_statuses = SUCCESS_STATUSES + FAILED_STATUSES
         if value not in valid_statuses:
             raise serializers.ValidationError(
                 f"Status must be one of: {', '.join(valid_statuses)}"
@@ -1,10 +1,98 @@
 import streamlit as st
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timedelta, timezone
 import pandas as pd
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 # Configure API base URL
 API_BASE_URL = "http://localhost:8000/api"  # Use full URL in Docker
+REQUEST_TIMEOUT = 10
+# The API caches stats for a few seconds too, polling faster gains nothing
+STATS_TTL = 5
+TRANSACTIONS_TTL = 30
+PAGE_SIZES = [25, 50, 100, 500]
+# Chart window -> bucket interval and length
+CHART_WINDOWS = {
+    "Last hour": ("minute", timedelta(hours=1)),
+    "Last 24 hours": ("hour", timedelta(hours=24)),
+    "Last 7 days": ("hour", timedelta(days=7)),
+    "Last 30 days": ("day", timedelta(days=30)),
+    "Last 90 days": ("day", timedelta(days=90)),
+}
+
+
+@st.cache_resource
+def get_session():
+    """One keep-alive session for every rerun and browser session"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def forwarded_for():
+    """X-Forwarded-For naming this visitor, so the API limits them by their own IP.
+
+    Every request to the API comes from this process, without it all visitors
+    would share one IP limit. The address this session's websocket came from
+    is appended to what it forwarded, as any proxy does; the API only trusts
+    entries added by its FAUCET_TRUSTED_PROXIES.
+    """
+    ctx = get_script_run_ctx()
+    client = runtime.get_instance().get_client(ctx.session_id) if ctx else None
+    request = getattr(client, "request", None)
+    if request is None:
+        return None
+    previous = request.headers.get("X-Forwarded-For")
+    return f"{previous}, {request.remote_ip}" if previous else request.remote_ip
+
+
+def error_message(response):
+    try:
+        return response.json().get("error", "Unknown error")
+    except ValueError:
+        return f"HTTP {response.status_code}"
+
+
+@st.cache_data(ttl=STATS_TTL, show_spinner=False)
+def fetch_stats():
+    response = get_session().get(f"{API_BASE_URL}/stats", timeout=REQUEST_TIMEOUT)
+    # Raised rather than returned, so failures are not cached
+    response.raise_for_status()
+    return response.json()
+
+
+@st.cache_data(ttl=STATS_TTL, show_spinner=False)
+def fetch_timeseries(interval, from_date):
+    """Bucketed counts from the API as a DataFrame indexed by bucket start"""
+    response = get_session().get(
+        f"{API_BASE_URL}/stats/timeseries",
+        params={"interval": interval, "from_date": from_date},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    df = pd.DataFrame(response.json()["buckets"])
+    df["bucket"] = pd.to_datetime(df["bucket"])
+    df["eth_dispensed"] = pd.to_numeric(df["eth_dispensed"])
+    df["pending"] = df["total"] - df["successful"] - df["failed"]
+    return df.set_index("bucket")
+
+
+@st.cache_data(ttl=TRANSACTIONS_TTL, show_spinner=False)
+def fetch_transactions_page(params, cursor, limit):
+    """One page of transactions and the cursor of the next one (or None)"""
+    page_params = {**params, "limit": limit}
+    if cursor:
+        page_params["cursor"] = cursor
+    response = get_session().get(
+        f"{API_BASE_URL}/transactions", params=page_params, timeout=REQUEST_TIMEOUT
+    )
+    if response.status_code != 200:
+        raise RuntimeError(error_message(response))
+    return response.json(), response.headers.get("X-Next-Cursor")
 
 def fund_tab():
     st.header("Request Sepolia ETH")
@@ -13,12 +101,17 @@ def fund_tab():
     if st.button("Request Funds"):
         if wallet_address:
             try:
-                response = requests.post(
+                response = get_session().post(
                     f"{API_BASE_URL}/fund",
-                    json={"wallet_address": wallet_address}
+                    json={"wallet_address": wallet_address},
+                    headers={"X-Forwarded-For": forwarded_for()},
+                    timeout=REQUEST_TIMEOUT,
                 )
                 if response.status_code == 200:
+                    fetch_stats.clear()
                     st.success(f"Transaction Hash: {response.json()['transaction_hash']}")
+                elif response.status_code == 202:
+                    st.info(f"Request queued with id {response.json()['request_id']}")
                 else:
                     st.error(f"Error: {response.json().get('error', 'Unknown error')}")
             except Exception as e:
@@ -29,21 +122,39 @@ def fund_tab():
 def stats_tab():
     st.header("Faucet Statistics")
     if st.button("Refresh Stats"):
-        try:
-            response = requests.get(f"{API_BASE_URL}/stats")
-            if response.status_code == 200:
-                data = response.json()
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("Total Transactions", data["total_transactions"])
-                    st.metric("Last 24h Transactions", data["last_24h_transactions"])
-                with col2:
-                    st.metric("Successful Transactions", data["successful_transactions"])
-                    st.metric("Failed Transactions", data["failed_transactions"])
-            else:
-                st.error("Failed to fetch statistics")
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
+        fetch_stats.clear()
+        fetch_timeseries.clear()
+    try:
+        data = fetch_stats()
+    except requests.RequestException:
+        st.error("Failed to fetch statistics")
+        return
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Total Transactions", data["total_transactions"])
+        st.metric("Last 24h Transactions", data["last_24h_transactions"])
+    with col2:
+        st.metric("Successful Transactions", data["successful_transactions"])
+        st.metric("Failed Transactions", data["failed_transactions"])
+
+    window = st.selectbox("Window", list(CHART_WINDOWS), index=1)
+    interval, length = CHART_WINDOWS[window]
+    # Whole minutes, so reruns within a minute share the cached response
+    start = (datetime.now(timezone.utc) - length).replace(second=0, microsecond=0)
+    try:
+        df = fetch_timeseries(interval, start.isoformat())
+    except requests.RequestException:
+        st.error("Failed to fetch the time series")
+        return
+    st.subheader(f"Requests per {interval}")
+    st.bar_chart(df[["successful", "failed", "pending"]])
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Success rate")
+        st.line_chart(df["success_rate"])
+    with col2:
+        st.subheader(f"ETH dispensed per {interval}")
+        st.bar_chart(df["eth_dispensed"])
 
 def transactions_tab():
     st.header("Transaction History")
@@ -57,6 +168,7 @@ def transactions_tab():
         to_time = st.time_input("To Time", value=datetime.max.time())
     with col3:
         wallet = st.text_input("Wallet Address (optional)", placeholder="0x...")
+        page_size = st.selectbox("Page size", PAGE_SIZES, index=2)
     
     if st.button("Search Transactions"):
         params = {}
@@ -68,20 +180,38 @@ def transactions_tab():
             params["to_date"] = to_datetime.isoformat()
         if wallet:
             params["wallet"] = wallet
-            
-        try:
-            response = requests.get(f"{API_BASE_URL}/transactions", params=params)
-            if response.status_code == 200:
-                transactions = response.json()
-                if transactions:
-                    df = pd.DataFrame(transactions)
-                    st.dataframe(df)
-                else:
-                    st.info("No transactions found")
-            else:
-                st.error(f"Error: {response.json().get('error', 'Unknown error')}")
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
+        # Cursors of the pages visited so far, the first page has none
+        st.session_state.transactions_query = params
+        st.session_state.transactions_cursors = [None]
+        fetch_transactions_page.clear()
+
+    if "transactions_query" not in st.session_state:
+        return
+    cursors = st.session_state.transactions_cursors
+    page = len(cursors) - 1
+    try:
+        transactions, next_cursor = fetch_transactions_page(
+            st.session_state.transactions_query, cursors[-1], page_size
+        )
+    except (requests.RequestException, RuntimeError) as e:
+        st.error(f"Error: {str(e)}")
+        return
+
+    if transactions:
+        st.dataframe(pd.DataFrame(transactions), use_container_width=True)
+    else:
+        st.info("No transactions found")
+
+    # Callbacks run before the rerun, so the new page is fetched straight away
+    previous_col, page_col, next_col = st.columns([1, 2, 1])
+    with previous_col:
+        st.button("Previous", disabled=page == 0, on_click=cursors.pop)
+    with page_col:
+        st.caption(f"Page {page + 1}, {len(transactions)} transactions")
+    with next_col:
+        st.button(
+            "Next", disabled=not next_cursor, on_click=cursors.append, args=(next_cursor,)
+        )
 
 def main():
     st.set_page_config(page_title="Sepolia Faucet", layout="wide")
@@ -0,0 +1,328 @@
+import atexit
+import fcntl
+import logging
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from .conf import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def streamlit_command(port):
+    return [
+        "streamlit",
+        "run",
+        "faucet/streamlit_app.py",
+        "--server.port",
+        str(port),
+        "--server.address",
+        "0.0.0.0",
+        "--server.headless",
+        "true",
+        "--browser.serverAddress",
+        "localhost",
+        "--server.baseUrlPath",
+        "",
+        "--server.enableCORS",
+        "false",
+        "--server.enableXsrfProtection",
+        "false",
+        "--theme.base",
+        "light",
+    ]
+
+
+class RecordedProcess:
+    """A Streamlit started by an earlier owner, with the ``Popen`` calls used below"""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    def poll(self):
+        try:
+            # Reap it if it is our own child, e.g. handed over within one process
+            if os.waitpid(self.pid, os.WNOHANG)[0]:
+                return -1
+        except ChildProcessError:
+            pass
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return -1
+        except PermissionError:
+            pass
+        return None
+
+    def terminate(self):
+        self._signal(signal.SIGTERM)
+
+    def kill(self):
+        self._signal(signal.SIGKILL)
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() > deadline:
+                raise subprocess.TimeoutExpired(str(self.pid), timeout)
+            time.sleep(0.05)
+        return -1
+
+    def _signal(self, signum):
+        try:
+            os.kill(self.pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+class StreamlitSupervisor:
+    """Starts Streamlit once per host and keeps it running.
+
+    Every web worker may call ``ensure_started``, which only starts a background
+    thread. The thread of the worker holding ``lock_path`` supervises: it polls
+    ``health_url``, starts the process when nothing answers, kills it when it
+    is still not ready after ``startup_timeout`` seconds and restarts it after a
+    crash, waiting twice as long after each failed start up to ``max_backoff``.
+    The other workers retry the lock, so one of them takes over if the owner
+    exits. A Streamlit that is already healthy, e.g. left by a previous owner,
+    is adopted rather than started twice.
+
+    The pid of the started process is kept in ``<lock_path>.pid``. An owner
+    that exits while Streamlit is healthy hands it over (``hand_over``) rather
+    than stopping it, so recycling a worker does not drop every dashboard
+    session. The next owner finds it through the pid file, and ``stop_streamlit``
+    stops it for good when the server shuts down.
+    """
+
+    def __init__(
+        self,
+        command,
+        health_url,
+        lock_path,
+        poll_interval=1.0,
+        startup_timeout=30.0,
+        backoff=1.0,
+        max_backoff=60.0,
+        clock=time.monotonic,
+    ):
+        self.command = command
+        self.health_url = health_url
+        self.lock_path = lock_path
+        self.poll_interval = poll_interval
+        self.startup_timeout = startup_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+
+        self.pid_path = f"{lock_path}.pid"
+        self.process = None
+        self.ready = False
+        self.restarts = 0
+        self.started_at = None
+        self.next_start = 0.0
+        self._lock_file = None
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def ensure_started(self):
+        """Start supervising from a background thread, returns immediately"""
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self.run, name="streamlit-supervisor", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def run(self):
+        while not self._stopping.is_set():
+            if self.acquire():
+                try:
+                    self.check()
+                except OSError as e:
+                    logger.error("Streamlit could not be started: %s", e)
+                    self.next_start = self.clock() + self.max_backoff
+            self._stopping.wait(self.poll_interval)
+
+    def acquire(self):
+        """Take the host-wide lock without waiting, True if this process holds it"""
+        if self._lock_file is not None:
+            return True
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def probe(self):
+        try:
+            return requests.get(self.health_url, timeout=1).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def check(self):
+        """One supervision step: adopt, wait for, start or restart Streamlit"""
+        now = self.clock()
+        if self.probe():
+            if not self.ready:
+                logger.info("Streamlit is ready")
+            self.ready = True
+            self.restarts = 0
+            return
+        self.ready = False
+
+        if self.process is None:
+            # Handed over by the previous owner, restarted like our own
+            self.process = self.recorded_process()
+            if self.process is not None:
+                self.started_at = now
+        if self.process is not None:
+            code = self.process.poll()
+            if code is None:
+                if now - self.started_at < self.startup_timeout:
+                    return
+                logger.warning(
+                    "Streamlit not ready after %.0f s, restarting", self.startup_timeout
+                )
+                self.terminate()
+            else:
+                logger.warning("Streamlit exited with code %s", code)
+            self.process = None
+            self.forget_pid()
+
+        if now < self.next_start:
+            return
+        logger.info("Starting Streamlit: %s", " ".join(self.command))
+        self.process = subprocess.Popen(self.command)
+        with open(self.pid_path, "w") as f:
+            f.write(str(self.process.pid))
+        self.started_at = now
+        self.next_start = now + min(self.max_backoff, self.backoff * 2**self.restarts)
+        self.restarts += 1
+
+    def recorded_process(self):
+        """The process named by the pid file if it is still running our command"""
+        try:
+            with open(self.pid_path) as f:
+                pid = int(f.read())
+        except (OSError, ValueError):
+            return None
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().decode(errors="replace").split("\0")[:-1]
+        except FileNotFoundError:
+            return None
+        except OSError:
+            # No /proc here, trust the pid file
+            cmdline = list(self.command)
+        # "streamlit" itself may show up as its interpreter and script path, so
+        # only its arguments are compared
+        args = list(self.command)[1:]
+        start = len(cmdline) - len(args)
+        if cmdline[start:] != args:
+            return None
+        process = RecordedProcess(pid)
+        return process if process.poll() is None else None
+
+    def forget_pid(self):
+        try:
+            os.remove(self.pid_path)
+        except FileNotFoundError:
+            pass
+
+    def terminate(self, timeout=10):
+        process = self.process
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def stop(self):
+        """Stop supervising, stop Streamlit if this process runs it and release the lock"""
+        self._stop_thread()
+        self.terminate()
+        if self.process is not None:
+            self.forget_pid()
+        self._release()
+
+    def hand_over(self):
+        """Stop supervising but leave a healthy Streamlit running for the next owner"""
+        self._stop_thread()
+        if self.process is not None and self.probe():
+            self.process = None
+            self._release()
+        else:
+            self.stop()
+
+    def _stop_thread(self):
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def _release(self):
+        self.process = None
+        self.ready = False
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor():
+    """Return the process-wide supervisor for the configured Streamlit URL"""
+    global _supervisor
+    if _supervisor is None:
+        with _supervisor_lock:
+            if _supervisor is None:
+                url = get_settings().streamlit_url
+                port = urlparse(url).port or 8501
+                _supervisor = StreamlitSupervisor(
+                    streamlit_command(port),
+                    urljoin(url, "_stcore/health"),
+                    os.path.join(
+                        tempfile.gettempdir(), f"faucet-streamlit-{port}.lock"
+                    ),
+                )
+    return _supervisor
+
+
+def stop_supervisor(hand_over=False):
+    """Stop the supervisor of this process, if it was ever started.
+
+    With ``hand_over`` a healthy Streamlit keeps running for the next owner.
+    """
+    if _supervisor is not None:
+        if hand_over:
+            _supervisor.hand_over()
+        else:
+            _supervisor.stop()
+
+
+def stop_streamlit():
+    """Stop the Streamlit of this host whoever started it, e.g. at server shutdown"""
+    supervisor = get_supervisor()
+    supervisor.process = supervisor.process or supervisor.recorded_process()
+    supervisor.stop()
@@ -1,96 +1,193 @@
-import subprocess
-from django.views.generic import TemplateView
+import asyncio
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+import aiohttp
 import requests
+from asgiref.sync import sync_to_async
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
-import time
+from .asset_cache import get_asset_cache
+from .conf import get_settings
+from .metrics import ASSET_CACHE_SERVED_BYTES
+from .streamlit_supervisor import get_supervisor
 
-class StreamlitProxyView(TemplateView):
+# embedded: the first request that finds Streamlit down has the web workers
+# start and supervise it, one per host. separate: Streamlit runs on its own
+# (start.sh, its own container) and the API workers never spawn it.
+STREAMLIT_MODES = ("embedded", "separate")
+
+CHUNK_SIZE = 64 * 1024
+# Connect, read. Streamlit answers from memory, a slow read means it is stuck
+PROXY_TIMEOUT = (3.05, 30)
+POOL_SIZE = 32
+
+# Describe one connection rather than the message, never forwarded
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'trailers', 'transfer-encoding', 'upgrade',
+}
+# Set by the server in front of Django
+SERVER_HEADERS = {'date', 'server'}
+
+# Streamlit's JS, CSS and media bundles, named by content hash
+ASSET_PREFIX = '/static/'
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Shared by every request of the process, so assets reuse keep-alive
+# connections to Streamlit instead of opening one each
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE))
+session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE))
+# Only the client's headers go upstream, no default Accept-Encoding or User-Agent,
+# and no proxy settings from the environment
+session.headers.clear()
+session.trust_env = False
+
+
+def forwarded_headers(request):
+    """Client headers to send upstream, plus the usual X-Forwarded-* ones"""
+    headers = {
+        name: value
+        for name, value in request.headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS
+        and name.lower() not in ('host', 'content-length')
+    }
+    client = request.META.get('REMOTE_ADDR', '')
+    previous = request.headers.get('X-Forwarded-For')
+    headers['X-Forwarded-For'] = f'{previous}, {client}' if previous else client
+    headers['X-Forwarded-Host'] = request.get_host()
+    headers['X-Forwarded-Proto'] = request.scheme
+    return headers
+
+
+class _UpstreamBody:
+    """Body of a streamed upstream response, returning its connection on close"""
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        # Undecoded, the client gets the bytes Streamlit compressed
+        self.chunks = upstream.raw.stream(CHUNK_SIZE, decode_content=False)
+
+    def close(self):
+        # A fully read response is back in the pool already, an aborted one
+        # has its connection dropped
+        self.upstream.close()
+
+
+class UpstreamBody(_UpstreamBody):
+    def __iter__(self):
+        return self.chunks
+
+
+class AsyncUpstreamBody(_UpstreamBody):
+    """For ASGI servers, reads each chunk off the event loop"""
+
+    async def __aiter__(self):
+        read = sync_to_async(next, thread_sensitive=False)
+        while (chunk := await read(self.chunks, None)) is not None:
+            yield chunk
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class StreamlitProxyView(View):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.streamlit_process = None
-        self.streamlit_url = "http://localhost:8501"
+        self.streamlit_url = get_settings().streamlit_url
 
     def start_streamlit(self):
-        if self.streamlit_process is None:
-            self.streamlit_process = subprocess.Popen(
-                [
-                    "streamlit", "run", 
-                    "faucet/streamlit_app.py", 
-                    "--server.port", "8501",
-                    "--server.address", "0.0.0.0",
-                    "--browser.serverAddress", "localhost",
-                    "--server.baseUrlPath", "",
-                    "--server.enableCORS", "false",
-                    "--server.enableXsrfProtection", "false",
-                    "--theme.base", "light",
-                ]
-            )
-            time.sleep(3)
+        if get_settings().streamlit_mode == "embedded":
+            # Returns at once, the loading page refreshes until Streamlit answers
+            get_supervisor().ensure_started()
 
     def proxy_request(self, request, path):
-        """Proxy a request to Streamlit"""
-        # Handle special paths
-        if path.startswith('/static/'):
-            streamlit_path = f'_stcore/static/{path.replace("/static/", "", 1)}'
-        else:
-            streamlit_path = path.lstrip('/')
-
-        # Construct the full Streamlit URL
-        url = urljoin(self.streamlit_url, streamlit_path)
-        
-        try:
-            # Forward the request to Streamlit
-            streamlit_response = requests.get(
-                url,
-                stream=True,
-                headers={
-                    'Accept': request.headers.get('Accept', ''),
-                    'Accept-Encoding': request.headers.get('Accept-Encoding', ''),
-                    'User-Agent': request.headers.get('User-Agent', ''),
-                }
-            )
-            
-            # Get content type, defaulting to text/html
-            content_type = streamlit_response.headers.get('Content-Type', 'text/html')
-            
-            # Create the response
-            if 'stream' in content_type:
-                response = StreamingHttpResponse(
-                    streamlit_response.iter_content(chunk_size=8192),
-                    content_type=content_type
-                )
-            else:
-                response = HttpResponse(
-                    streamlit_response.content,
-                    content_type=content_type
-                )
-            
-            # Copy all headers from Streamlit response
-            excluded_headers = [
-                'content-encoding', 
-                'content-length', 
-                'transfer-encoding', 
-                'connection'
-            ]
-            for header, value in streamlit_response.headers.items():
-                if header.lower() not in excluded_headers:
-                    response[header] = value
-            
-            return response
-            
-        except requests.RequestException as e:
-            return HttpResponse(f"Error: {str(e)}", status=500)
+        """Proxy a request to Streamlit, streaming both bodies.
+
+        Raises ``requests.ConnectionError`` when Streamlit is not listening.
+        """
+        # Streamlit serves its assets from /static/ itself, paths go through
+        # unchanged
+        url = urljoin(self.streamlit_url, path.lstrip('/'))
 
-    def get(self, request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD') and path.startswith(ASSET_PREFIX):
+            cache = get_asset_cache()
+            if cache is not None:
+                return self.cached_asset(request, cache, path, url)
+
+        body = None
+        if request.META.get('CONTENT_LENGTH') or 'Transfer-Encoding' in request.headers:
+            # Sent chunked, without holding the whole upload in memory
+            body = iter(lambda: request.read(CHUNK_SIZE), b'')
+
+        upstream = session.request(
+            request.method,
+            url,
+            data=body,
+            headers=forwarded_headers(request),
+            stream=True,
+            allow_redirects=False,
+            timeout=PROXY_TIMEOUT,
+        )
+        return self.stream_response(request, upstream)
+
+    def stream_response(self, request, upstream):
+        # Sync servers iterate the body, ASGI servers need an async iterator or
+        # Django reads the whole body into a list first
+        body_class = AsyncUpstreamBody if isinstance(request, ASGIRequest) else UpstreamBody
+        response = StreamingHttpResponse(body_class(upstream), status=upstream.status_code)
+        # Bodies are passed through undecoded, so Content-Encoding and
+        # Content-Length still hold
+        for header, value in upstream.headers.items():
+            if header.lower() not in HOP_BY_HOP_HEADERS | SERVER_HEADERS:
+                response[header] = value
+        return response
+
+    def cached_asset(self, request, cache, path, url):
+        """Serve a static asset from the cache, fetching it once on a miss"""
+        asset = cache.get(path)
+        if asset is None:
+            headers = forwarded_headers(request)
+            # The identity body is fetched, the variants are compressed here
+            headers.pop('Accept-Encoding', None)
+            upstream = session.get(url, headers=headers, stream=True, timeout=PROXY_TIMEOUT)
+            length = int(upstream.headers.get('Content-Length') or 0)
+            if upstream.status_code != 200 or not cache.accepts(length):
+                return self.stream_response(request, upstream)
+            with upstream:
+                content_type = upstream.headers.get('Content-Type', 'application/octet-stream')
+                asset = cache.put(path, content_type, upstream.content)
+
+        encoding, body = asset.variant(request.headers.get('Accept-Encoding'))
+        headers = {
+            'Cache-Control': ASSET_CACHE_CONTROL,
+            'ETag': asset.etags[encoding],
+            'Vary': 'Accept-Encoding',
+        }
+        response = get_conditional_response(request, etag=headers['ETag'])
+        if response is None:
+            response = HttpResponse(body, content_type=asset.content_type)
+            response['Content-Length'] = len(body)
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+            ASSET_CACHE_SERVED_BYTES.labels(encoding).inc(len(body))
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
         try:
             # Get the path including query parameters
             path = request.get_full_path()
-            
+
             # Try to proxy the request
             return self.proxy_request(request, path)
-            
-        except requests.RequestException:
+
+        except requests.Timeout as e:
+            return HttpResponse(f"Error: {str(e)}", status=504)
+        except requests.ConnectionError:
             # If Streamlit isn't running, start it
             self.start_streamlit()
             return HttpResponse(
@@ -128,4 +225,84 @@ class StreamlitProxyView(TemplateView):
                     </body>
                 </html>
                 """
-            ) 
\ No newline at end of file
+            )
+        except requests.RequestException as e:
+            return HttpResponse(f"Error: {str(e)}", status=502)
+
+
+def websocket_url(scope):
+    """Streamlit URL for the path and query string of a websocket scope"""
+    base = get_settings().streamlit_url.replace('http', 'ws', 1)
+    url = urljoin(base, scope['path'].lstrip('/'))
+    if scope.get('query_string'):
+        url += '?' + scope['query_string'].decode('latin-1')
+    return url
+
+
+async def streamlit_websocket(scope, receive, send):
+    """ASGI app bridging a client websocket to Streamlit (``/_stcore/stream``).
+
+    Django has no websocket support, so ``faucet_project.asgi`` hands websocket
+    scopes here. Frames are relayed as they arrive in both directions until
+    either side closes.
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    headers = {
+        name.decode('latin-1'): value.decode('latin-1')
+        for name, value in scope.get('headers', [])
+        if name in (b'cookie', b'origin', b'user-agent', b'x-forwarded-for')
+    }
+    # Like forwarded_headers(), the dashboard passes it on to the API's IP limit
+    client = (scope.get('client') or ('',))[0]
+    previous = headers.pop('x-forwarded-for', None)
+    headers['X-Forwarded-For'] = f'{previous}, {client}' if previous else client
+    async with aiohttp.ClientSession() as client_session:
+        try:
+            upstream = await client_session.ws_connect(
+                websocket_url(scope),
+                protocols=scope.get('subprotocols') or (),
+                headers=headers,
+                max_msg_size=0,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            # Rejected before the handshake, the client sees a 403
+            await send({'type': 'websocket.close', 'code': 1011})
+            return
+
+        async with upstream:
+            await send({'type': 'websocket.accept', 'subprotocol': upstream.protocol})
+            relays = [
+                asyncio.ensure_future(_client_to_streamlit(receive, upstream)),
+                asyncio.ensure_future(_streamlit_to_client(upstream, send)),
+            ]
+            try:
+                await asyncio.wait(relays, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for relay in relays:
+                    relay.cancel()
+                await asyncio.gather(*relays, return_exceptions=True)
+
+
+async def _client_to_streamlit(receive, upstream):
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            await upstream.close()
+            return
+        if message.get('bytes') is not None:
+            await upstream.send_bytes(message['bytes'])
+        elif message.get('text') is not None:
+            await upstream.send_str(message['text'])
+
+
+async def _streamlit_to_client(upstream, send):
+    async for message in upstream:
+        if message.type == aiohttp.WSMsgType.BINARY:
+            await send({'type': 'websocket.send', 'bytes': message.data})
+        elif message.type == aiohttp.WSMsgType.TEXT:
+            await send({'type': 'websocket.send', 'text': message.data})
+        elif message.type == aiohttp.WSMsgType.ERROR:
+            break
+    await send({'type': 'websocket.close', 'code': upstream.close_code or 1000})
@@ -1,15 +1,92 @@
-from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, connection
+from django.test import (
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
-from unittest.mock import patch, MagicMock
-from web3 import Web3
+from unittest.mock import AsyncMock, patch, MagicMock
+from web3 import EthereumTesterProvider, Web3
 from web3.exceptions import TransactionNotFound
-from faucet.models import Transaction
+from faucet.models import (
+    FAILED_STATUSES,
+    SUCCESS_STATUSES,
+    SenderNonce,
+    Transaction,
+    TransactionRollup,
+)
 from faucet.schemas import TransactionSerializer
+from faucet.node import (
+    STATS_READ_TIMEOUT,
+    NodeClient,
+    PooledHTTPProvider,
+    get_node_client,
+    node_client_stats,
+    reset_node_client,
+)
+from faucet.nonce import NonceManager, is_nonce_error, send_with_nonce
+from faucet.dispatcher import dispatch_batch, dispatch_pending
+from faucet.gas import GasPriceOracle
+from faucet.receipts import reconcile_receipts
+from faucet.rollups import (
+    TIMESERIES_CACHE_CHUNK,
+    rebuild_rollups,
+    transaction_stats,
+    transaction_timeseries,
+)
+from faucet.cache import cached_entry
+from faucet.async_node import AsyncNodeClient, PooledAsyncHTTPProvider
+from faucet.conf import get_settings, load_settings, reload_settings
+from faucet.fake_node import FakeNode, parse_latency
+from faucet.metrics import render_metrics
+from faucet.asset_cache import AssetCache
+from faucet.streamlit_supervisor import StreamlitSupervisor, stop_streamlit
+from faucet.streamlit_view import session as streamlit_session, streamlit_websocket
+from faucet.limiter import (
+    FileBackend,
+    MemoryBackend,
+    RateLimit,
+    RateLimits,
+    RedisBackend,
+    client_ip,
+    parse_rate,
+)
+from eth_account import Account
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
 from decimal import Decimal
+import csv
+import gzip
+import asyncio
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import fakeredis
+import requests
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from prometheus_client import REGISTRY
+
+
+def allow_requests(mock_limits):
+    """Let the patched IP and wallet rate limits through"""
+    mock_limits.return_value.ip.hit.return_value = 0
+    mock_limits.return_value.wallet.hit.return_value = 0
 
 
 @override_settings(
@@ -22,7 +99,7 @@ from decimal import Decimal
 )
 @patch("django.db.models.Model.save", MagicMock())
 @patch("django.db.models.Model.delete", MagicMock())
-@patch("faucet.views.get_usage")
+@patch("faucet.views.get_rate_limits")
 class FaucetAPITests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -39,31 +116,29 @@ class FaucetAPITests(TestCase):
         self.mock_transaction = self.transaction_patcher.start()
         self.mock_transaction.objects = MagicMock()
 
-        # Mock Web3
-        self.web3_patcher = patch("faucet.views.Web3")
-        self.mock_web3 = self.web3_patcher.start()
+        # Mock the shared node client
+        self.node_patcher = patch("faucet.views.get_node_client")
+        self.mock_node = self.node_patcher.start()
         self.mock_eth = MagicMock()
-        self.mock_web3.HTTPProvider.return_value = MagicMock()
-        self.mock_web3.return_value.eth = self.mock_eth
+        self.mock_node.return_value.w3.eth = self.mock_eth
+        self.mock_node.return_value.sender_stats.return_value = []
+        self.mock_node.return_value.gas.fees.return_value = {"gasPrice": 20000000000}
+        cache.clear()
 
     def tearDown(self):
         self.transaction_patcher.stop()
-        self.web3_patcher.stop()
+        self.node_patcher.stop()
 
-    def test_fund_success(self, mock_get_usage):
+    def test_fund_success(self, mock_limits):
         """Test successful ETH funding request"""
         # Mock rate limit check
-        mock_get_usage.return_value = {"should_limit": False}
+        allow_requests(mock_limits)
 
         # Mock Web3 responses
-        self.mock_eth.gas_price = 20000000000
         self.mock_eth.get_transaction_count.return_value = 1
         tx_hash_bytes = Web3.to_bytes(hexstr=self.test_tx_hash)
         self.mock_eth.send_raw_transaction.return_value = tx_hash_bytes
 
-        # Mock no recent transactions
-        self.mock_transaction.objects.filter.return_value.exists.return_value = False
-
         response = self.client.post(
             self.fund_url, {"wallet_address": self.valid_wallet}, format="json"
         )
@@ -74,9 +149,9 @@ class FaucetAPITests(TestCase):
         )  # Compare without '0x'
         self.mock_transaction.objects.create.assert_called_once()
 
-    def test_fund_invalid_wallet(self, mock_get_usage):
+    def test_fund_invalid_wallet(self, mock_limits):
         """Test funding request with invalid wallet address"""
-        mock_get_usage.return_value = {"should_limit": False}
+        allow_requests(mock_limits)
 
         response = self.client.post(
             self.fund_url, {"wallet_address": "invalid_address"}, format="json"
@@ -85,10 +160,10 @@ class FaucetAPITests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.mock_transaction.objects.create.assert_not_called()
 
-    def test_fund_rate_limited(self, mock_get_usage):
+    def test_fund_rate_limited(self, mock_limits):
         """Test rate limiting for repeated requests"""
         # Mock rate limit check
-        mock_get_usage.return_value = {"should_limit": True}
+        mock_limits.return_value.ip.hit.return_value = 42.0
 
         response = self.client.post(
             self.fund_url, {"wallet_address": self.valid_wallet}, format="json"
@@ -98,17 +173,14 @@ class FaucetAPITests(TestCase):
         self.assertIn("error", response.data)
         self.mock_transaction.objects.create.assert_not_called()
 
-    def test_fund_transaction_failure(self, mock_get_usage):
+    def test_fund_transaction_failure(self, mock_limits):
         """Test handling of failed blockchain transaction"""
-        mock_get_usage.return_value = {"should_limit": False}
+        allow_requests(mock_limits)
         # Mock Web3 error
         self.mock_eth.send_raw_transaction.side_effect = TransactionNotFound(
             "Transaction failed"
         )
 
-        # Mock no recent transactions
-        self.mock_transaction.objects.filter.return_value.exists.return_value = False
-
         response = self.client.post(
             self.fund_url, {"wallet_address": self.valid_wallet}, format="json"
         )
@@ -117,12 +189,34 @@ class FaucetAPITests(TestCase):
         self.assertIn("error", response.data)
         # Verify failed transaction was recorded
         self.mock_transaction.objects.create.assert_called_once()
+        # A failed payout does not use up the wallet cooldown
+        mock_limits.return_value.wallet.refund.assert_called_once_with(
+            self.valid_wallet.lower()
+        )
+
+    def test_fund_wallet_rate_limited(self, mock_limits):
+        """Test the wallet cooldown rejects a second payout"""
+        allow_requests(mock_limits)
+        mock_limits.return_value.wallet.hit.return_value = 30.0
 
-    def test_stats_success(self, mock_get_usage):
+        response = self.client.post(
+            self.fund_url, {"wallet_address": self.valid_wallet}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response.data["error"], "Rate limit exceeded for this wallet")
+        self.mock_transaction.objects.create.assert_not_called()
+
+    @patch("faucet.views.transaction_stats")
+    def test_stats_success(self, mock_stats, mock_limits):
         """Test successful stats retrieval"""
         # Mock transaction statistics
-        self.mock_transaction.objects.count.return_value = 100
-        self.mock_transaction.objects.filter.return_value.count.return_value = 50
+        mock_stats.return_value = {
+            "total_transactions": 100,
+            "last_24h_transactions": 50,
+            "successful_transactions": 50,
+            "failed_transactions": 50,
+        }
 
         response = self.client.get(self.stats_url)
 
@@ -132,11 +226,19 @@ class FaucetAPITests(TestCase):
         self.assertEqual(response.data["successful_transactions"], 50)
         self.assertEqual(response.data["failed_transactions"], 50)
 
-    def test_stats_empty(self, mock_get_usage):
+    @patch("faucet.views.transaction_stats")
+    def test_stats_empty(self, mock_stats, mock_limits):
         """Test stats retrieval with no transactions"""
         # Mock empty transaction data
-        self.mock_transaction.objects.count.return_value = 0
-        self.mock_transaction.objects.filter.return_value.count.return_value = 0
+        mock_stats.return_value = dict.fromkeys(
+            [
+                "total_transactions",
+                "last_24h_transactions",
+                "successful_transactions",
+                "failed_transactions",
+            ],
+            0,
+        )
 
         response = self.client.get(self.stats_url)
 
@@ -230,14 +332,14 @@ class TransactionListTests(APITestCase):
         self.assertEqual(response.data[0]["wallet_address"], "0xabc")
 
 
-@patch("faucet.views.get_usage")
+@patch("faucet.views.get_rate_limits")
 class SchemaValidationTests(TestCase):
     def setUp(self):
         self.client = APIClient()
 
-    def test_invalid_wallet_format(self, mock_get_usage):
+    def test_invalid_wallet_format(self, mock_limits):
         """Test wallet address format validation"""
-        mock_get_usage.return_value = {"should_limit": False}
+        allow_requests(mock_limits)
         invalid_wallets = [
             "not-a-wallet",  # Wrong format
             "0xinvalid",  # Too short
@@ -251,9 +353,9 @@ class SchemaValidationTests(TestCase):
             self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
             self.assertIn("wallet_address", response.data)
 
-    def test_transaction_list_invalid_date_format(self, mock_get_usage):
+    def test_transaction_list_invalid_date_format(self, mock_limits):
         """Test date format validation in transaction list"""
-        mock_get_usage.return_value = {"should_limit": False}
+        allow_requests(mock_limits)
         invalid_dates = [
             {"from_date": "invalid-date"},
             {"from_date": "2024-02-17", "to_date": "invalid-date"},
@@ -269,31 +371,33 @@ class SchemaValidationTests(TestCase):
             )
             self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
-    def test_valid_wallet_format(self, mock_get_usage):
+    def test_valid_wallet_format(self, mock_limits):
         """Test valid wallet address format"""
-        mock_get_usage.return_value = {"should_limit": False}
+        allow_requests(mock_limits)
         valid_wallet = "0x" + "a" * 40
         mock_tx_hash = (
             "0x1234567890abcdef1234567890abcdef1234567890abcdef1234567890abcdef"
         )
 
         # Mock necessary dependencies
-        with patch("faucet.views.Web3") as mock_web3:
+        with patch("faucet.views.get_node_client") as mock_node:
             # Mock transaction count and gas price
-            mock_web3.return_value.eth.get_transaction_count.return_value = 1
-            mock_web3.return_value.eth.gas_price = 20000000000
+            mock_node.return_value.w3.eth.get_transaction_count.return_value = 1
+            mock_node.return_value.gas.fees.return_value = {"gasPrice": 20000000000}
 
             # Mock transaction hash
             mock_tx = MagicMock()
             mock_tx.hex.return_value = mock_tx_hash[
                 2:
             ]  # Remove '0x' prefix for the mock
-            mock_web3.return_value.eth.send_raw_transaction.return_value = mock_tx
+            mock_node.return_value.w3.eth.send_raw_transaction.return_value = mock_tx
 
             # Mock account
             mock_account = MagicMock()
             mock_account.sign_transaction.return_value = MagicMock()
-            mock_web3.return_value.eth.account.from_key.return_value = mock_account
+            mock_sender = mock_node.return_value.sender.return_value.__enter__
+            mock_sender.return_value.account = mock_account
+            mock_sender.return_value.address = "0x" + "b" * 40
 
             response = self.client.post(
                 reverse("faucet-fund"), {"wallet_address": valid_wallet}, format="json"
@@ -310,7 +414,7 @@ class TransactionSerializerTests(TestCase):
             "transaction_hash": "0x1234567890abcdef1234567890abcdef1234567890abcdef1234567890abcdef", # noqa
             "wallet_address": "0x742d35Cc6634C0532925a3b844Bc454e4438f44e",
             "amount": Decimal("0.1"),
-            "status": "success",
+            "status": "broadcast",
             "created_at": timezone.now(),
         }
 
@@ -386,3 +490,1778 @@ class TransactionSerializerTests(TestCase):
         data["status"] = "failed"
         serializer = TransactionSerializer(data=data)
         self.assertTrue(serializer.is_valid())
+
+
+class NodeClientTests(TestCase):
+    def setUp(self):
+        reset_node_client()
+        self.addCleanup(reset_node_client)
+
+    @override_settings(
+        ETHEREUM_NODE_URL="http://node.invalid", PRIVATE_KEY="0x" + "11" * 32
+    )
+    def test_client_is_shared(self):
+        """Test the node client and signer are built once per process"""
+        private_key = "0x" + "11" * 32
+
+        with patch("faucet.node.NodeClient", wraps=NodeClient) as mock_client:
+            first = get_node_client()
+            second = get_node_client()
+
+        self.assertIs(first, second)
+        mock_client.assert_called_once()
+        self.assertEqual(
+            [sender.address for sender in first.senders],
+            [Account.from_key(private_key).address],
+        )
+        stats = node_client_stats()
+        self.assertEqual(stats["pool_misses"], 1)
+        self.assertGreaterEqual(stats["pool_hits"], 1)
+
+    def test_provider_uses_shared_session(self):
+        """Test RPC calls go through the pooled session"""
+        session = MagicMock()
+        session.post.return_value.content = b'{"jsonrpc":"2.0","id":0,"result":"0x1"}'
+        provider = PooledHTTPProvider("http://node.invalid", session, timeout=(1, 2))
+
+        response = provider.make_request("eth_chainId", [])
+
+        self.assertEqual(response["result"], "0x1")
+        session.post.assert_called_once()
+        self.assertEqual(session.post.call_args.kwargs["timeout"], (1, 2))
+
+
+class NonceManagerTests(TestCase):
+    def setUp(self):
+        self.w3 = MagicMock()
+        self.w3.eth.get_transaction_count.return_value = 7
+        self.nonces = NonceManager(self.w3, "0x" + "a" * 40)
+
+    def test_allocate_syncs_once(self):
+        """Test nonces are handed out sequentially after a single node sync"""
+        allocated = [self.nonces.allocate() for _ in range(3)]
+
+        self.assertEqual(allocated, [7, 8, 9])
+        self.w3.eth.get_transaction_count.assert_called_once()
+        self.assertEqual(
+            SenderNonce.objects.get(address="0x" + "a" * 40).next_nonce, 10
+        )
+
+    def test_resync(self):
+        """Test resync resets the counter to the node's pending count"""
+        self.nonces.allocate()
+        self.nonces.allocate()
+        self.w3.eth.get_transaction_count.return_value = 20
+
+        self.assertEqual(self.nonces.resync(), 20)
+        self.assertEqual(self.nonces.allocate(), 20)
+
+    def test_send_retries_after_nonce_error(self):
+        """Test a rejected nonce triggers a resync and a single retry"""
+        account = MagicMock()
+        self.w3.eth.send_raw_transaction.side_effect = [
+            ValueError({"code": -32000, "message": "nonce too low"}),
+            b"\x01" * 32,
+        ]
+
+        tx_hash = send_with_nonce(self.w3, account, self.nonces, {"to": "0x0"})
+
+        self.assertEqual(tx_hash, b"\x01" * 32)
+        nonces_used = [
+            c.args[0]["nonce"] for c in account.sign_transaction.call_args_list
+        ]
+        self.assertEqual(nonces_used, [7, 7])
+
+    def test_send_does_not_retry_other_errors(self):
+        """Test unrelated node errors are raised after freeing the nonce"""
+        self.w3.eth.send_raw_transaction.side_effect = ValueError("insufficient funds")
+
+        with self.assertRaises(ValueError):
+            send_with_nonce(self.w3, MagicMock(), self.nonces, {"to": "0x0"})
+        self.assertEqual(self.nonces.allocate(), 7)
+        self.w3.eth.get_transaction_count.assert_called_once()
+
+    def test_failed_send_keeps_nonces_allocated_since(self):
+        """Test a failure does not rewind below a nonce another worker holds"""
+        other_worker = NonceManager(self.w3, "0x" + "a" * 40)
+        held = []
+
+        def broadcast(raw_transaction):
+            # Another worker allocates while this broadcast is in flight
+            held.append(other_worker.allocate())
+            raise ValueError("insufficient funds")
+
+        self.w3.eth.send_raw_transaction.side_effect = broadcast
+        # The node has not seen either nonce yet
+        self.w3.eth.get_transaction_count.return_value = 7
+
+        with self.assertRaises(ValueError):
+            send_with_nonce(self.w3, MagicMock(), self.nonces, {"to": "0x0"})
+
+        self.assertEqual(held, [8])
+        # 7 is a gap now, but 8 is never handed out twice
+        self.assertEqual(self.nonces.allocate(), 9)
+
+
+@override_settings(FAUCET_QUEUE_MODE=True)
+@patch("faucet.views.get_rate_limits")
+class FundQueueTests(APITestCase):
+    def setUp(self):
+        self.valid_wallet = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+        self.tx_hash = Web3.to_bytes(hexstr="0x" + "ab" * 32)
+
+        self.node_patcher = patch("faucet.dispatcher.get_node_client")
+        self.mock_node = self.node_patcher.start().return_value
+        self.addCleanup(self.node_patcher.stop)
+        self.mock_node.w3.eth.send_raw_transaction.return_value = self.tx_hash
+        self.mock_node.gas.fees.return_value = {"gasPrice": 20000000000}
+        self.sender_address = "0x" + "b" * 40
+        self.mock_node.sender.return_value.__enter__.return_value.address = (
+            self.sender_address
+        )
+
+    def test_fund_is_queued(self, mock_limits):
+        """Test queue mode records a pending request and returns 202"""
+        allow_requests(mock_limits)
+
+        with patch("faucet.views.get_node_client") as mock_view_node:
+            response = self.client.post(
+                reverse("faucet-fund"),
+                {"wallet_address": self.valid_wallet},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "pending")
+        mock_view_node.assert_not_called()
+        pending = Transaction.objects.get(pk=response.data["request_id"])
+        self.assertEqual(pending.status, "pending")
+
+    def test_pending_request_blocks_wallet(self, mock_limits):
+        """Test a queued request counts towards the wallet cooldown"""
+        backend = MemoryBackend()
+        mock_limits.return_value = RateLimits(
+            ip=RateLimit(backend, "ip", 100, 60),
+            wallet=RateLimit(backend, "wallet", 1, 60),
+        )
+        url = reverse("faucet-fund")
+
+        self.client.post(url, {"wallet_address": self.valid_wallet}, format="json")
+        response = self.client.post(
+            url, {"wallet_address": self.valid_wallet.lower()}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response.data["error"], "Rate limit exceeded for this wallet")
+
+    def test_dispatch_and_status(self, mock_limits):
+        """Test the dispatcher broadcasts queued requests and status reflects it"""
+        allow_requests(mock_limits)
+        response = self.client.post(
+            reverse("faucet-fund"), {"wallet_address": self.valid_wallet}, format="json"
+        )
+        request_id = response.data["request_id"]
+
+        self.assertEqual(dispatch_pending(), 1)
+        self.assertEqual(dispatch_pending(), 0)
+
+        response = self.client.get(reverse("fund-status", args=[request_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "broadcast")
+        self.assertEqual(response.data["transaction_hash"], self.tx_hash.hex())
+        self.assertEqual(
+            Transaction.objects.get(pk=request_id).sender_address, self.sender_address
+        )
+
+    def test_dispatch_records_failure(self, mock_limits):
+        """Test a broadcast error marks the queued request as failed"""
+        self.mock_node.w3.eth.send_raw_transaction.side_effect = ValueError(
+            "insufficient funds"
+        )
+        pending = Transaction.objects.create(
+            wallet_address=self.valid_wallet,
+            transaction_hash="",
+            amount=Decimal("0.0001"),
+            status="pending",
+        )
+
+        with patch("faucet.dispatcher.refund_wallets") as mock_refund:
+            dispatch_pending()
+
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, "failed")
+        self.assertIn("insufficient funds", pending.error_message)
+        mock_refund.assert_called_once_with([self.valid_wallet])
+
+    def test_dispatch_claims_before_broadcast(self, mock_limits):
+        """Test the claim is committed and no transaction is open during the RPC"""
+        pending = Transaction.objects.create(
+            wallet_address=self.valid_wallet,
+            transaction_hash="",
+            amount=Decimal("0.0001"),
+            status="pending",
+        )
+        # The transactions TestCase wraps every test in
+        test_depth = len(connection.atomic_blocks)
+        seen = []
+
+        def send(node, wallet_address):
+            seen.append(
+                (
+                    Transaction.objects.get(pk=pending.pk).status,
+                    len(connection.atomic_blocks) - test_depth,
+                )
+            )
+            return self.tx_hash, self.sender_address
+
+        with patch("faucet.dispatcher.send_funds", side_effect=send):
+            dispatch_pending()
+
+        self.assertEqual(seen, [("sending", 0)])
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, "broadcast")
+
+    def test_status_not_found(self, mock_limits):
+        """Test unknown request ids return 404"""
+        response = self.client.get(reverse("fund-status", args=[999]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SenderPoolTests(TestCase):
+    def setUp(self):
+        self.keys = ["0x" + f"{i:02x}" * 32 for i in range(1, 4)]
+        self.client = NodeClient("http://node.invalid", self.keys)
+        self.addCleanup(self.client.close)
+
+    def test_round_robin(self):
+        """Test senders are used in turn"""
+        used = []
+        for _ in range(6):
+            with self.client.sender() as sender:
+                used.append(sender.address)
+
+        addresses = [Account.from_key(key).address for key in self.keys]
+        self.assertEqual(used, addresses * 2)
+
+    def test_least_pending(self):
+        """Test the least busy sender is picked while others are broadcasting"""
+        client = NodeClient("http://node.invalid", self.keys, strategy="least_pending")
+        with client.sender() as first, client.sender() as second:
+            with client.sender() as third:
+                self.assertEqual(len({first.address, second.address, third.address}), 3)
+            with client.sender() as fourth:
+                self.assertEqual(fourth.address, third.address)
+
+    def test_invalid_strategy(self):
+        """Test unknown strategies are rejected"""
+        with self.assertRaises(ValueError):
+            NodeClient("http://node.invalid", self.keys, strategy="random")
+
+    def test_sender_stats(self):
+        """Test per-sender balance and unconfirmed transaction counts"""
+        first = self.client.senders[0]
+        SenderNonce.objects.create(address=first.address, next_nonce=12)
+
+        with patch.object(
+            self.client, "batch_call", return_value=[hex(10**18), hex(9)] * 3
+        ) as mock_batch:
+            stats = self.client.sender_stats()
+
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(stats[0]["address"], first.address)
+        self.assertEqual(stats[0]["balance"], "1")
+        self.assertEqual(stats[0]["in_flight"], 3)
+        self.assertEqual(stats[1]["in_flight"], 0)
+        # Every account in one round trip, with the short stats timeout
+        mock_batch.assert_called_once()
+        self.assertEqual(len(mock_batch.call_args.args[0]), 6)
+        self.assertEqual(mock_batch.call_args.kwargs["timeout"][1], STATS_READ_TIMEOUT)
+
+    def test_sender_stats_node_down(self):
+        """Test an unreachable node is reported per sender instead of raised"""
+        with patch.object(
+            self.client, "batch_call", side_effect=requests.Timeout("read timed out")
+        ):
+            stats = self.client.sender_stats()
+
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(
+            {(entry["balance"], entry["error"]) for entry in stats},
+            {(None, "read timed out")},
+        )
+
+
+class GasPriceOracleTests(TestCase):
+    def setUp(self):
+        self.w3 = MagicMock()
+        self.w3.eth.gas_price = 20000000000
+
+    def test_cached_within_ttl(self):
+        """Test fees are served from the cache until the TTL expires"""
+        oracle = GasPriceOracle(self.w3, ttl=60)
+        oracle.refresh()
+
+        self.assertEqual(oracle.fees(), {"gasPrice": 20000000000})
+        self.assertEqual(oracle.fees(), {"gasPrice": 20000000000})
+        self.assertEqual(oracle.stats()["hits"], 2)
+        self.assertEqual(oracle.stats()["hit_rate"], 1.0)
+
+    def test_stale_value_is_fetched_live(self):
+        """Test a stale cache falls back to a live fetch"""
+        oracle = GasPriceOracle(self.w3, ttl=0)
+        oracle.refresh()
+        self.w3.eth.gas_price = 30000000000
+
+        with patch("faucet.gas.time.monotonic", return_value=time.monotonic() + 1):
+            self.assertEqual(oracle.fees(), {"gasPrice": 30000000000})
+        self.assertEqual(oracle.stats()["misses"], 1)
+
+    def test_eip1559_fees(self):
+        """Test EIP-1559 fees are derived from fee_history"""
+        self.w3.eth.fee_history.return_value = {
+            "baseFeePerGas": [10, 12, 14],
+            "reward": [[1], [3], [2]],
+        }
+        oracle = GasPriceOracle(self.w3, mode="eip1559")
+
+        self.assertEqual(
+            oracle.fees(),
+            {"type": 2, "maxFeePerGas": 30, "maxPriorityFeePerGas": 2},
+        )
+
+    def test_background_refresh(self):
+        """Test the refresher thread keeps the cache warm"""
+        oracle = GasPriceOracle(self.w3, ttl=1)
+        oracle.start()
+        self.addCleanup(oracle.stop)
+
+        for _ in range(50):
+            if oracle.age() is not None:
+                break
+            time.sleep(0.01)
+        self.assertEqual(oracle.fees(), {"gasPrice": 20000000000})
+        self.assertEqual(oracle.stats()["misses"], 0)
+
+
+# Minimal disperseEther(address[],uint256[]) stand-in: forwards values[i] to
+# recipients[i] and reverts if any transfer fails
+DISPERSE_BYTECODE = (
+    "0x605c80600b6000396000f360043560040180356000526020016020526024356024016040"
+    "525b60005160605114605557600060006000600060605160051b604051013560605160051b"
+    "60205101355af115605757606051600101606052601a565b005b600080fd"
+)
+
+
+class BatchPayoutTests(TestCase):
+    def setUp(self):
+        tester = Web3(EthereumTesterProvider())
+        deploy_hash = tester.eth.send_transaction(
+            {"from": tester.eth.accounts[0], "data": DISPERSE_BYTECODE}
+        )
+        self.contract = tester.eth.get_transaction_receipt(deploy_hash).contractAddress
+
+        # Build the node client offline, then point it at the local EVM
+        funding_key = "0x" + "42" * 32
+        self.node = NodeClient("http://node.invalid", [funding_key])
+        self.addCleanup(self.node.close)
+        self.node.w3 = self.node.gas.w3 = tester
+        for sender in self.node.senders:
+            sender.nonces.w3 = tester
+        tester.eth.send_transaction(
+            {
+                "from": tester.eth.accounts[0],
+                "to": self.node.senders[0].address,
+                "value": tester.to_wei(10, "ether"),
+            }
+        )
+        self.tester = tester
+
+        chain_settings = override_settings(
+            CHAIN_ID=tester.eth.chain_id, FAUCET_AMOUNT="0.0001"
+        )
+        chain_settings.enable()
+        self.addCleanup(chain_settings.disable)
+        node_patcher = patch(
+            "faucet.dispatcher.get_node_client", return_value=self.node
+        )
+        node_patcher.start()
+        self.addCleanup(node_patcher.stop)
+
+    def queue(self, count):
+        wallets = [Web3.to_checksum_address(f"0x{i + 1:040x}") for i in range(count)]
+        for wallet in wallets:
+            Transaction.objects.create(
+                wallet_address=wallet,
+                transaction_hash="",
+                amount=Decimal("0.0001"),
+                status="pending",
+            )
+        return wallets
+
+    def test_batch_pays_every_recipient(self):
+        """Test queued requests are paid by a single multisend transaction"""
+        wallets = self.queue(3)
+
+        self.assertEqual(
+            dispatch_batch(max_size=10, window=0, contract_address=self.contract), 3
+        )
+
+        rows = list(Transaction.objects.all())
+        self.assertEqual({row.status for row in rows}, {"broadcast"})
+        self.assertEqual(len({row.transaction_hash for row in rows}), 1)
+        self.assertEqual(rows[0].sender_address, self.node.senders[0].address)
+        receipt = self.tester.eth.get_transaction_receipt(rows[0].transaction_hash)
+        self.assertEqual(receipt.status, 1)
+        for wallet in wallets:
+            self.assertEqual(
+                self.tester.eth.get_balance(wallet),
+                self.tester.to_wei("0.0001", "ether"),
+            )
+
+    def test_batch_waits_for_window(self):
+        """Test a partial batch is held back until the window expires"""
+        self.queue(2)
+
+        self.assertEqual(
+            dispatch_batch(max_size=10, window=60, contract_address=self.contract), 0
+        )
+        self.assertEqual(Transaction.objects.filter(status="pending").count(), 2)
+
+        # A full batch goes out straight away
+        self.assertEqual(
+            dispatch_batch(max_size=2, window=60, contract_address=self.contract), 2
+        )
+
+    def test_batch_failure_marks_rows(self):
+        """Test a rejected batch marks every covered request as failed"""
+        wallets = self.queue(2)
+
+        with patch.object(
+            self.tester.eth, "send_raw_transaction", side_effect=ValueError("boom")
+        ), patch("faucet.dispatcher.refund_wallets") as mock_refund:
+            dispatch_batch(max_size=10, window=0, contract_address=self.contract)
+
+        rows = Transaction.objects.all()
+        self.assertEqual({row.status for row in rows}, {"failed"})
+        self.assertEqual({row.error_message for row in rows}, {"boom"})
+        mock_refund.assert_called_once_with(wallets)
+
+    def test_batch_claims_before_broadcast(self):
+        """Test a batch is marked sending and committed before it is broadcast"""
+        self.queue(2)
+        test_depth = len(connection.atomic_blocks)
+        seen = []
+
+        def send(node, wallets, contract_address):
+            statuses = set(Transaction.objects.values_list("status", flat=True))
+            seen.append((statuses, len(connection.atomic_blocks) - test_depth))
+            return b"\x12" * 32, node.senders[0].address
+
+        with patch("faucet.dispatcher.send_batch", side_effect=send):
+            dispatch_batch(max_size=10, window=0, contract_address=self.contract)
+
+        self.assertEqual(seen, [({"sending"}, 0)])
+        self.assertEqual(
+            set(Transaction.objects.values_list("status", flat=True)), {"broadcast"}
+        )
+
+
+class ReceiptTrackerTests(TestCase):
+    def setUp(self):
+        self.node = NodeClient("http://node.invalid", ["0x" + "42" * 32])
+        self.addCleanup(self.node.close)
+        node_patcher = patch("faucet.receipts.get_node_client", return_value=self.node)
+        node_patcher.start()
+        self.addCleanup(node_patcher.stop)
+
+        self.receipts = {}
+        self.known = set()
+        # Hashes the node answers with an error reply
+        self.failing = set()
+        self.node.session.post = MagicMock(side_effect=self.rpc)
+
+    def rpc(self, url, json, timeout):
+        """Answer a JSON-RPC batch from the fake chain state"""
+        replies = []
+        for call in json:
+            tx_hash = call["params"][0]
+            if tx_hash in self.failing:
+                error = {"code": -32000, "message": "header not found"}
+                replies.append({"jsonrpc": "2.0", "id": call["id"], "error": error})
+                continue
+            if call["method"] == "eth_getTransactionReceipt":
+                result = self.receipts.get(tx_hash)
+            else:
+                result = {"hash": tx_hash} if tx_hash in self.known else None
+            replies.append({"jsonrpc": "2.0", "id": call["id"], "result": result})
+        response = MagicMock()
+        response.json.return_value = replies
+        return response
+
+    def broadcast(self, tx_hash, age=0):
+        row = Transaction.objects.create(
+            wallet_address="0x" + "a" * 40,
+            transaction_hash=tx_hash,
+            amount=Decimal("0.0001"),
+            status="broadcast",
+        )
+        Transaction.objects.filter(pk=row.pk).update(
+            created_at=timezone.now() - timedelta(seconds=age)
+        )
+        return row
+
+    def test_reconcile(self):
+        """Test open transactions move to confirmed, failed or dropped"""
+        confirmed = self.broadcast("0x01")
+        batch_row = self.broadcast("0x01")
+        reverted = self.broadcast("0x02")
+        dropped = self.broadcast("0x03", age=3600)
+        waiting = self.broadcast("0x04", age=3600)
+        recent = self.broadcast("0x05")
+        self.receipts["0x01"] = {
+            "status": "0x1",
+            "blockNumber": "0x10",
+            "gasUsed": "0x5208",
+        }
+        self.receipts["0x02"] = {
+            "status": "0x0",
+            "blockNumber": "0x11",
+            "gasUsed": "0x6000",
+        }
+        self.known.add("0x04")
+
+        with patch("faucet.receipts.refund_wallets") as mock_refund:
+            self.assertEqual(reconcile_receipts(drop_after=600), 4)
+
+        for row in (confirmed, batch_row, reverted, dropped, waiting, recent):
+            row.refresh_from_db()
+        self.assertEqual(confirmed.status, "confirmed")
+        self.assertEqual(confirmed.block_number, 16)
+        self.assertEqual(confirmed.gas_used, 21000)
+        self.assertEqual(batch_row.status, "confirmed")
+        self.assertEqual(reverted.status, "failed")
+        self.assertEqual(dropped.status, "dropped")
+        self.assertEqual(waiting.status, "broadcast")
+        self.assertEqual(recent.status, "broadcast")
+        # The reverted and the dropped payout, not the confirmed ones
+        self.assertEqual(
+            [call.args[0] for call in mock_refund.call_args_list],
+            [["0x" + "a" * 40], ["0x" + "a" * 40]],
+        )
+
+    def test_failed_lookup_counts_as_no_receipt(self):
+        """Test one error reply neither fails the poll nor drops the transaction"""
+        confirmed = self.broadcast("0x01")
+        unknown = self.broadcast("0x02", age=3600)
+        self.receipts["0x01"] = {
+            "status": "0x1",
+            "blockNumber": "0x10",
+            "gasUsed": "0x0",
+        }
+        self.failing.add("0x02")
+
+        with patch("faucet.receipts.refund_wallets") as mock_refund:
+            self.assertEqual(reconcile_receipts(drop_after=600), 1)
+
+        confirmed.refresh_from_db()
+        unknown.refresh_from_db()
+        self.assertEqual(confirmed.status, "confirmed")
+        self.assertEqual(unknown.status, "broadcast")
+        mock_refund.assert_not_called()
+
+    @patch("faucet.management.commands.reconcile_receipts.time.sleep")
+    @patch("faucet.management.commands.reconcile_receipts.reconcile_receipts")
+    def test_tracker_survives_failed_polls(self, mock_reconcile, mock_sleep):
+        """Test the long-running tracker logs a failed poll and keeps polling"""
+
+        class Stop(BaseException):
+            pass
+
+        mock_reconcile.side_effect = [requests.Timeout("read timed out"), 2, Stop]
+
+        with self.assertLogs("faucet.management.commands.reconcile_receipts"):
+            with self.assertRaises(Stop):
+                call_command("reconcile_receipts", stdout=io.StringIO())
+
+        self.assertEqual(mock_reconcile.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_single_batched_request_per_poll(self):
+        """Test receipts for all open rows are fetched in one JSON-RPC batch"""
+        for i in range(5):
+            self.broadcast(f"0x{i:02x}")
+
+        reconcile_receipts()
+
+        self.node.session.post.assert_called_once()
+        self.assertEqual(len(self.node.session.post.call_args.kwargs["json"]), 5)
+
+    def test_nothing_open(self):
+        """Test a poll with no open transactions makes no RPC calls"""
+        self.assertEqual(reconcile_receipts(), 0)
+        self.node.session.post.assert_not_called()
+
+
+class TransactionIndexTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for i in range(50):
+            Transaction.objects.create(
+                wallet_address=f"0x{i:040x}",
+                transaction_hash=f"0x{i:064x}",
+                amount=Decimal("0.0001"),
+                status="broadcast" if i % 2 else "failed",
+            )
+        Transaction.objects.update(created_at=now)
+        self.since = now - timedelta(minutes=1)
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, msg=plan)
+
+    def test_case_insensitive_wallet_listing(self):
+        """Test listing by wallet uses the lower(wallet) index in any case"""
+        queryset = Transaction.objects.for_wallet(f"0X{3:040X}").order_by(
+            "-created_at", "-id"
+        )
+
+        self.assertUsesIndex(queryset, "faucet_tx_wallet_keyset_idx")
+        self.assertEqual(queryset.count(), 1)
+
+    def test_date_range_listing(self):
+        """Test date range listings use the created_at index"""
+        queryset = Transaction.objects.filter(
+            created_at__gte=self.since, created_at__lte=timezone.now()
+        ).order_by("-created_at", "-id")
+        self.assertUsesIndex(queryset, "faucet_tx_created_id_idx")
+
+
+class TransactionPaginationTests(APITestCase):
+    def setUp(self):
+        self.url = reverse("transaction-list")
+        now = timezone.now()
+        for i in range(7):
+            Transaction.objects.create(
+                wallet_address="0x" + "a" * 40,
+                transaction_hash=f"0x{i:064x}",
+                amount=Decimal("0.0001"),
+                status="broadcast",
+            )
+        # Several rows share a timestamp so the id tie-breaker matters
+        for row in Transaction.objects.all():
+            Transaction.objects.filter(pk=row.pk).update(
+                created_at=now - timedelta(seconds=row.pk // 3)
+            )
+
+    def test_pages_cover_all_rows_once(self):
+        """Test following cursors returns every row once, newest first"""
+        seen = []
+        params = {"limit": 3}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data), 3)
+            seen.extend(row["transaction_hash"] for row in response.data)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            self.assertIn(f"cursor={cursor}", response.headers["Link"])
+            params["cursor"] = cursor
+
+        expected = list(
+            Transaction.objects.order_by("-created_at", "-id").values_list(
+                "transaction_hash", flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+    def test_last_page_has_no_cursor(self):
+        """Test no next cursor is returned when everything fits on one page"""
+        response = self.client.get(self.url, {"limit": 7})
+
+        self.assertEqual(len(response.data), 7)
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+    def test_invalid_pagination_params(self):
+        """Test bad limits, cursors and field names are rejected"""
+        for params in (
+            {"limit": 0},
+            {"limit": 100000},
+            {"cursor": "not-a-cursor"},
+            {"fields": "transaction_hash,private_key"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_field_projection(self):
+        """Test fields= limits both the response and the loaded columns"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.url, {"fields": "transaction_hash,status", "limit": 2}
+            )
+
+        self.assertEqual(set(response.data[0]), {"transaction_hash", "status"})
+        select = queries.captured_queries[-1]["sql"]
+        self.assertNotIn("wallet_address", select)
+        self.assertNotIn("error_message", select)
+
+
+class TransactionExportTests(APITestCase):
+    def setUp(self):
+        self.url = reverse("transaction-export")
+        now = timezone.now()
+        for i, wallet in enumerate(["0x" + "a" * 40, "0x" + "b" * 40, "0x" + "a" * 40]):
+            row = Transaction.objects.create(
+                wallet_address=wallet,
+                transaction_hash=f"0x{i:064x}",
+                amount=Decimal("0.0001"),
+                status="confirmed",
+                block_number=100 + i,
+                gas_used=21000,
+            )
+            Transaction.objects.filter(pk=row.pk).update(
+                created_at=now - timedelta(hours=i)
+            )
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export(self):
+        """Test the default export streams one JSON object per line"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+        lines = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0]["transaction_hash"], f"0x{0:064x}")
+        self.assertEqual(lines[0]["amount"], "0.000100000")
+        self.assertEqual(lines[2]["block_number"], 102)
+
+    def test_csv_export_with_filters(self):
+        """Test CSV export applies the listing filters"""
+        response = self.client.get(
+            self.url,
+            {
+                "format": "csv",
+                "wallet": "0x" + "A" * 40,
+                "from_date": (timezone.now() - timedelta(minutes=90)).isoformat(),
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        rows = list(csv.reader(io.StringIO(self.read(response))))
+        self.assertEqual(rows[0], TransactionSerializer.Meta.fields)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][0], f"0x{0:064x}")
+
+    def test_invalid_export_params(self):
+        """Test invalid dates are rejected before streaming starts"""
+        response = self.client.get(self.url, {"from_date": "invalid-date"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("from_date", json.loads(response.content))
+
+
+class RollupStatsTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def create(self, status, age):
+        row = Transaction.objects.create(
+            wallet_address="0xabc", transaction_hash="", amount=0.1, status=status
+        )
+        Transaction.objects.filter(pk=row.pk).update(created_at=self.now - age)
+        return row
+
+    def direct_stats(self):
+        last_24h = Transaction.objects.filter(
+            created_at__gte=self.now - timedelta(hours=24)
+        )
+        return {
+            "total_transactions": Transaction.objects.count(),
+            "last_24h_transactions": last_24h.count(),
+            "successful_transactions": last_24h.filter(
+                status__in=SUCCESS_STATUSES
+            ).count(),
+            "failed_transactions": last_24h.filter(status__in=FAILED_STATUSES).count(),
+        }
+
+    def test_matches_direct_counts_across_window_edges(self):
+        for age in [
+            timedelta(0),
+            timedelta(minutes=3),
+            timedelta(hours=5, minutes=17),
+            timedelta(hours=23, minutes=59, seconds=59),
+            timedelta(hours=24, seconds=1),
+            timedelta(days=3),
+        ]:
+            self.create("broadcast", age)
+            self.create("failed", age)
+
+        self.assertEqual(transaction_stats(self.now), self.direct_stats())
+
+    def test_follows_saves_updates_and_deletes(self):
+        row = self.create("pending", timedelta(minutes=1))
+        old = self.create("broadcast", timedelta(hours=30))
+
+        row.status = "broadcast"
+        row.save(update_fields=["status"])
+        Transaction.objects.filter(pk=row.pk).update(status="confirmed")
+        Transaction.objects.filter(pk=old.pk).update(created_at=self.now)
+        self.create("dropped", timedelta(hours=2)).delete()
+        self.assertEqual(transaction_stats(self.now), self.direct_stats())
+        self.assertEqual(transaction_stats(self.now)["successful_transactions"], 2)
+
+    def test_rebuild_matches_incremental_rows(self):
+        self.create("broadcast", timedelta(hours=1))
+        self.create("failed", timedelta(days=2))
+        expected = set(
+            TransactionRollup.objects.values_list(
+                "resolution", "bucket", "status", "count"
+            ).filter(count__gt=0)
+        )
+
+        rebuild_rollups()
+
+        self.assertEqual(
+            set(
+                TransactionRollup.objects.values_list(
+                    "resolution", "bucket", "status", "count"
+                )
+            ),
+            expected,
+        )
+
+    def test_stats_reads_rollups_not_transactions(self):
+        for _ in range(20):
+            self.create("broadcast", timedelta(hours=2))
+        with CaptureQueriesContext(connection) as queries:
+            transaction_stats(self.now)
+        self.assertEqual(len(queries), 2)
+
+
+class RollupAtomicityTests(TransactionTestCase):
+    def test_failed_rollup_rolls_back_the_row(self):
+        row = Transaction(
+            wallet_address="0xabc", transaction_hash="", amount=0.1, status="pending"
+        )
+        with patch(
+            "faucet.rollups.apply_rollup_deltas", side_effect=DatabaseError("down")
+        ):
+            with self.assertRaises(DatabaseError):
+                row.save()
+
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(TransactionRollup.objects.exists())
+
+
+class TimeseriesTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = datetime(2024, 3, 1, 12, 30, tzinfo=dt_timezone.utc)
+        self.url = reverse("stats-timeseries")
+
+    def create(self, status, created_at, amount="0.1"):
+        row = Transaction.objects.create(
+            wallet_address="0xabc", transaction_hash="", amount=amount, status=status
+        )
+        Transaction.objects.filter(pk=row.pk).update(created_at=created_at)
+
+    def series(self, interval="hour", hours=3):
+        return transaction_timeseries(
+            interval, self.now - timedelta(hours=hours), self.now, now=self.now
+        )
+
+    def test_buckets_are_aggregated_and_zero_filled(self):
+        self.create("confirmed", self.now - timedelta(hours=2, minutes=10))
+        self.create("failed", self.now - timedelta(hours=2, minutes=50))
+        self.create("broadcast", self.now - timedelta(minutes=5), amount="0.25")
+
+        series = self.series()
+
+        self.assertEqual(
+            [(row["bucket"].hour, row["total"], row["success_rate"]) for row in series],
+            [(9, 1, 0.0), (10, 1, 1.0), (11, 0, None), (12, 1, 1.0)],
+        )
+        self.assertEqual(series[-1]["eth_dispensed"], Decimal("0.25"))
+        self.assertEqual(series[0]["failed"], 1)
+
+    def test_settled_buckets_are_cached(self):
+        self.create("confirmed", self.now - timedelta(hours=2))
+        self.create("confirmed", self.now - timedelta(minutes=1))
+        self.series()
+        # Neither change shows up in the cached buckets, only in the recent one
+        self.create("confirmed", self.now - timedelta(hours=2))
+        self.create("confirmed", self.now - timedelta(minutes=2))
+
+        with CaptureQueriesContext(connection) as queries:
+            series = self.series()
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([row["total"] for row in series], [0, 1, 0, 2])
+
+    def test_long_window_uses_few_cache_entries(self):
+        with patch.object(cache, "set_many", wraps=cache.set_many) as mock_set:
+            series = transaction_timeseries(
+                "minute", self.now - timedelta(minutes=2000), self.now, now=self.now
+            )
+
+        self.assertEqual(len(series), 2000)
+        entries = mock_set.call_args.args[0]
+        self.assertLessEqual(len(entries), 2000 // TIMESERIES_CACHE_CHUNK + 2)
+
+    def test_one_query_per_run_of_missing_buckets(self):
+        self.series(hours=5)
+        # Buckets on both sides of the cached ones, then the recent one
+        with CaptureQueriesContext(connection) as queries:
+            series = transaction_timeseries(
+                "hour",
+                self.now - timedelta(hours=8),
+                self.now + timedelta(hours=2),
+                now=self.now + timedelta(hours=2),
+            )
+
+        self.assertEqual(len(series), 11)
+        self.assertEqual(len(queries), 3)
+
+    def test_endpoint_validates_and_serializes(self):
+        self.create("confirmed", timezone.now())
+
+        response = self.client.get(self.url, {"interval": "minute"})
+        invalid = self.client.get(self.url, {"interval": "week"})
+        too_long = self.client.get(
+            self.url, {"interval": "minute", "from_date": "2020-01-01T00:00:00Z"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 60 minutes, plus the one from_date is rounded down into
+        self.assertIn(len(response.data["buckets"]), (60, 61))
+        self.assertEqual(sum(row["total"] for row in response.data["buckets"]), 1)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(too_long.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@patch("faucet.views.get_node_client")
+@patch("faucet.views.transaction_stats")
+class StatsCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("faucet-stats")
+
+    def stats(self, total):
+        return {
+            "total_transactions": total,
+            "last_24h_transactions": total,
+            "successful_transactions": total,
+            "failed_transactions": 0,
+        }
+
+    def test_stats_are_cached_for_the_ttl(self, mock_stats, mock_node):
+        mock_stats.return_value = self.stats(3)
+        mock_node.return_value.sender_stats.return_value = []
+
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+
+        self.assertEqual(mock_stats.call_count, 1)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertIn("Last-Modified", first)
+
+    def test_conditional_requests_get_304(self, mock_stats, mock_node):
+        mock_stats.return_value = self.stats(3)
+        mock_node.return_value.sender_stats.return_value = []
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    @override_settings(FAUCET_STATS_CACHE_TTL=0)
+    def test_changed_stats_get_new_etag(self, mock_stats, mock_node):
+        mock_node.return_value.sender_stats.return_value = []
+        mock_stats.return_value = self.stats(3)
+        etag = self.client.get(self.url)["ETag"]
+        mock_stats.return_value = self.stats(4)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["total_transactions"], 4)
+
+    def test_expired_entry_is_served_while_another_worker_refreshes(
+        self, mock_stats, mock_node
+    ):
+        compute = MagicMock(return_value=self.stats(3))
+        stale = cached_entry("stats-test", compute, ttl=60)
+        cache.set("stats-test", {**stale, "expires": 0})
+        cache.add("stats-test:lock", 1)
+
+        entry = cached_entry("stats-test", compute, ttl=60)
+
+        self.assertEqual(compute.call_count, 1)
+        self.assertEqual(entry["etag"], stale["etag"])
+
+
+class RateLimiterTests(TestCase):
+    def backends(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        return [
+            MemoryBackend(),
+            FileBackend(os.path.join(tmpdir.name, "ratelimit.sqlite3")),
+            RedisBackend(fakeredis.FakeRedis()),
+        ]
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("1/m"), (1, 60))
+        self.assertEqual(parse_rate("10/h"), (10, 3600))
+        with self.assertRaises(ValueError):
+            parse_rate("fast")
+        with self.assertRaises(ValueError):
+            parse_rate("0/m")
+
+    def test_sliding_window(self):
+        for backend in self.backends():
+            with self.subTest(backend=type(backend).__name__):
+                limit = RateLimit(backend, "ip", 2, 60)
+                self.assertEqual(limit.hit("1.2.3.4", now=1000), 0)
+                self.assertEqual(limit.hit("1.2.3.4", now=1001), 0)
+                # Burst used up, the next slot opens one emission interval later
+                self.assertAlmostEqual(limit.hit("1.2.3.4", now=1002), 28)
+                self.assertEqual(limit.hit("5.6.7.8", now=1002), 0)
+                self.assertEqual(limit.hit("1.2.3.4", now=1030), 0)
+                self.assertGreater(limit.hit("1.2.3.4", now=1031), 0)
+
+    def test_refund_gives_back_a_hit(self):
+        for backend in self.backends():
+            with self.subTest(backend=type(backend).__name__):
+                limit = RateLimit(backend, "wallet", 1, 60)
+                self.assertEqual(limit.hit("0xabc", now=1000), 0)
+                self.assertGreater(limit.hit("0xabc", now=1001), 0)
+                limit.refund("0xabc")
+                self.assertEqual(limit.hit("0xabc", now=1001), 0)
+
+    def test_client_ip_trusts_only_configured_proxies(self):
+        def ip(remote_addr, forwarded=None):
+            headers = {"HTTP_X_FORWARDED_FOR": forwarded} if forwarded else {}
+            request = RequestFactory().post("/", REMOTE_ADDR=remote_addr, **headers)
+            return client_ip(request)
+
+        # Dashboard visitors each get their own address, not the dashboard's
+        self.assertEqual(ip("127.0.0.1", "203.0.113.7"), "203.0.113.7")
+        self.assertEqual(ip("127.0.0.1", "203.0.113.7, 127.0.0.1"), "203.0.113.7")
+        self.assertEqual(ip("127.0.0.1"), "127.0.0.1")
+        # Entries the client wrote itself are skipped or ignored
+        self.assertEqual(ip("127.0.0.1", "1.1.1.1, 203.0.113.7"), "203.0.113.7")
+        self.assertEqual(ip("198.51.100.1", "203.0.113.7"), "198.51.100.1")
+        with override_settings(FAUCET_TRUSTED_PROXIES="10.0.0.2"):
+            self.assertEqual(ip("10.0.0.2", "203.0.113.7"), "203.0.113.7")
+            self.assertEqual(ip("127.0.0.1", "203.0.113.7"), "127.0.0.1")
+
+    def test_file_backend_is_shared_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "ratelimit.sqlite3")
+            first = RateLimit(FileBackend(path), "wallet", 1, 60)
+            second = RateLimit(FileBackend(path), "wallet", 1, 60)
+
+            self.assertEqual(first.hit("0xabc", now=1000), 0)
+            self.assertGreater(second.hit("0xabc", now=1010), 0)
+
+
+class FaucetSettingsTests(TestCase):
+    def test_amount_is_converted_once(self):
+        settings = get_settings()
+        self.assertEqual(settings.amount, Decimal("0.0001"))
+        self.assertEqual(settings.amount_wei, Web3.to_wei(Decimal("0.0001"), "ether"))
+        self.assertEqual(settings.chain_id, 1)
+
+    def test_repr_hides_private_keys(self):
+        settings = get_settings()
+        self.assertTrue(settings.private_keys)
+        for key in settings.private_keys:
+            self.assertNotIn(key, repr(settings))
+            self.assertNotIn(key.removeprefix("0x"), repr(settings))
+
+    def test_override_reloads_snapshot(self):
+        with override_settings(FAUCET_AMOUNT="0.5", FAUCET_QUEUE_MODE="yes"):
+            self.assertEqual(get_settings().amount_wei, 5 * 10**17)
+            self.assertTrue(get_settings().queue_mode)
+        self.assertEqual(get_settings().amount, Decimal("0.0001"))
+
+    def test_misconfiguration_fails_to_load(self):
+        invalid = [
+            {"FAUCET_AMOUNT": "0"},
+            {"FAUCET_AMOUNT": "0.0000000001"},
+            {"CHAIN_ID": "sepolia"},
+            {"PRIVATE_KEY": "0x1234"},
+            {"FAUCET_GAS_MODE": "cheap"},
+            {"FAUCET_IP_RATE": "often"},
+            {"FAUCET_IP_RATE": "0/m"},
+            {"FAUCET_IP_RATE": "-1/m"},
+            {
+                "FAUCET_QUEUE_MODE": True,
+                "FAUCET_BATCH_MODE": True,
+                "FAUCET_BATCH_CONTRACT": "",
+            },
+            {
+                "FAUCET_QUEUE_MODE": False,
+                "FAUCET_BATCH_MODE": True,
+                "FAUCET_BATCH_CONTRACT": "0x" + "ab" * 20,
+            },
+            {"FAUCET_STREAMLIT_MODE": "forked"},
+        ]
+        for overrides in invalid:
+            with self.subTest(**overrides):
+                # Without a snapshot in place the override does not trigger a reload
+                with patch("faucet.conf._settings", None):
+                    with override_settings(**overrides):
+                        with self.assertRaises(ImproperlyConfigured):
+                            load_settings()
+
+    def test_reload_rereads_env_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env_file = os.path.join(tmpdir, ".env")
+            with open(env_file, "w") as f:
+                f.write("FAUCET_GAS_PRICE_TTL=30\n")
+            with patch("faucet.conf.ENV_FILE", env_file):
+                self.addCleanup(reload_settings)
+                self.assertEqual(reload_settings().gas_price_ttl, 30)
+
+                with open(env_file, "w") as f:
+                    f.write("FAUCET_GAS_PRICE_TTL=45\n")
+                self.assertEqual(reload_settings().gas_price_ttl, 45)
+
+    @patch("faucet.conf._env_config")
+    @patch("faucet.views.get_rate_limits")
+    @patch("faucet.views.send_funds")
+    def test_fund_request_reads_no_config(self, mock_send, mock_limits, mock_config):
+        allow_requests(mock_limits)
+        mock_send.return_value = (b"\x12" * 32, "0x" + "b" * 40)
+
+        response = self.client.post(
+            reverse("faucet-fund"),
+            {"wallet_address": "0x" + "a" * 40},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_config.assert_not_called()
+        self.assertEqual(Transaction.objects.get().amount, Decimal("0.0001"))
+
+
+@patch("faucet.async_views.get_rate_limits")
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.wallet = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+        self.tx_hash = Web3.to_bytes(hexstr="0x" + "ab" * 32)
+
+    @patch("faucet.async_views.get_async_node_client")
+    async def test_fund(self, mock_client, mock_limits):
+        allow_requests(mock_limits)
+        mock_client.return_value.send_funds = AsyncMock(
+            return_value=(self.tx_hash, "0x" + "b" * 40)
+        )
+
+        response = await self.async_client.post(
+            reverse("async-fund"),
+            {"wallet_address": self.wallet},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["transaction_hash"], self.tx_hash.hex())
+        row = await Transaction.objects.aget()
+        self.assertEqual(row.status, "broadcast")
+        self.assertEqual(row.amount, Decimal("0.0001"))
+
+    @patch("faucet.async_views.get_async_node_client")
+    async def test_fund_failure_refunds_wallet(self, mock_client, mock_limits):
+        allow_requests(mock_limits)
+        mock_client.return_value.send_funds = AsyncMock(
+            side_effect=ValueError("insufficient funds")
+        )
+
+        response = await self.async_client.post(
+            reverse("async-fund"),
+            {"wallet_address": self.wallet},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual((await Transaction.objects.aget()).status, "failed")
+        mock_limits.return_value.wallet.refund.assert_called_once_with(
+            self.wallet.lower()
+        )
+
+    async def test_fund_rejects_invalid_wallet(self, mock_limits):
+        allow_requests(mock_limits)
+
+        response = await self.async_client.post(
+            reverse("async-fund"),
+            {"wallet_address": "0xinvalid"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("wallet_address", response.json())
+
+    async def test_transactions_match_sync_view(self, mock_limits):
+        for i in range(3):
+            await Transaction.objects.acreate(
+                wallet_address=self.wallet,
+                transaction_hash=f"0x{i:064x}",
+                amount=Decimal("0.0001"),
+                status="broadcast",
+            )
+
+        response = await self.async_client.get(
+            reverse("async-transaction-list"), {"limit": 2}
+        )
+        sync_response = await self.async_client.get(
+            reverse("transaction-list"), {"limit": 2}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertEqual(response["X-Next-Cursor"], sync_response["X-Next-Cursor"])
+
+
+class AsyncNodeClientTests(TestCase):
+    def make_client(self):
+        node = MagicMock(node_url="http://node.invalid", timeout=(3.05, 10))
+        node.gas.fees.return_value = {"gasPrice": 1}
+        sender = node.sender.return_value.__enter__.return_value
+        sender.address = "0x" + "b" * 40
+        sender.nonces.allocate.side_effect = [5, 6]
+        sender.account.sign_transaction.return_value.rawTransaction = b"raw"
+        return AsyncNodeClient(node), sender
+
+    async def test_nonce_error_is_retried_once(self):
+        client, sender = self.make_client()
+        client.w3.eth.send_raw_transaction = AsyncMock(
+            side_effect=[ValueError("nonce too low"), b"hash"]
+        )
+
+        tx_hash, address = await client.send_funds("0x" + "a" * 40)
+
+        self.assertEqual((tx_hash, address), (b"hash", sender.address))
+        sender.nonces.resync.assert_called_once()
+        signed = [c.args[0] for c in sender.account.sign_transaction.call_args_list]
+        self.assertEqual([tx["nonce"] for tx in signed], [5, 6])
+        self.assertEqual(signed[0]["value"], get_settings().amount_wei)
+
+    async def test_provider_reuses_one_session(self):
+        async def rpc(request):
+            body = await request.json()
+            return web.json_response(
+                {"jsonrpc": "2.0", "id": body["id"], "result": "0x1"}
+            )
+
+        app = web.Application()
+        app.router.add_post("/", rpc)
+        async with TestServer(app) as server:
+            provider = PooledAsyncHTTPProvider(str(server.make_url("/")), pool_size=5)
+            first = await provider.make_request("eth_chainId", [])
+            session = provider.session
+            second = await provider.make_request("eth_chainId", [])
+            self.assertIs(provider.session, session)
+            self.assertEqual(session.connector.limit, 5)
+            await provider.close()
+
+        self.assertEqual(first["result"], "0x1")
+        self.assertEqual(second["result"], "0x1")
+
+
+class FakeNodeTests(APITestCase):
+    def setUp(self):
+        self.now = [0.0]
+        self.account = Account.from_key("0x" + "11" * 32)
+
+    def make_node(self, **kwargs):
+        return FakeNode(chain_id=1, block_time=12, clock=lambda: self.now[0], **kwargs)
+
+    def sign(self, nonce):
+        return self.account.sign_transaction(
+            {
+                "to": "0x" + "22" * 20,
+                "value": 1,
+                "gas": 21000,
+                "gasPrice": 10**9,
+                "nonce": nonce,
+                "chainId": 1,
+            }
+        ).rawTransaction.hex()
+
+    def rpc(self, node, method, *params):
+        return asyncio.run(node.call({"id": 1, "method": method, "params": params}))
+
+    def test_fund_view_against_fake_node(self):
+        node = self.make_node()
+        url = node.start()
+        self.addCleanup(node.stop)
+
+        with override_settings(
+            ETHEREUM_NODE_URL=url, PRIVATE_KEY=self.account.key.hex()
+        ):
+            response = self.client.post(
+                reverse("faucet-fund"), {"wallet_address": "0x" + "22" * 20}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(node.nonces[self.account.address.lower()], 1)
+
+            self.now[0] = 12
+            self.assertEqual(reconcile_receipts(), 1)
+
+        transaction = Transaction.objects.get()
+        self.assertEqual(transaction.status, "confirmed")
+        self.assertEqual(transaction.block_number, 2)
+        self.assertEqual(transaction.gas_used, 21000)
+
+    def test_nonces_must_arrive_in_order(self):
+        node = self.make_node()
+
+        ok = self.rpc(node, "eth_sendRawTransaction", self.sign(0))
+        gap = self.rpc(node, "eth_sendRawTransaction", self.sign(5))
+        count = self.rpc(
+            node, "eth_getTransactionCount", self.account.address, "pending"
+        )
+
+        self.assertTrue(ok["result"].startswith("0x"))
+        self.assertTrue(is_nonce_error(Exception(gap["error"]["message"])))
+        self.assertEqual(count["result"], "0x1")
+
+    def test_injected_failures_are_seeded(self):
+        def run(seed):
+            node = self.make_node(error_rate=0.5, seed=seed)
+            return ["error" in self.rpc(node, "eth_gasPrice") for _ in range(20)]
+
+        self.assertEqual(run(7), run(7))
+        self.assertTrue(any(run(7)) and not all(run(7)))
+
+    def test_nonce_conflict_advances_chain_nonce(self):
+        node = self.make_node(nonce_conflict_rate=1.0)
+
+        response = self.rpc(node, "eth_sendRawTransaction", self.sign(0))
+
+        self.assertIn("nonce too low", response["error"]["message"])
+        self.assertEqual(node.nonces[self.account.address.lower()], 1)
+
+    def test_parse_latency(self):
+        self.assertEqual(parse_latency("250")(None), 0.25)
+        sample = parse_latency("uniform:10,20")
+        self.assertTrue(0.01 <= sample(random.Random(1)) <= 0.02)
+        for spec in ("slow:5", "uniform:10", "fixed:abc"):
+            with self.assertRaises(ValueError):
+                parse_latency(spec)
+
+
+@patch("faucet.views.get_rate_limits")
+class FundMetricsTests(APITestCase):
+    wallet = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def fund(self):
+        return self.client.post(
+            reverse("faucet-fund"), {"wallet_address": self.wallet}, format="json"
+        )
+
+    @patch("faucet.views.send_funds", return_value=(b"\x12", "0x" + "b" * 40))
+    def test_success_records_stages_and_queries(self, mock_send, mock_limits):
+        allow_requests(mock_limits)
+        success = self.sample(
+            "faucet_fund_requests_total", outcome="success", reason=""
+        )
+        inserts = self.sample("faucet_fund_stage_seconds_count", stage="insert")
+        queries = self.sample("faucet_fund_db_queries_sum")
+
+        self.assertEqual(self.fund().status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            self.sample("faucet_fund_requests_total", outcome="success", reason=""),
+            success + 1,
+        )
+        self.assertEqual(
+            self.sample("faucet_fund_stage_seconds_count", stage="insert"), inserts + 1
+        )
+        self.assertGreaterEqual(self.sample("faucet_fund_db_queries_sum"), queries + 1)
+
+    @patch("faucet.views.send_funds", side_effect=ConnectionError("node down"))
+    def test_failure_is_counted_by_error_class(self, mock_send, mock_limits):
+        allow_requests(mock_limits)
+        labels = {"outcome": "failed", "reason": "ConnectionError"}
+        before = self.sample("faucet_fund_requests_total", **labels)
+
+        self.assertEqual(self.fund().status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(
+            self.sample("faucet_fund_requests_total", **labels), before + 1
+        )
+
+    def test_rate_limited_and_metrics_endpoint(self, mock_limits):
+        mock_limits.return_value.ip.hit.return_value = 30
+        labels = {"outcome": "rate_limited", "reason": "ip"}
+        before = self.sample("faucet_fund_requests_total", **labels)
+
+        self.assertEqual(self.fund().status_code, 429)
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(
+            self.sample("faucet_fund_requests_total", **labels), before + 1
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            b'faucet_fund_requests_total{outcome="rate_limited",reason="ip"}',
+            response.content,
+        )
+
+    def test_multiprocess_directory_is_aggregated(self, mock_limits):
+        with tempfile.TemporaryDirectory() as directory:
+            # Two "workers" write their samples to the shared directory
+            for _ in range(2):
+                subprocess.run(
+                    [
+                        sys.executable,
+                        "-c",
+                        "from prometheus_client import Counter; "
+                        "Counter('faucet_fund_requests', '', ['outcome', 'reason'])"
+                        ".labels('success', '').inc()",
+                    ],
+                    env={**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory},
+                    check=True,
+                )
+            with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}):
+                output = render_metrics()
+
+        self.assertIn(
+            b'faucet_fund_requests_total{outcome="success",reason=""} 2.0', output
+        )
+
+
+class StreamlitProxyTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        async def echo(request):
+            body = await request.read()
+            return web.json_response(
+                {
+                    "method": request.method,
+                    "path": request.path_qs,
+                    "header": request.headers.get("X-Test"),
+                    "forwarded_for": request.headers.get("X-Forwarded-For"),
+                    "length": len(body),
+                },
+                headers={"X-Streamlit": "yes"},
+            )
+
+        async def asset(request):
+            cls.asset_fetches.append(request.headers.get("Accept-Encoding"))
+            return web.Response(
+                body=cls.asset_body, content_type="application/javascript"
+            )
+
+        cls.asset_body = b"console.log('faucet');\n" * 1000
+        cls.asset_fetches = []
+        app = web.Application()
+        app.router.add_get("/static/js/{name}", asset)
+        app.router.add_route("*", "/{tail:.*}", echo)
+        cls.loop = asyncio.new_event_loop()
+        threading.Thread(target=cls.loop.run_forever, daemon=True).start()
+        cls.runner = web.AppRunner(app, access_log=None)
+        asyncio.run_coroutine_threadsafe(cls.runner.setup(), cls.loop).result()
+        site = web.TCPSite(cls.runner, "127.0.0.1", 0)
+        asyncio.run_coroutine_threadsafe(site.start(), cls.loop).result()
+        cls.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        asyncio.run_coroutine_threadsafe(cls.runner.cleanup(), cls.loop).result()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        super().tearDownClass()
+
+    def test_forwards_method_body_and_headers(self):
+        with override_settings(FAUCET_STREAMLIT_URL=self.url):
+            response = self.client.put(
+                "/_stcore/upload_file/abc?x=1",
+                b"x" * 200000,
+                content_type="application/octet-stream",
+                headers={"X-Test": "1"},
+            )
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["X-Streamlit"], "yes")
+        self.assertEqual(
+            json.loads(b"".join(response.streaming_content)),
+            {
+                "method": "PUT",
+                "path": "/_stcore/upload_file/abc?x=1",
+                "header": "1",
+                "forwarded_for": "127.0.0.1",
+                "length": 200000,
+            },
+        )
+
+    def test_reuses_pooled_connection(self):
+        with override_settings(FAUCET_STREAMLIT_URL=self.url):
+            for _ in range(3):
+                response = self.client.get("/healthz")
+                b"".join(response.streaming_content)
+                response.close()
+
+        pool = streamlit_session.get_adapter(self.url).poolmanager.connection_from_url(
+            self.url
+        )
+        self.assertEqual(pool.num_connections, 1)
+        self.assertGreaterEqual(pool.num_requests, 3)
+
+    def test_static_assets_are_cached_compressed(self):
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0
+
+        hits = sample("faucet_streamlit_asset_cache_requests_total", result="hit")
+        served = sample(
+            "faucet_streamlit_asset_cache_served_bytes_total", encoding="gzip"
+        )
+        path = "/static/js/main.abc123.js"
+        with override_settings(FAUCET_STREAMLIT_URL=self.url):
+            first = self.client.get(path, headers={"Accept-Encoding": "gzip"})
+            second = self.client.get(path, headers={"Accept-Encoding": "gzip"})
+            plain = self.client.get(path)
+            not_modified = self.client.get(
+                path,
+                headers={"Accept-Encoding": "gzip", "If-None-Match": first["ETag"]},
+            )
+
+        self.assertEqual(self.asset_fetches, ["identity"])
+        self.assertEqual(second["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(second.content), self.asset_body)
+        self.assertIn("immutable", second["Cache-Control"])
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(plain.content, self.asset_body)
+        self.assertNotEqual(plain["ETag"], first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(
+            sample("faucet_streamlit_asset_cache_requests_total", result="hit"),
+            hits + 3,
+        )
+        self.assertEqual(
+            sample("faucet_streamlit_asset_cache_served_bytes_total", encoding="gzip"),
+            served + 2 * len(second.content),
+        )
+
+    def test_asset_cache_evicts_least_recently_used(self):
+        body = os.urandom(1000)
+        cache = AssetCache(max_bytes=4000)
+        for path in ("a", "b", "c", "d"):
+            cache.put(path, "image/png", body)
+        cache.get("a")
+        cache.put("e", "image/png", body)
+        cache.put("large", "image/png", os.urandom(1001))
+
+        self.assertEqual(list(cache.entries), ["c", "d", "a", "e"])
+        self.assertEqual(cache.size, 4000)
+        # Random bytes do not compress, only the identity body is kept
+        self.assertEqual(list(cache.get("a").bodies), ["identity"])
+
+    @patch("faucet.streamlit_view.get_supervisor")
+    def test_loading_page_when_streamlit_is_down(self, mock_supervisor):
+        down = "http://127.0.0.1:9/"
+        with override_settings(
+            FAUCET_STREAMLIT_URL=down, FAUCET_STREAMLIT_MODE="separate"
+        ):
+            response = self.client.get("/")
+        mock_supervisor.assert_not_called()
+        with override_settings(
+            FAUCET_STREAMLIT_URL=down, FAUCET_STREAMLIT_MODE="embedded"
+        ):
+            self.client.get("/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Starting Streamlit application", response.content)
+        mock_supervisor.return_value.ensure_started.assert_called_once_with()
+
+    def test_websocket_bridge_relays_frames(self):
+        async def bridge():
+            async def handler(request):
+                ws = web.WebSocketResponse(protocols=["streamlit"])
+                await ws.prepare(request)
+                async for message in ws:
+                    if message.type == web.WSMsgType.BINARY:
+                        await ws.send_bytes(message.data[::-1])
+                    else:
+                        forwarded = request.headers["X-Forwarded-For"]
+                        await ws.send_str(
+                            f"{request.query['session']}{forwarded}:{message.data}"
+                        )
+                return ws
+
+            app = web.Application()
+            app.router.add_get("/_stcore/stream", handler)
+            incoming = asyncio.Queue()
+            sent = []
+            async with TestServer(app) as server:
+                for message in (
+                    {"type": "websocket.connect"},
+                    {"type": "websocket.receive", "bytes": b"abc"},
+                    {"type": "websocket.receive", "text": "hello"},
+                ):
+                    incoming.put_nowait(message)
+
+                async def send(message):
+                    sent.append(message)
+                    if len(sent) == 3:
+                        incoming.put_nowait({"type": "websocket.disconnect"})
+
+                scope = {
+                    "type": "websocket",
+                    "path": "/_stcore/stream",
+                    "query_string": b"session=s1:",
+                    "headers": [],
+                    "client": ("203.0.113.7", 50000),
+                    "subprotocols": ["streamlit"],
+                }
+                with override_settings(FAUCET_STREAMLIT_URL=str(server.make_url("/"))):
+                    await asyncio.wait_for(
+                        streamlit_websocket(scope, incoming.get, send), 5
+                    )
+            return sent
+
+        sent = asyncio.run(bridge())
+
+        self.assertEqual(
+            sent[:3],
+            [
+                {"type": "websocket.accept", "subprotocol": "streamlit"},
+                {"type": "websocket.send", "bytes": b"cba"},
+                {"type": "websocket.send", "text": "s1:203.0.113.7:hello"},
+            ],
+        )
+
+
+class StreamlitSupervisorTests(TestCase):
+    def setUp(self):
+        self.now = [0.0]
+        self.healthy = [False]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.lock_path = os.path.join(directory.name, "streamlit.lock")
+
+    def make_supervisor(self, command=("sleep", "30")):
+        supervisor = StreamlitSupervisor(
+            list(command),
+            "http://127.0.0.1:9/_stcore/health",
+            self.lock_path,
+            startup_timeout=30,
+            clock=lambda: self.now[0],
+        )
+        supervisor.probe = lambda: self.healthy[0]
+        self.addCleanup(supervisor.stop)
+        return supervisor
+
+    def start_and_hand_over(self):
+        supervisor = self.make_supervisor()
+        supervisor.check()
+        process = supervisor.process
+        self.addCleanup(process.kill)
+        # The pid file is only trusted once the command shows up in /proc
+        while supervisor.recorded_process() is None:
+            time.sleep(0.01)
+        self.healthy[0] = True
+        supervisor.hand_over()
+        return process
+
+    def test_starts_once_and_waits_for_readiness(self):
+        supervisor = self.make_supervisor()
+        supervisor.check()
+        process = supervisor.process
+        self.now[0] = 10
+        supervisor.check()
+
+        self.assertIs(supervisor.process, process)
+        self.assertIsNone(process.poll())
+        self.healthy[0] = True
+        supervisor.check()
+        self.assertTrue(supervisor.ready)
+        supervisor.stop()
+        self.assertIsNotNone(process.poll())
+
+    def test_restarts_crashed_process_with_backoff(self):
+        supervisor = self.make_supervisor(command=("false",))
+        starts = []
+        for second in range(8):
+            self.now[0] = second
+            supervisor.check()
+            if supervisor.started_at == second:
+                starts.append(second)
+            if supervisor.process is not None:
+                supervisor.process.wait()
+
+        # Waits 1, 2 then 4 seconds after each failed start
+        self.assertEqual(starts, [0, 1, 3, 7])
+
+    def test_adopts_running_streamlit(self):
+        self.healthy[0] = True
+        supervisor = self.make_supervisor()
+        supervisor.check()
+
+        self.assertTrue(supervisor.ready)
+        self.assertIsNone(supervisor.process)
+
+    def test_one_supervisor_per_host(self):
+        first = self.make_supervisor()
+        second = self.make_supervisor()
+
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        first.stop()
+        self.assertTrue(second.acquire())
+
+    def test_hand_over_leaves_healthy_streamlit_running(self):
+        process = self.start_and_hand_over()
+
+        self.assertIsNone(process.poll())
+        second = self.make_supervisor()
+        self.assertTrue(second.acquire())
+        second.check()
+        self.assertTrue(second.ready)
+
+    def test_hand_over_stops_unhealthy_streamlit(self):
+        supervisor = self.make_supervisor()
+        supervisor.check()
+        process = supervisor.process
+        supervisor.hand_over()
+
+        process.wait(5)
+        self.assertFalse(os.path.exists(supervisor.pid_path))
+
+    def test_restarts_handed_over_streamlit_that_stops_answering(self):
+        process = self.start_and_hand_over()
+
+        self.healthy[0] = False
+        second = self.make_supervisor()
+        self.now[0] = 100
+        second.check()
+        self.assertEqual(second.process.pid, process.pid)
+        self.now[0] = 131
+        second.check()
+        self.assertIsNotNone(process.poll())
+        self.assertNotEqual(second.process.pid, process.pid)
+
+    def test_stop_streamlit_stops_handed_over_process(self):
+        process = self.start_and_hand_over()
+
+        with patch("faucet.streamlit_supervisor._supervisor", self.make_supervisor()):
+            stop_streamlit()
+        process.wait(5)
+        self.assertFalse(os.path.exists(self.lock_path + ".pid"))
@@ -1,9 +1,26 @@
 from django.urls import path
-from .views import FaucetFundView, FaucetStatsView
-from . import views
+from .views import (
+    FaucetFundView,
+    FaucetStatsView,
+    FundStatusView,
+    NodeClientStatsView,
+)
+from . import async_views, views
 
 urlpatterns = [
     path("fund", FaucetFundView.as_view(), name="faucet-fund"),
+    path("fund/<int:request_id>", FundStatusView.as_view(), name="fund-status"),
     path("stats", FaucetStatsView.as_view(), name="faucet-stats"),
+    path("stats/node", NodeClientStatsView.as_view(), name="node-client-stats"),
+    path("stats/timeseries", views.stats_timeseries, name="stats-timeseries"),
     path("transactions", views.transaction_list, name="transaction-list"),
+    path("transactions/export", views.transaction_export, name="transaction-export"),
+    # Async twins for ASGI deployments (faucet_project.asgi)
+    path("async/fund", async_views.fund, name="async-fund"),
+    path("async/stats", async_views.stats, name="async-stats"),
+    path(
+        "async/transactions",
+        async_views.transaction_list,
+        name="async-transaction-list",
+    ),
 ]
@@ -1,18 +1,28 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.utils import timezone
-from datetime import timedelta
-from web3 import Web3
-from decouple import config
-from django_ratelimit.core import get_usage
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from .models import Transaction
+from .conf import get_settings
+from .limiter import client_ip, get_rate_limits
+from .node import get_node_client, node_client_stats
+from .rollups import transaction_stats, transaction_timeseries
+from .cache import cached_entry
+from .dispatcher import send_funds
+from .metrics import record_outcome, render_metrics, stage, track_fund_request
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
 from django.utils.dateparse import parse_datetime
-from rest_framework.decorators import api_view, permission_classes
+from django.http import HttpResponse, StreamingHttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+from .renderers import CSVRenderer, NDJSONRenderer
 from .schemas import (
+    TimeseriesParamsSerializer,
+    TransactionExportParamsSerializer,
     TransactionQueryParamsSerializer,
     WalletRequestSerializer,
     TransactionSerializer,
@@ -39,83 +49,134 @@ class FaucetFundView(APIView):
 
     @extend_schema(
         request=WalletRequestSerializer,
-        responses={200: dict, 400: dict, 429: dict},
-        description="Request Sepolia ETH to be sent to your wallet",
+        responses={200: dict, 202: dict, 400: dict, 429: dict},
+        description=(
+            "Request Sepolia ETH to be sent to your wallet. In queue mode the "
+            "request is accepted with 202 and broadcast by the dispatcher."
+        ),
     )
     def post(self, request):
-        # Check rate limit
-        usage = get_usage(request, group="faucet", key="ip", rate="1/m")
-        if usage and usage.get("should_limit", False):
+        with track_fund_request():
+            return self.fund(request)
+
+    def fund(self, request):
+        settings = get_settings()
+
+        # Check rate limit, shared by all workers through the limiter backend
+        limits = get_rate_limits()
+        ip_address = client_ip(request)
+        with stage("ip_limit"):
+            limited = limits.ip.hit(ip_address)
+        if limited:
+            record_outcome("rate_limited", "ip")
             return self.get_ratelimit_exception_response(request)
 
-        serializer = WalletRequestSerializer(data=request.data)
-        if not serializer.is_valid():
+        with stage("validate"):
+            serializer = WalletRequestSerializer(data=request.data)
+            valid = serializer.is_valid()
+        if not valid:
+            record_outcome("invalid")
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         wallet_address = serializer.validated_data["wallet_address"]
 
-        # Check if the wallet has received funds in the last minute
-        one_minute_ago = timezone.now() - timedelta(
-            minutes=int(config("FAUCET_INTERVAL_MIN"))
-        )
-        if Transaction.objects.filter(
-            wallet_address=wallet_address,
-            created_at__gte=one_minute_ago,
-            status="success",
-        ).exists():
+        # One payout per wallet every FAUCET_INTERVAL_MIN minutes
+        wallet_key = wallet_address.lower()
+        with stage("wallet_limit"):
+            limited = limits.wallet.hit(wallet_key)
+        if limited:
+            record_outcome("rate_limited", "wallet")
             return Response(
                 {"error": "Rate limit exceeded for this wallet"},
                 status=status.HTTP_429_TOO_MANY_REQUESTS,
             )
 
-        # Initialize Web3
-        w3 = Web3(Web3.HTTPProvider(config("ETHEREUM_NODE_URL")))
-
-        # Get the sender's account
-        account = w3.eth.account.from_key(config("PRIVATE_KEY"))
+        # In queue mode the dispatcher broadcasts, the request only records intent
+        if settings.queue_mode:
+            with stage("insert"):
+                pending = Transaction.objects.create(
+                    wallet_address=wallet_address,
+                    transaction_hash="",
+                    amount=settings.amount,
+                    status="pending",
+                    ip_address=ip_address,
+                )
+            record_outcome("queued")
+            return Response(
+                {"request_id": pending.pk, "status": "pending"},
+                status=status.HTTP_202_ACCEPTED,
+            )
 
         try:
-            # Prepare transaction
-            transaction = {
-                "nonce": w3.eth.get_transaction_count(account.address),
-                "to": wallet_address,
-                "value": w3.to_wei(config("FAUCET_AMOUNT"), "ether"),
-                "gas": 21000,
-                "gasPrice": w3.eth.gas_price,
-                "chainId": int(config("CHAIN_ID")),
-            }
-
-            # Sign and send transaction
-            signed_txn = account.sign_transaction(transaction)
-            tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            # Sign and send using the process-wide node client
+            tx_hash, sender_address = send_funds(get_node_client(), wallet_address)
 
             # Save transaction to database
-            Transaction.objects.create(
-                wallet_address=wallet_address,
-                transaction_hash=tx_hash.hex(),
-                amount=config("FAUCET_AMOUNT"),
-                status="success",
-                ip_address=request.META.get("REMOTE_ADDR"),
-            )
+            with stage("insert"):
+                Transaction.objects.create(
+                    wallet_address=wallet_address,
+                    transaction_hash=tx_hash.hex(),
+                    sender_address=sender_address,
+                    amount=settings.amount,
+                    status="broadcast",
+                    ip_address=ip_address,
+                )
 
+            record_outcome("success")
             return Response(
                 {"transaction_hash": tx_hash.hex()}, status=status.HTTP_200_OK
             )
 
         except Exception as e:
+            record_outcome("failed", type(e).__name__)
+            # Nothing was paid, so the wallet may retry straight away
+            limits.wallet.refund(wallet_key)
+
             # Save failed transaction
-            Transaction.objects.create(
-                wallet_address=wallet_address,
-                transaction_hash="",
-                amount=config("FAUCET_AMOUNT"),
-                status="failed",
-                error_message=str(e),
-                ip_address=request.META.get("REMOTE_ADDR"),
-            )
+            with stage("insert"):
+                Transaction.objects.create(
+                    wallet_address=wallet_address,
+                    transaction_hash="",
+                    amount=settings.amount,
+                    status="failed",
+                    error_message=str(e),
+                    ip_address=ip_address,
+                )
 
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class FundStatusView(APIView):
+    permission_classes = [AllowAnyPermission]
+    authentication_classes = []
+
+    @extend_schema(
+        responses={200: dict, 404: dict},
+        description="Get the status of a fund request",
+    )
+    def get(self, request, request_id):
+        fund_request = Transaction.objects.filter(pk=request_id).first()
+        if fund_request is None:
+            return Response(
+                {"error": "Fund request not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(
+            {
+                "request_id": fund_request.pk,
+                "wallet_address": fund_request.wallet_address,
+                "status": fund_request.status,
+                "transaction_hash": fund_request.transaction_hash,
+                "error": fund_request.error_message,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+# Shared by all workers through Django's cache framework
+STATS_CACHE_KEY = "faucet:stats"
+
+
 class FaucetStatsView(APIView):
     permission_classes = [AllowAnyPermission]
     authentication_classes = []
@@ -124,23 +185,104 @@ class FaucetStatsView(APIView):
         responses={200: dict}, description="Get statistics about faucet usage"
     )
     def get(self, request):
-        # Get stats for the last 24 hours
-        last_24h = timezone.now() - timedelta(hours=24)
-
-        stats = {
-            "total_transactions": Transaction.objects.count(),
-            "last_24h_transactions": Transaction.objects.filter(
-                created_at__gte=last_24h
-            ).count(),
-            "successful_transactions": Transaction.objects.filter(
-                created_at__gte=last_24h, status="success"
-            ).count(),
-            "failed_transactions": Transaction.objects.filter(
-                created_at__gte=last_24h, status="failed"
-            ).count(),
+        entry, headers, not_modified = cached_stats(request)
+        if not_modified is not None:
+            return not_modified
+        return Response(entry["data"], status=status.HTTP_200_OK, headers=headers)
+
+    @staticmethod
+    def compute_stats():
+        return {
+            # Counts for all time and the last 24 hours, read from the rollup table
+            **transaction_stats(),
+            # Balance and unconfirmed transactions of every funding account
+            "senders": get_node_client().sender_stats(),
         }
 
-        return Response(stats, status=status.HTTP_200_OK)
+
+def cached_stats(request):
+    """Return the cached stats entry, its caching headers and a 304 if the client is current"""
+    ttl = get_settings().stats_cache_ttl
+    entry = cached_entry(STATS_CACHE_KEY, FaucetStatsView.compute_stats, ttl)
+    headers = {
+        "ETag": entry["etag"],
+        "Last-Modified": http_date(entry["last_modified"]),
+        "Cache-Control": f"max-age={ttl}",
+    }
+
+    # Pollers that send If-None-Match / If-Modified-Since get an empty 304
+    not_modified = get_conditional_response(
+        request, etag=entry["etag"], last_modified=entry["last_modified"]
+    )
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+    return entry, headers, not_modified
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name="interval",
+            description="Bucket size: minute, hour (default) or day",
+            required=False,
+            type=str,
+            enum=["minute", "hour", "day"],
+        ),
+        OpenApiParameter(
+            name="from_date",
+            description="Start of the window (ISO format), rounded down to its bucket. "
+            "Defaults to 1 hour, 24 hours or 30 days before to_date",
+            required=False,
+            type=OpenApiTypes.DATETIME,
+        ),
+        OpenApiParameter(
+            name="to_date",
+            description="End of the window (ISO format), defaults to now",
+            required=False,
+            type=OpenApiTypes.DATETIME,
+        ),
+    ],
+    responses={200: dict, 400: dict},
+)
+@api_view(["GET"])
+@permission_classes([AllowAnyPermission])
+def stats_timeseries(request):
+    """
+    Transactions, success rate and ETH dispensed per minute, hour or day.
+
+    Buckets are aggregated by the database, so the response grows with the number
+    of buckets rather than transactions. Empty buckets are included with zeros.
+    """
+    params_serializer = TimeseriesParamsSerializer(data=request.query_params)
+    if not params_serializer.is_valid():
+        return Response(params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    params = params_serializer.validated_data
+    buckets = transaction_timeseries(
+        params["interval"], params["from_date"], params["to_date"]
+    )
+    return Response(
+        {
+            "interval": params["interval"],
+            "from_date": params["from_date"],
+            "to_date": params["to_date"],
+            "buckets": buckets,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+class NodeClientStatsView(APIView):
+    permission_classes = [AllowAnyPermission]
+    authentication_classes = []
+
+    @extend_schema(
+        responses={200: dict},
+        description="Get connection pool counters of the Ethereum node client",
+    )
+    def get(self, request):
+        return Response(node_client_stats(), status=status.HTTP_200_OK)
 
 
 @extend_schema(
@@ -165,6 +307,24 @@ class FaucetStatsView(APIView):
             type=OpenApiTypes.DATETIME,
             location=OpenApiParameter.QUERY,
         ),
+        OpenApiParameter(
+            name="limit",
+            description=f"Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})",
+            required=False,
+            type=int,
+        ),
+        OpenApiParameter(
+            name="cursor",
+            description="Cursor of the next page, taken from the X-Next-Cursor header",
+            required=False,
+            type=str,
+        ),
+        OpenApiParameter(
+            name="fields",
+            description="Comma separated list of fields to return",
+            required=False,
+            type=str,
+        ),
     ],
     responses={200: list, 400: dict},
 )
@@ -172,14 +332,17 @@ class FaucetStatsView(APIView):
 @permission_classes([AllowAnyPermission])
 def transaction_list(request):
     """
-    List all transactions with optional filtering by date range and wallet address.
+    List transactions with optional filtering by date range and wallet address.
+
+    Results are paginated with a keyset cursor: when more rows exist the cursor of
+    the next page is returned in the X-Next-Cursor header and a Link header.
     """
     queryset = Transaction.objects.all()
 
     # Filter by wallet address
     wallet = request.query_params.get("wallet", None)
     if wallet:
-        queryset = queryset.filter(wallet_address__iexact=wallet)
+        queryset = queryset.for_wallet(wallet)
 
     # Filter by date range
     from_date = request.query_params.get("from_date", None)
@@ -225,9 +388,6 @@ def transaction_list(request):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-    # Always order by created_at descending (newest first)
-    queryset = queryset.order_by("-created_at")
-
     # Validate query parameters
     query_params_serializer = TransactionQueryParamsSerializer(
         data=request.query_params
@@ -236,6 +396,98 @@ def transaction_list(request):
         return Response(
             query_params_serializer.errors, status=status.HTTP_400_BAD_REQUEST
         )
+    params = query_params_serializer.validated_data
+
+    # Only load the requested columns (plus the keyset columns)
+    fields = params.get("fields")
+    if fields:
+        queryset = queryset.only("id", "created_at", *fields)
+
+    # Always order by created_at descending (newest first), one page at a time
+    transactions, next_cursor = keyset_page(
+        queryset, cursor=params.get("cursor"), limit=params["limit"]
+    )
+
+    serializer = TransactionSerializer(transactions, many=True, fields=fields)
+    response = Response(serializer.data)
+    if next_cursor:
+        next_params = request.query_params.copy()
+        next_params["cursor"] = next_cursor
+        next_url = request.build_absolute_uri(
+            f"{request.path}?{next_params.urlencode()}"
+        )
+        response["X-Next-Cursor"] = next_cursor
+        response["Link"] = f'<{next_url}>; rel="next"'
+    return response
+
+
+# Rows fetched per round trip while streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name="format",
+            description="Export format: ndjson (default) or csv",
+            required=False,
+            type=str,
+            enum=["ndjson", "csv"],
+        ),
+        OpenApiParameter(
+            name="wallet",
+            description="Filter by wallet address",
+            required=False,
+            type=str,
+        ),
+        OpenApiParameter(
+            name="from_date",
+            description="Filter transactions after this date (ISO format)",
+            required=False,
+            type=OpenApiTypes.DATETIME,
+        ),
+        OpenApiParameter(
+            name="to_date",
+            description="Filter transactions before this date (ISO format)",
+            required=False,
+            type=OpenApiTypes.DATETIME,
+        ),
+    ],
+    responses={200: OpenApiTypes.BINARY, 400: dict},
+)
+@api_view(["GET"])
+@permission_classes([AllowAnyPermission])
+@renderer_classes([NDJSONRenderer, CSVRenderer])
+def transaction_export(request):
+    """
+    Stream the full transaction history as NDJSON or CSV.
+
+    Rows are read in chunks with a server-side cursor and written out as they
+    arrive, so memory use does not grow with the size of the export.
+    """
+    params_serializer = TransactionExportParamsSerializer(data=request.query_params)
+    if not params_serializer.is_valid():
+        return Response(params_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    header = TransactionSerializer.Meta.fields
+    rows = (
+        Transaction.objects.filtered(**params_serializer.validated_data)
+        .order_by("-created_at", "-id")
+        .values_list(*header)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+    renderer = request.accepted_renderer
+    response = StreamingHttpResponse(
+        renderer.stream(header, rows),
+        content_type=f"{renderer.media_type}; charset={renderer.charset}",
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="transactions.{renderer.format}"'
+    )
+    return response
+
 
-    serializer = TransactionSerializer(queryset, many=True)
-    return Response(serializer.data)
+def metrics(request):
+    """Prometheus scrape endpoint, aggregated over workers in multiprocess mode"""
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
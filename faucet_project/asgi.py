@@ -0,0 +1,17 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "faucet_project.settings")
+
+django_application = get_asgi_application()
+
+# Imported once the app registry is ready
+from faucet.streamlit_view import streamlit_websocket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # Django serves HTTP, the only websocket is Streamlit's and it is bridged
+    if scope["type"] == "websocket":
+        await streamlit_websocket(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -68,9 +68,46 @@ DATABASES = {
         "PASSWORD": config("POSTGRES_PASSWORD", default="postgres"),
         "HOST": config("POSTGRES_HOST", default="127.0.0.1"),
         "PORT": config("POSTGRES_PORT", default="5432"),
+        # Seconds a worker keeps its connection open for the next request, 0 closes
+        # it after every request. 0 under ASGI (FAUCET_SERVER=uvicorn), where each
+        # request may run on a new thread and would leave its connection behind.
+        "CONN_MAX_AGE": config(
+            "POSTGRES_CONN_MAX_AGE",
+            default=(
+                0 if config("FAUCET_SERVER", default="gunicorn") == "uvicorn" else 60
+            ),
+            cast=int,
+        ),
+        # Ping a reused connection before the first query of a request
+        "CONN_HEALTH_CHECKS": config(
+            "POSTGRES_CONN_HEALTH_CHECKS", default=True, cast=bool
+        ),
+        # Server-side cursors stream the export, but break behind PgBouncer in
+        # transaction pooling mode
+        "DISABLE_SERVER_SIDE_CURSORS": config(
+            "POSTGRES_DISABLE_SERVER_SIDE_CURSORS", default=False, cast=bool
+        ),
+        "OPTIONS": {
+            "connect_timeout": config("POSTGRES_CONNECT_TIMEOUT", default=5, cast=int)
+        },
     }
 }
 
+# Cache used for the stats response and the settled timeseries buckets. The
+# default is per process, set REDIS_URL to share it between workers. Rate limits
+# have their own store, see FAUCET_RATELIMIT_BACKEND (faucet/limiter.py).
+REDIS_URL = config("REDIS_URL", default="")
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+        if REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
 # Internationalization
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
@@ -126,8 +163,17 @@ SPECTACULAR_SETTINGS = {
     "REDOC_DIST": "SIDECAR",
 }
 
-# Whitenoise for serving static files
-STATICFILES_STORAGE = "whitenoise.storage.StaticFilesStorage"
+# Whitenoise serves static files. collectstatic writes content-hashed names and
+# gzip (and brotli, if installed) copies next to each file, so whitenoise sends
+# them precompressed with a far-future immutable Cache-Control.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    },
+}
+# Unhashed files (e.g. favicon.ico) are cached for a day
+WHITENOISE_MAX_AGE = 0 if DEBUG else 86400
 
 # CSRF settings
 CSRF_COOKIE_SECURE = False  # Set to True in production
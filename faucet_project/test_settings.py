@@ -1,3 +1,5 @@
+import os
+
 from .settings import *  # noqa
 
 DATABASES = {
@@ -7,8 +9,14 @@ DATABASES = {
     }
 }
 
-# Disable rate limiting for tests
-RATELIMIT_ENABLE = False
+# No collectstatic in tests, so there is no manifest of hashed names
+STORAGES = {
+    **STORAGES,  # noqa: F405
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# Keep rate limit state in memory instead of a shared file
+os.environ.setdefault("FAUCET_RATELIMIT_BACKEND", "memory")
 
 # Disable real Web3 connections
 ETHEREUM_NODE_URL = "http://dummy"
@@ -5,6 +5,7 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 from faucet.streamlit_view import StreamlitProxyView
+from faucet.views import metrics
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -22,6 +23,7 @@ urlpatterns = [
             ]
         ),
     ),
+    path("metrics", metrics, name="metrics"),
     # Catch all other URLs and send them to Streamlit
     re_path(r"^(?P<path>.*)$", StreamlitProxyView.as_view(), name="home"),
 ]
@@ -0,0 +1,97 @@
+# Loaded automatically by gunicorn when started from the repository root.
+# FAUCET_SERVER=gunicorn serves the WSGI app with threaded workers, uvicorn the
+# ASGI app with uvicorn workers. Every value can be overridden from the
+# environment or the gunicorn command line.
+import glob
+import os
+
+
+def _cpus():
+    # Cores this process may run on, which respects container CPU sets
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+_asgi = os.environ.get("FAUCET_SERVER", "gunicorn") == "uvicorn"
+
+wsgi_app = (
+    "faucet_project.asgi:application" if _asgi else "faucet_project.wsgi:application"
+)
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# An event loop worker per core for ASGI; sync workers also wait on the node and
+# the database, so run more of them, each with a few threads
+if _asgi:
+    worker_class = "uvicorn.workers.UvicornWorker"
+    workers = int(os.environ.get("WEB_CONCURRENCY", _cpus()))
+else:
+    worker_class = "gthread"
+    workers = int(os.environ.get("WEB_CONCURRENCY", _cpus() * 2 + 1))
+    threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Import the app once in the master, workers share its memory copy-on-write
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Recycle workers now and then to bound slow leaks, jittered so they do not all
+# restart at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+# A broadcast waits up to ETHEREUM_READ_TIMEOUT on the node, leave room for it
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+# Let in-flight requests finish on restart or shutdown
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+
+def on_starting(server):
+    # Samples left by a previous run would be added to this one
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # The snapshot was taken in the master, re-read it so a HUP to the
+        # master brings .env changes to the new workers. The environment is
+        # inherited from the master and stays as it was started
+        from faucet.conf import reload_settings
+
+        reload_settings()
+
+
+def worker_exit(server, worker):
+    # A worker supervising an embedded Streamlit frees the lock for another
+    # worker to take over. A healthy Streamlit is left running, so recycling the
+    # worker after max_requests does not drop the dashboard sessions
+    from faucet.streamlit_supervisor import stop_supervisor
+
+    stop_supervisor(hand_over=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    # Stop the embedded Streamlit the last owner handed over
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "faucet_project.settings")
+    import django
+
+    django.setup()
+    from faucet.conf import get_settings
+    from faucet.streamlit_supervisor import stop_streamlit
+
+    if get_settings().streamlit_mode == "embedded":
+        stop_streamlit()
@@ -0,0 +1,37 @@
+#!/bin/sh
+# Production entry point of the container.
+#
+#   FAUCET_SERVER          gunicorn (WSGI, default), uvicorn (ASGI workers under
+#                          gunicorn) or runserver (development)
+#   FAUCET_STREAMLIT_MODE  separate (default): start Streamlit here in its own
+#                          process group; embedded: the web workers start it on
+#                          demand. Set FAUCET_START_STREAMLIT=false when it
+#                          runs in another container
+set -e
+
+export FAUCET_SERVER="${FAUCET_SERVER:-gunicorn}"
+export FAUCET_STREAMLIT_MODE="${FAUCET_STREAMLIT_MODE:-separate}"
+
+if [ "$FAUCET_STREAMLIT_MODE" = "separate" ] && [ "${FAUCET_START_STREAMLIT:-true}" = "true" ]; then
+    # setsid: signals for the API server (HUP, TERM to its group) do not reach it
+    setsid streamlit run faucet/streamlit_app.py \
+        --server.port "${STREAMLIT_SERVER_PORT:-8501}" \
+        --server.address 0.0.0.0 \
+        --server.baseUrlPath "" \
+        --server.enableCORS false \
+        --server.enableXsrfProtection false &
+fi
+
+case "$FAUCET_SERVER" in
+    gunicorn|uvicorn)
+        # Settings come from gunicorn.conf.py
+        exec gunicorn
+        ;;
+    runserver)
+        exec python manage.py runserver 0.0.0.0:8000
+        ;;
+    *)
+        echo "Unknown FAUCET_SERVER=$FAUCET_SERVER, expected gunicorn, uvicorn or runserver" >&2
+        exit 1
+        ;;
+esac